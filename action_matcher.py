@@ -1,12 +1,12 @@
 from typing import List, Optional, Tuple
-from langchain_openai import OpenAIEmbeddings
 import numpy as np
-from config import OPENAI_API_KEY
+from embedding_dispatcher import get_embedding_dispatcher
 
 
 class ActionMatcher:
-    def __init__(self):
-        self.embeddings = OpenAIEmbeddings(api_key=OPENAI_API_KEY)
+    def __init__(self, embeddings=None):
+        # 기본값은 세션 간 공유되는 마이크로 배치 디스패처
+        self.embeddings = embeddings or get_embedding_dispatcher()
         self.cached_embeddings = {}
 
     def get_embedding(self, text: str) -> List[float]:
@@ -22,6 +22,18 @@ class ActionMatcher:
         if not available_actions:
             return None
 
+        # 캐시에 없는 문자열은 한 번의 배치 요청으로 임베딩
+        missing = [
+            text
+            for text in dict.fromkeys([user_input, *available_actions])
+            if text not in self.cached_embeddings
+        ]
+        if missing:
+            for text, embedding in zip(
+                missing, self.embeddings.embed_documents(missing)
+            ):
+                self.cached_embeddings[text] = embedding
+
         input_embedding = self.get_embedding(user_input)
 
         # 각 action의 임베딩 계산
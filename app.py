@@ -2,13 +2,18 @@
 import streamlit as st
 import config
 import uuid
-from state_graph import create_state_graph, create_game_graph
+from state_graph import (
+    create_state_graph,
+    create_async_game_graph,
+    get_dependency,
+)
+from turn_stream import run_game_turn
 from story_chain import create_story_chain, create_map_analyst
 from db_interface import DBInterface
-from db_factory import get_db_manager
+from db_factory import get_db_manager, get_shared_db_manager
 from db_state_injector import DBStateInjector
-from db_utils import extract_entities_and_relationships, update_graph_from_er
-from states import PlayerState, player_state_to_dict
+from ere_worker import enqueue_ere
+from states import PlayerState, player_state_to_dict, load_initial_player_state
 import json
 from neo4j import GraphDatabase
 from typing import List, Dict, Any, Optional
@@ -31,11 +36,15 @@ from db_state_injector import DBStateInjector
 from db_factory import get_db_manager
 from action_matcher import ActionMatcher
 from map_agent import MapAgent
-import asyncio
+from scene_graph import get_scene_graph
+from history_manager import HistoryManager, get_default_summarizer
+from story_memory import get_story_memory
+from turn_budget import new_turn_deadline
 from streamlit.runtime.scriptrunner import add_script_run_ctx
 from story_retriever import StoryRetriever
-from langchain_openai import OpenAIEmbeddings
-from image_gen import generate_scene_image
+from embedding_dispatcher import get_embedding_dispatcher
+from image_scheduler import get_image_scheduler
+from image_store import get_image_store
 
 
 # Page configuration
@@ -49,53 +58,18 @@ OPENAI_API_KEY = config.OPENAI_API_KEY
 GOOGLE_API_KEY = config.GOOGLE_API_KEY
 
 # 전역 변수로 game_graph 초기화
-game_graph = create_game_graph()
+# 턴은 백그라운드 이벤트 루프에서 비동기로 실행 (run_game_turn이 스크립트 스레드로 토큰 전달)
+game_graph = create_async_game_graph()
 
 
 def load_initial_state() -> PlayerState:
     """
     Load the initial game state.
     If the JSON file is missing or invalid, return a default initial state.
-    """
-    # 현재 스크립트의 디렉토리를 가져옵니다.
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    # 파일의 상대 경로를 구성합니다.
-    state_file_path = os.path.join(
-        script_dir, "data", "state", "sample_game_state.json"
-    )
-
-    default_state = {
-        "player": {
-            "id": "character:Player",
-            "name": "Player",
-            "sex": "unknown",
-            "position": {"map": "map:Pangyo_B2_Concourse", "x": 1, "y": 1},
-            "direction": "north",
-            "field_of_view": 3,
-            "inventory": [],
-            "stamina": 100,
-            "status": "normal",
-        },
-        "map": "map:Pangyo_B2_Concourse",
-        "scene": "scene:00_Pangyo_Station",
-        "scene_beat": "scene_beat:00_Pangyo_Station_1",
-        "history": [],
-        "user_input": "",
-        "map_context": "",
-        "generation": "",
-        "characters": [],
-        "extracted_data": {},
-    }
 
-    try:
-        with open(state_file_path, "r", encoding="utf-8") as f:
-            initial_state_data = json.load(f)
-        return PlayerState(initial_state_data)
-    except (FileNotFoundError, json.JSONDecodeError):
-        print(
-            "Warning: Using default game state as the JSON file is missing or invalid."
-        )
-        return PlayerState(initial_state_data)
+    파일은 프로세스당 한 번만 읽고, 호출마다 복사본을 반환합니다.
+    """
+    return load_initial_player_state()
 
 
 game_state = load_initial_state()  # 초기 게임 상태 로드
@@ -104,49 +78,17 @@ game_state = load_initial_state()  # 초기 게임 상태 로드
 def get_next_scene_beat(
     db_manager, current_scene_beat_id: str, choice: str = ""
 ) -> str:
-    """현재 씬 비트 ID에서 다음 씬 비트 ID를 가져옵니다."""
-    try:
-        # 기본 매개변수 설정
-        params = {"current_scene_beat_id": current_scene_beat_id}
-
-        if choice:
-            # 선택에 따른 다음 씬 비트 조회
-            query = """
-            MATCH (sb:SceneBeat {id: $current_scene_beat_id})
-            -[r:CONDITION {action: $choice}]->(next_sb:SceneBeat)
-            RETURN next_sb.id AS next_scene_beat_id
-            LIMIT 1
-            """
-            params["choice"] = choice
-        else:
-            # 기본 다음 씬 비트 조회
-            query = """
-            MATCH (sb:SceneBeat {id: $current_scene_beat_id})
-            -[:NEXT]->(next_sb:SceneBeat)
-            RETURN next_sb.id AS next_scene_beat_id
-            LIMIT 1
-            """
-
-        # 이전 형식으로 query 호출
-        result = db_manager.query(query, params)
-
-        if not result:
-            # 다음 씬 비트가 없을 경우 대체 쿼리 시도
-            fallback_query = """
-            MATCH (sb:SceneBeat)
-            WHERE sb.id STARTS WITH 'scene:'
-            RETURN sb.id AS next_scene_beat_id
-            LIMIT 1
-            """
-            # 빈 매개변수 딕셔너리 전달
-            result = db_manager.query(fallback_query, {})
-
-            if not result:
-                raise ValueError(
-                    f"No next scene beat found for {current_scene_beat_id}"
-                )
+    """현재 씬 비트 ID에서 다음 씬 비트 ID를 가져옵니다.
 
-        return result[0]["next_scene_beat_id"]
+    CONDITION/NEXT 관계는 메모리에 컴파일된 씬 그래프에서 조회합니다.
+    """
+    try:
+        next_scene_beat_id = get_scene_graph(db_manager).next_beat(
+            current_scene_beat_id, choice
+        )
+        if not next_scene_beat_id:
+            raise ValueError(f"No next scene beat found for {current_scene_beat_id}")
+        return next_scene_beat_id
 
     except Exception as e:
         print(f"Error in get_next_scene_beat: {e}")
@@ -156,58 +98,17 @@ def get_next_scene_beat(
 def get_scene_map_id(db_manager, scene_id: str) -> str:
     """주어진 씬 ID와 연결된 맵 ID를 가져옵니다."""
     try:
-        query = """
-        MATCH (s:Scene {id: $scene_id})-[:TAKES_PLACE_IN]->(m:Map)
-        RETURN m.id AS map_id
-        """
-        result = db_manager.query(query=query, params={"scene_id": scene_id})
+        map_id = get_scene_graph(db_manager).map_of(scene_id)
 
-        if not result:
+        if not map_id:
             raise ValueError(f"No map found for scene {scene_id}")
 
-        return result[0]["map_id"]
+        return map_id
     except Exception as e:
         print(f"Error during getting map_id: {e}")
         return None
 
 
-def is_choice_scene(db_manager, scene_beat_id: str) -> bool:
-    """씬 비트가 선택 씬인지 확인합니다."""
-    try:
-        query = """
-        MATCH (sb:SceneBeat {id: $scene_beat_id})
-        RETURN sb.next_scene_beat_id as next_ids
-        """
-        result = db_manager.query(query=query, params={"scene_beat_id": scene_beat_id})
-
-        if not result:
-            return False
-
-        next_ids = result[0]["next_ids"]
-        return len(next_ids) > 1
-    except Exception as e:
-        print(f"Error during check choice scene: {e}")
-        return False
-
-
-def get_available_actions(db_manager, scene_id: str) -> List[str]:
-    """현재 씬에서 가능한 행동들을 가져옵니다."""
-    try:
-        query = """
-        MATCH (s:Scene {id: $scene_id})
-        RETURN s.available_actions AS available_actions
-        """
-        result = db_manager.query(query=query, params={"scene_id": scene_id})
-
-        if not result:
-            return []
-
-        return result[0]["available_actions"]
-    except Exception as e:
-        print(f"Error during get available action : {e}")
-        return []
-
-
 def check_action_in_available_actions(
     user_input: str, available_actions: List[str]
 ) -> bool:
@@ -218,52 +119,86 @@ def check_action_in_available_actions(
         return False
 
 
-# 추출된 데이터를 미리 extracted_data에 저장한 뒤에 업데이트 하도록 변경 (자료 손실 예방)
 def ere_extraction_node(data):
-    """사용자 입력으로부터 엔티티와 관계를 추출하고 그래프를 업데이트합니다."""
+    """엔티티/관계 추출과 그래프 업데이트를 백그라운드 큐에 넣습니다. (다음 턴부터 반영)"""
     user_input = data.get("user_input")
     if user_input:
-        db_client = data.get("db_client")
+        enqueue_ere(data.get("session_id", ""), user_input, data.get("db_client"))
+    # 병렬 브랜치이므로 다른 브랜치의 출력과 겹치지 않도록 상태를 바꾸지 않음
+    return {}
+
+
+def get_session_id() -> str:
+    """현재 게임 세션 ID. 저장된 적 없는 게임은 브라우저 세션마다 임시 ID를 사용합니다."""
+    return st.session_state.state.get("session_id") or st.session_state.setdefault(
+        "temp_session_id", str(uuid.uuid4())
+    )
+
+
+def get_turn_context(
+    db_manager, current_scene_beat_id: str, choice: str = ""
+) -> Optional[Dict[str, Any]]:
+    """다음 비트, 씬, 맵, 가능한 행동, 선택 여부를 가져옵니다.
+
+    씬 그래프(메모리)에서 결정하므로 턴마다 데이터베이스를 조회하지 않습니다.
+    현재 비트가 씬 그래프에 없을 때만 한 번의 쿼리(fetch_turn_context)로 조회합니다.
+    """
+    scene_graph = get_scene_graph(db_manager)
+    if current_scene_beat_id not in scene_graph and db_manager is not None:
         try:
-            extracted_data = extract_entities_and_relationships(user_input)
-            data["extracted_data"] = extracted_data
-            update_graph_from_er(db_client, extracted_data)
+            turn_context = db_manager.fetch_turn_context(current_scene_beat_id, choice)
         except Exception as e:
-            print(f"Error during ere_extraction_node : {e}")
-    return data
+            print(f"Error during fetch turn context: {e}")
+            turn_context = None
+        if turn_context and turn_context["next_beat_id"]:
+            return turn_context
+
+    # 매칭되는 관계가 없으면 씬 그래프의 대체 비트를 사용
+    transition = scene_graph.resolve(current_scene_beat_id, choice)
+    if not transition:
+        return None
+    return {
+        "next_beat_id": transition.beat_id,
+        "scene_id": transition.scene_id,
+        "map_id": transition.map_id,
+        "available_actions": scene_graph.available_actions(transition.beat_id),
+        "is_choice": scene_graph.is_choice(transition.beat_id),
+        "beat": scene_graph.beat(transition.beat_id),
+    }
 
 
-def scene_transition_node(data):
+def scene_transition_node(data, config=None):
     """사용자 입력과 게임 상태에 따라 다음 씬으로 전환합니다."""
     user_input = data.get("user_input")
     current_scene_beat_id = data.get("scene_beat")
-    db_manager = st.session_state.db_manager
+    db_manager = get_dependency(config, "db_manager")
 
-    # choice_make 함수 호출 제거
-    next_scene_beat = get_next_scene_beat(
+    turn_context = get_turn_context(
         db_manager=db_manager,
         current_scene_beat_id=current_scene_beat_id,
         choice=user_input,  # 직접 user_input 전달
     )
     try:
-        if not next_scene_beat:
-            print(f"No valid next scene beat. scene_beat: {next_scene_beat}")
+        if not turn_context:
+            print(f"No valid next scene beat. scene_beat: {current_scene_beat_id}")
             return data.update({"scene_beat": None})
 
-        data["scene_beat"] = next_scene_beat
+        data["scene_beat"] = turn_context["next_beat_id"]
+        data["current_beat"] = turn_context["beat"]
+        data["is_choice"] = turn_context["is_choice"]
+        if turn_context["available_actions"]:
+            data["available_actions"] = turn_context["available_actions"]
 
         # Update scene
-        if next_scene_beat.startswith("scene:"):
-            data["scene"] = next_scene_beat
+        if turn_context["scene_id"]:
+            data["scene"] = turn_context["scene_id"]
 
             # Update map
-            next_scene_id = next_scene_beat
-            map_id = get_scene_map_id(db_manager, next_scene_id)
-            if not map_id:
-                print(f"No valid map_id. scene: {next_scene_id}")
+            if not turn_context["map_id"]:
+                print(f"No valid map_id. scene: {turn_context['scene_id']}")
                 return data
 
-            data["map"] = map_id
+            data["map"] = turn_context["map_id"]
     except ValueError as e:
         print(f"Error: {e}")
     return data
@@ -271,8 +206,10 @@ def scene_transition_node(data):
 
 def check_valid_action(data):
     current_scene_id = data.get("scene")
-    db_client = data.get("db_client")
-    available_actions = get_available_actions(db_client, current_scene_id)
+    # 가능한 행동은 씬 그래프(메모리)에서 조회
+    available_actions = get_scene_graph(data.get("db_client")).available_actions(
+        current_scene_id
+    )
     data["available_actions"] = available_actions
     # 입력이 유효했는지 검증하는 action result (임시)
     data["action_result"] = (
@@ -368,12 +305,18 @@ app = workflow.compile()
 def initialize_game_state():
     """게임 상태를 초기화합니다."""
     if "db_manager" not in st.session_state:
-        st.session_state.db_manager = get_db_manager()
+        # 세션마다 연결/스키마 조회를 하지 않도록 공유 매니저 사용
+        st.session_state.db_manager = get_shared_db_manager()
 
     if "story_retriever" not in st.session_state:
         st.session_state.story_retriever = StoryRetriever(
             db_manager=st.session_state.db_manager,
-            embeddings=OpenAIEmbeddings(model="text-embedding-3-small"),
+            embeddings=get_embedding_dispatcher("text-embedding-3-small"),
+        )
+
+    if "history_manager" not in st.session_state:
+        st.session_state.history_manager = HistoryManager(
+            summarizer=get_default_summarizer()
         )
 
     if "state" not in st.session_state:
@@ -399,60 +342,64 @@ def display_game_state():
             st.markdown(st.session_state.state["context"])
 
         # 표시용 히스토리와 이미지 표시
+        attach_ready_images()
+        images = st.session_state.state.get("images", {})
+        image_jobs = st.session_state.state.get("image_jobs", {})
         if "display_history" in st.session_state.state:
             for i, story in enumerate(st.session_state.state["display_history"]):
                 st.markdown(story)
-                # 해당 스토리에 대한 이미지가 있으면 표시
-                if "images" in st.session_state.state and i < len(
-                    st.session_state.state["images"]
-                ):
+                # 해당 스토리에 대한 이미지가 있으면 표시 (세션에는 참조만 보관)
+                image_path = (
+                    get_image_store().path_for(images[i]) if i in images else None
+                )
+                if image_path:
                     st.image(
-                        st.session_state.state["images"][i],
+                        image_path,
                         caption=f"Scene {i+1}",
                         use_container_width=True,
                     )
+                elif i in image_jobs:
+                    st.caption("장면 이미지 생성 중...")
 
+        # 생성 중인 이미지가 있으면 끝날 때까지 주기적으로 확인
+        if image_jobs:
+            poll_image_jobs()
 
-def update_game_state(state: dict, next_scene_beat: str) -> dict:
-    """게임 상태를 업데이트합니다."""
-    state["scene_beat"] = next_scene_beat
-    if next_scene_beat.startswith("scene:"):
-        state["scene"] = next_scene_beat
-    return state
-
-
-def get_next_beat(
-    current_beat: Dict[str, Any], action: str
-) -> Optional[Dict[str, Any]]:
-    """현재 비트에서 선택된 액션에 따른 다음 비트를 반환합니다."""
-    try:
-        # 다음 비트 ID 목록 가져오기
-        next_beat_ids = current_beat.get("next_scene_beats", [])
 
-        if not next_beat_ids:
-            return None
+def attach_ready_images() -> bool:
+    """끝난 이미지 생성 작업의 이미지 참조를 해당 이야기(display_history 인덱스)에 붙입니다.
 
-        # Neo4j에서 다음 비트 정보 조회
-        query = """
-        MATCH (sb:SceneBeat)
-        WHERE sb.id IN $next_beat_ids
-        RETURN sb
-        """
+    Returns:
+        새로 붙은 이미지가 있으면 True
+    """
+    image_jobs = st.session_state.state.get("image_jobs", {})
+    if not image_jobs:
+        return False
+    finished = get_image_scheduler().collect(image_jobs.values())
+    attached = False
+    for index, job_id in list(image_jobs.items()):
+        if job_id not in finished:
+            continue
+        del image_jobs[index]
+        if finished[job_id]:
+            st.session_state.state.setdefault("images", {})[index] = finished[job_id]
+            attached = True
+    return attached
 
-        results = st.session_state.db_manager.query(
-            query=query, params={"next_beat_ids": next_beat_ids}
-        )
 
-        if results:
-            # 첫 번째 다음 비트 반환 (추후 조건부 분기 로직 추가 가능)
-            next_beat_data = results[0]["sb"]
-            return parse_node_data(next_beat_data)
+@st.fragment(run_every=config.IMAGE_POLL_INTERVAL)
+def poll_image_jobs():
+    """생성 중인 이미지를 확인하고, 끝난 이미지가 있으면 화면을 다시 그립니다."""
+    if attach_ready_images() or not st.session_state.state.get("image_jobs"):
+        st.rerun()
 
-        return None
 
-    except Exception as e:
-        st.error(f"다음 비트 조회 중 오류 발생: {str(e)}")
-        return None
+def update_game_state(state: dict, next_scene_beat: str) -> dict:
+    """게임 상태를 업데이트합니다."""
+    state["scene_beat"] = next_scene_beat
+    if next_scene_beat.startswith("scene:"):
+        state["scene"] = next_scene_beat
+    return state
 
 
 def parse_node_data(node_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -521,22 +468,16 @@ def handle_user_input(user_input: str):
     if user_input and user_input != st.session_state.previous_input:
         st.session_state.previous_input = user_input
 
-        try:
-            with st.status("처리 중...") as status:
-                status.write("관련 컨텍스트 검색 중...")
+        # 스토리 토큰이 도착하는 대로 표시할 영역
+        story_placeholder = st.empty()
+        streamed_tokens = []
 
-                try:
-                    # 동기 방식으로 검색 실행
-                    retrieval_results = st.session_state.story_retriever.retrieve_all(
-                        user_input
-                    )
-                    context = st.session_state.story_retriever.get_context_from_results(
-                        retrieval_results
-                    )
-                except Exception as e:
-                    print(f"Vector retrieval error: {e}")
-                    context = ""  # 검색 실패 시 빈 컨텍스트 사용
+        def render_story_token(token: str) -> None:
+            streamed_tokens.append(token)
+            story_placeholder.markdown("".join(streamed_tokens) + "▌")
 
+        try:
+            with st.status("처리 중...") as status:
                 # 현재 상태 구성
                 current_state = {
                     "scene": st.session_state.state.get("scene", ""),
@@ -547,17 +488,41 @@ def handle_user_input(user_input: str):
                     ),
                     "map_context": st.session_state.state.get("map_context", ""),
                     "characters": st.session_state.state.get("characters", []),
-                    "history": st.session_state.state.get("history", []),
-                    "context": context,
+                    "history": st.session_state.history_manager.prompt_history(),
+                    "player": st.session_state.state.get("player", {}),
+                    "map": st.session_state.state.get("map", ""),
+                    "context": "",
+                    "memory": "",
+                    "extracted_data": {},
                     "matched_action": None,
                     "action_result": None,
                     "generation": "",
+                    # 턴 전체 시간 예산: 남은 시간이 부족하면 선택 단계를 건너뜀
+                    "turn_deadline": new_turn_deadline(),
                 }
 
-                status.write("스토리 생성 중...")
+                # 검색, 맵 분석, 엔티티 추출, 액션 매칭은 그래프 안에서 병렬로 실행
+                status.write("관련 컨텍스트 검색 및 스토리 생성 중...")
                 # 스크립트 실행 컨텍스트 추가
                 add_script_run_ctx()
-                result = game_graph.invoke(current_state)
+                # 병렬 브랜치는 작업 스레드에서 실행되므로 의존 객체는 config로 전달
+                turn_config = {
+                    "configurable": {
+                        "db_manager": st.session_state.db_manager,
+                        "story_retriever": st.session_state.story_retriever,
+                        # 엔티티 추출 순서와 장기 기억을 세션별로 구분하는 키
+                        "session_id": get_session_id(),
+                    }
+                }
+                result = run_game_turn(
+                    game_graph, current_state, render_story_token, config=turn_config
+                )
+                # 최종 결과를 표시: 캐시된 응답은 토큰 스트림이 없고,
+                # 중복 요청이 이긴 경우 스트리밍된 토큰과 결과가 다를 수 있음
+                if isinstance(result, dict) and result.get("generation"):
+                    story_placeholder.markdown(result["generation"])
+                elif streamed_tokens:
+                    story_placeholder.markdown("".join(streamed_tokens))
 
                 if isinstance(result, dict):
                     status.write("스토리 생성 완료")
@@ -571,27 +536,17 @@ def handle_user_input(user_input: str):
                                 f"새로운 장면으로 이동: {result['next_scene']}"
                             )
 
-                    # 생성된 이야기를 히스토리에 추가
-                    if result.get("generation"):
-                        if "history" not in st.session_state.state:
-                            st.session_state.state["history"] = []
-                        st.session_state.state["history"].append(result["generation"])
-
-                        # 이미지 생성 추가
-                        status.write("장면 이미지 생성 중...")
-                        try:
-                            scene_summary = st.session_state.state.get(
-                                "map_context", ""
-                            )
-                            image_bytes = generate_scene_image(
-                                scene_summary, result["generation"]
-                            )
-                            if image_bytes:
-                                if "images" not in st.session_state.state:
-                                    st.session_state.state["images"] = []
-                                st.session_state.state["images"].append(image_bytes)
-                        except Exception as e:
-                            print(f"Image generation error: {e}")
+                    # 생성된 이야기를 히스토리에 추가 (오래된 턴은 백그라운드에서 요약)
+                    # 잘못된 입력에 대한 내레이션은 이야기 진행이 아니므로 제외
+                    if (
+                        result.get("generation")
+                        and result.get("action_result") != "invalid_input"
+                    ):
+                        st.session_state.history_manager.add_turn(result["generation"])
+                        # 장기 기억에 입력과 이야기를 기록 (임베딩은 백그라운드에서)
+                        get_story_memory().record_turn(
+                            get_session_id(), user_input, result["generation"]
+                        )
 
                     # 생성된 이야기를 display_history에 추가
                     if result.get("generation"):
@@ -601,11 +556,32 @@ def handle_user_input(user_input: str):
                             result["generation"]
                         )
 
+                        # 장면 이미지: 스케줄러가 그릴 턴을 골라 백그라운드에서 생성하고,
+                        # 끝나면 이 이야기에 붙임 (다시 찾은 장면은 전에 만든 이미지 사용)
+                        display_index = (
+                            len(st.session_state.state["display_history"]) - 1
+                        )
+                        # 상태는 아직 턴 이전 값이므로 이번 턴의 장면/비트/맵을 먼저 사용
+                        decision = get_image_scheduler().schedule_turn(
+                            get_session_id(), result, st.session_state.state
+                        )
+                        if decision.ref:
+                            st.session_state.state.setdefault("images", {})[
+                                display_index
+                            ] = decision.ref
+                        elif decision.ticket:
+                            st.session_state.state.setdefault("image_jobs", {})[
+                                display_index
+                            ] = decision.ticket
+
                     # 상태 업데이트 (context 제외)
                     result_without_context = {
                         k: v for k, v in result.items() if k != "context"
                     }
                     st.session_state.state.update(result_without_context)
+                    st.session_state.state[
+                        "history"
+                    ] = st.session_state.history_manager.prompt_history()
 
                     status.update(label="완료!", state="complete")
                     return result
@@ -658,10 +634,7 @@ def main():
             with st.spinner("이야기를 생성하는 중..."):
                 result = handle_user_input(user_input)
                 if result and result.get("generation"):
-                    # 히스토리에 새로운 내용 추가
-                    if "history" not in st.session_state.state:
-                        st.session_state.state["history"] = []
-                    st.session_state.state["history"].append(result["generation"])
+                    # 히스토리는 handle_user_input에서 history_manager로 관리
 
                     # 세이브 파일 업데이트
                     session_id = st.session_state.state.get("session_id")
@@ -0,0 +1,120 @@
+"""Background asyncio event loop with a sync bridge.
+
+Streamlit 스크립트는 동기 코드로 실행되므로, 비동기 턴 그래프는 프로세스 전역
+백그라운드 이벤트 루프에서 실행하고 스크립트 스레드는 결과(또는 스트림 항목)만
+기다립니다. 모델/DB 호출이 I/O를 기다리는 동안 같은 루프에서 다른 세션의 턴이
+함께 진행되므로, 동시에 처리할 수 있는 턴 수가 작업 스레드 수에 묶이지 않습니다.
+"""
+
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+# 비동기 클라이언트가 없는 블로킹 호출(asyncio.to_thread)에 사용할 스레드 수
+BLOCKING_CALL_WORKERS = 32
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+_DONE = object()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """백그라운드 이벤트 루프를 반환합니다. 처음 호출할 때 루프 스레드를 시작합니다."""
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            loop.set_default_executor(
+                ThreadPoolExecutor(
+                    max_workers=BLOCKING_CALL_WORKERS, thread_name_prefix="async-blocking"
+                )
+            )
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            _thread = threading.Thread(target=run, name="async-runtime", daemon=True)
+            _thread.start()
+            started.wait()
+            _loop = loop
+        return _loop
+
+
+def submit(coro: Awaitable[Any]) -> Future:
+    """코루틴을 백그라운드 루프에 예약하고 concurrent.futures.Future를 반환합니다."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+def run_sync(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """코루틴을 백그라운드 루프에서 실행하고 결과를 기다립니다.
+
+    Raises:
+        RuntimeError: 루프 스레드 안에서 호출한 경우 (교착 상태 방지)
+    """
+    if threading.current_thread() is _thread:
+        raise RuntimeError("run_sync cannot be called from the event loop thread")
+    future = submit(coro)
+    try:
+        return future.result(timeout=timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def iterate_sync(
+    make_iterator: Callable[[], AsyncIterator[Any]], timeout: Optional[float] = None
+) -> Iterator[Any]:
+    """비동기 이터레이터를 백그라운드 루프에서 돌리고 항목을 동기적으로 전달합니다.
+
+    항목은 호출한 스레드에서 받으므로 Streamlit 요소를 바로 갱신할 수 있습니다.
+
+    Args:
+        make_iterator: 비동기 이터레이터를 만드는 함수 (루프 안에서 호출됨)
+        timeout: 다음 항목을 기다리는 최대 시간 (초)
+    """
+    items: "queue.Queue" = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in make_iterator():
+                items.put((item, None))
+        except BaseException as e:
+            items.put((_DONE, e))
+            raise
+        items.put((_DONE, None))
+
+    future = submit(pump())
+    try:
+        while True:
+            try:
+                item, error = items.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"No item within {timeout}s") from None
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # 소비자가 중간에 멈추면 루프의 작업도 취소
+        if not future.done():
+            future.cancel()
+
+
+def shutdown() -> None:
+    """백그라운드 루프를 멈춥니다. (테스트/종료용)"""
+    global _loop, _thread
+    with _lock:
+        if _loop is not None and not _loop.is_closed():
+            _loop.call_soon_threadsafe(_loop.stop)
+            if _thread is not None:
+                _thread.join(timeout=5)
+            _loop.close()
+        _loop = None
+        _thread = None
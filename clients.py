@@ -0,0 +1,330 @@
+"""Process-wide model clients.
+
+모델/임베딩/Gemini 클라이언트를 호출할 때마다 만들지 않고 프로세스 전역 싱글턴으로
+나눠 씁니다. OpenAI 계열 클라이언트는 keep-alive 연결 풀을 공유하므로 TLS 연결과
+클라이언트 초기화 비용을 매 턴 다시 내지 않습니다. 모델별 동시 호출 수는
+ModelLimiter로 제한합니다.
+"""
+
+import asyncio
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, Optional, Tuple
+
+from turn_budget import config_remaining
+
+# 모델별 최대 동시 호출 수 (없는 모델은 config.LLM_DEFAULT_CONCURRENCY)
+MODEL_CONCURRENCY_LIMITS: Dict[str, int] = {
+    "gpt-4o-mini": 32,
+    "gpt-4o": 16,
+    "text-embedding-3-small": 16,
+    "gemini-2.0-pro-exp-02-05": 8,
+    "gemini-2.0-flash": 16,
+    "gemini-2.0-flash-exp-image-generation": 4,
+}
+
+_clients: Dict[Hashable, Any] = {}
+_limiters: Dict[str, "ModelLimiter"] = {}
+_lock = threading.RLock()
+
+
+class ModelLimiter:
+    """모델 하나의 동시 호출 수를 제한합니다.
+
+    동기 호출(작업 스레드)과 비동기 호출(백그라운드 이벤트 루프)이 하나의 한도를
+    나눠 쓰므로 두 경로를 합친 동시 호출 수가 limit을 넘지 않습니다. 동기 호출은
+    Condition에서 기다리고, 비동기 호출은 이벤트 루프를 막지 않도록 슬롯이 풀릴 때
+    깨워 주는 Future를 기다립니다.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._in_use = 0
+        self._condition = threading.Condition()
+        # (이벤트 루프, 깨울 Future) - 비동기 대기자
+        self._async_waiters: Deque[Tuple[Any, asyncio.Future]] = deque()
+        # 대기 중이거나 실행 중인 호출 수 (모델 라우터가 큐 깊이로 사용)
+        self._depth = 0
+        self._depth_lock = threading.Lock()
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    @property
+    def saturated(self) -> bool:
+        """대기/실행 중인 호출이 limit 이상이면 True (새 호출은 기다릴 가능성이 높음)"""
+        return self._depth >= self.limit
+
+    def _add_depth(self, delta: int) -> None:
+        with self._depth_lock:
+            self._depth += delta
+
+    def _try_take(self) -> bool:
+        # self._condition을 잡은 상태에서 호출
+        if self._in_use < self.limit:
+            self._in_use += 1
+            return True
+        return False
+
+    def _wake_async_waiter(self) -> None:
+        # self._condition을 잡은 상태에서 호출. 깨어난 쪽이 다시 슬롯을 확인함
+        while self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if not waiter.done():
+                loop.call_soon_threadsafe(_set_waiter, waiter)
+                return
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """슬롯을 얻으면 True, timeout 초 안에 얻지 못하면 False"""
+        self._add_depth(1)
+        with self._condition:
+            acquired = self._condition.wait_for(self._try_take, timeout)
+        if not acquired:
+            self._add_depth(-1)
+        return acquired
+
+    def release(self) -> None:
+        with self._condition:
+            if self._in_use <= 0:
+                raise ValueError("ModelLimiter released too many times")
+            self._in_use -= 1
+            # 동기/비동기 대기자를 하나씩 깨우고, 슬롯을 못 얻은 쪽은 다시 기다림
+            self._condition.notify()
+            self._wake_async_waiter()
+        self._add_depth(-1)
+
+    def __enter__(self) -> "ModelLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "ModelLimiter":
+        self._add_depth(1)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                with self._condition:
+                    if self._try_take():
+                        return self
+                    waiter = loop.create_future()
+                    self._async_waiters.append((loop, waiter))
+                try:
+                    await waiter
+                except BaseException:
+                    with self._condition:
+                        if (loop, waiter) in self._async_waiters:
+                            self._async_waiters.remove((loop, waiter))
+                        else:
+                            # 깨워진 뒤 취소되었으면 다른 대기자에게 넘김
+                            self._wake_async_waiter()
+                    raise
+        except BaseException:
+            self._add_depth(-1)
+            raise
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
+
+
+def _set_waiter(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def get_model_limiter(model: str) -> ModelLimiter:
+    """모델별로 공유되는 ModelLimiter를 반환합니다."""
+    with _lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            limit = MODEL_CONCURRENCY_LIMITS.get(model)
+            if limit is None:
+                import config
+
+                limit = config.LLM_DEFAULT_CONCURRENCY
+            limiter = _limiters[model] = ModelLimiter(limit)
+        return limiter
+
+
+def _get_or_create(key: Hashable, factory):
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = factory()
+        return client
+
+
+def get_http_client():
+    """OpenAI 계열 동기 호출이 공유하는 httpx 연결 풀"""
+
+    def create():
+        import httpx
+
+        import config
+
+        return httpx.Client(limits=_http_limits(), timeout=config.LLM_HTTP_TIMEOUT)
+
+    return _get_or_create("http_client", create)
+
+
+def get_async_http_client():
+    """OpenAI 계열 비동기 호출이 공유하는 httpx 연결 풀 (백그라운드 이벤트 루프용)"""
+
+    def create():
+        import httpx
+
+        import config
+
+        return httpx.AsyncClient(limits=_http_limits(), timeout=config.LLM_HTTP_TIMEOUT)
+
+    return _get_or_create("async_http_client", create)
+
+
+def _http_limits():
+    import httpx
+
+    import config
+
+    return httpx.Limits(
+        max_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.LLM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=config.LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_chat_model(
+    model: str = "gpt-4o-mini",
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    cache_node: Optional[str] = None,
+):
+    """공유 연결 풀을 쓰는 ChatOpenAI 싱글턴을 반환합니다.
+
+    Args:
+        model: 모델 이름
+        temperature: 샘플링 온도 (None이면 모델 기본값)
+        max_tokens: 최대 출력 토큰 수
+        cache_node: LLM 응답 캐시 정책 이름 (llm_cache.CACHE_POLICIES)
+    """
+
+    def create():
+        from langchain_openai import ChatOpenAI
+
+        import config
+        from llm_cache import get_llm_cache
+
+        kwargs = {}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+        return ChatOpenAI(
+            model=model,
+            api_key=config.OPENAI_API_KEY,
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client(),
+            timeout=config.LLM_HTTP_TIMEOUT,
+            # 재시도는 hedging.hedged에서 지연 시간을 고려해 처리
+            max_retries=0,
+            cache=get_llm_cache(cache_node) if cache_node else None,
+            **kwargs,
+        )
+
+    return _get_or_create(("openai", model, temperature, max_tokens, cache_node), create)
+
+
+def get_gemini_chat_model(
+    model: str,
+    temperature: Optional[float] = None,
+    cache_node: Optional[str] = None,
+):
+    """ChatGoogleGenerativeAI 싱글턴을 반환합니다. (gRPC 채널을 인스턴스 단위로 재사용)"""
+
+    def create():
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        import config
+        from llm_cache import get_llm_cache
+
+        kwargs = {}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        return ChatGoogleGenerativeAI(
+            model=model,
+            google_api_key=config.GOOGLE_API_KEY,
+            timeout=config.LLM_HTTP_TIMEOUT,
+            max_retries=0,
+            cache=get_llm_cache(cache_node) if cache_node else None,
+            **kwargs,
+        )
+
+    return _get_or_create(("gemini", model, temperature, cache_node), create)
+
+
+def get_embeddings(model: str = "text-embedding-3-small"):
+    """공유 연결 풀을 쓰는 OpenAIEmbeddings 싱글턴을 반환합니다."""
+
+    def create():
+        from langchain_openai import OpenAIEmbeddings
+
+        import config
+
+        return OpenAIEmbeddings(
+            model=model,
+            api_key=config.OPENAI_API_KEY,
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client(),
+        )
+
+    return _get_or_create(("embeddings", model), create)
+
+
+def get_genai_client():
+    """google-genai 클라이언트 싱글턴 (이미지 생성, 번역/요약)"""
+
+    def create():
+        import os
+
+        from google import genai
+        from google.genai import types
+
+        import config
+
+        return genai.Client(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            http_options=types.HttpOptions(timeout=int(config.LLM_HTTP_TIMEOUT * 1000)),
+        )
+
+    return _get_or_create("genai", create)
+
+
+def limit_concurrency(runnable, model: str):
+    """runnable 호출을 모델별 동시 호출 제한 안에서 실행하도록 감쌉니다.
+
+    invoke/ainvoke 모두 지원하며 config(콜백)를 그대로 전달하므로
+    LangGraph 토큰 스트리밍과 함께 사용할 수 있습니다. config에 브랜치 마감 시각이
+    있으면 그때까지만 슬롯을 기다리고, 넘기면 TimeoutError를 냅니다.
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    limiter = get_model_limiter(model)
+
+    def invoke(value, config):
+        remaining = config_remaining(config)
+        if remaining <= 0 or not limiter.acquire(
+            None if math.isinf(remaining) else remaining
+        ):
+            raise TimeoutError(f"{model} call passed the branch deadline")
+        try:
+            return runnable.invoke(value, config)
+        finally:
+            limiter.release()
+
+    async def ainvoke(value, config):
+        async with limiter:
+            return await runnable.ainvoke(value, config)
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=f"limited:{model}")
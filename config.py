@@ -13,6 +13,61 @@ NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
+# 임베딩 마이크로 배치 설정
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "10"))
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64"))
+
+# LLM 응답 캐시 설정
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# 공유 모델 클라이언트 설정 (연결 풀, 제한 시간, 모델별 동시 호출 수)
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "60"))
+LLM_DEFAULT_CONCURRENCY = int(os.getenv("LLM_DEFAULT_CONCURRENCY", "16"))
+
+# 중복(hedged) 요청과 재시도 설정
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.9"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+HEDGE_MAX_DELAY = float(os.getenv("HEDGE_MAX_DELAY", "10"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+
+# 한 턴의 전체 시간 예산 (초). 부족하면 선택 단계를 건너뜀
+TURN_BUDGET_SECONDS = float(os.getenv("TURN_BUDGET_SECONDS", "30"))
+
+# 백그라운드 엔티티/관계 추출: 작업 스레드(샤드) 수와 샤드별 최대 대기 작업 수
+ERE_WORKER_SHARDS = int(os.getenv("ERE_WORKER_SHARDS", "4"))
+ERE_QUEUE_SIZE = int(os.getenv("ERE_QUEUE_SIZE", "64"))
+# 이름/별칭으로 찾지 못한 엔티티를 임베딩 유사도로 기존 엔티티에 연결할지 여부
+ENTITY_RESOLUTION_EMBEDDINGS = (
+    os.getenv("ENTITY_RESOLUTION_EMBEDDINGS", "true").lower() == "true"
+)
+
+
+# 세션별 장기 기억: 저장 경로, 이야기 생성 시 꺼낼 과거 턴 수와 토큰 예산
+STORY_MEMORY_PATH = os.getenv("STORY_MEMORY_PATH", ".cache/story_memory")
+STORY_MEMORY_TOP_K = int(os.getenv("STORY_MEMORY_TOP_K", "4"))
+STORY_MEMORY_TOKEN_BUDGET = int(os.getenv("STORY_MEMORY_TOKEN_BUDGET", "600"))
+
+# 백그라운드 이미지 생성: 동시 작업 수와 화면이 끝난 이미지를 확인하는 주기 (초)
+IMAGE_JOB_WORKERS = int(os.getenv("IMAGE_JOB_WORKERS", "2"))
+IMAGE_POLL_INTERVAL = float(os.getenv("IMAGE_POLL_INTERVAL", "2"))
+# 생성된 이미지 저장소: 경로, 최대 크기(MB), 보존 기간(일), 표시용 이미지의 긴 변 픽셀 수
+IMAGE_STORE_PATH = os.getenv("IMAGE_STORE_PATH", ".cache/images")
+IMAGE_STORE_MAX_MB = int(os.getenv("IMAGE_STORE_MAX_MB", "2048"))
+IMAGE_STORE_MAX_AGE_DAYS = float(os.getenv("IMAGE_STORE_MAX_AGE_DAYS", "30"))
+IMAGE_DISPLAY_SIZE = int(os.getenv("IMAGE_DISPLAY_SIZE", "1024"))
+# 이미지 생성 스케줄: 장면이 그대로일 때 이미지 사이 최소 턴 수, 새로움 기준(0~1),
+# 세션별 시간당/전역 분당 최대 이미지 수, 대기열 최대 길이
+IMAGE_MIN_TURNS_BETWEEN = int(os.getenv("IMAGE_MIN_TURNS_BETWEEN", "3"))
+IMAGE_SIGNIFICANCE_THRESHOLD = float(os.getenv("IMAGE_SIGNIFICANCE_THRESHOLD", "0.6"))
+IMAGE_SESSION_PER_HOUR = int(os.getenv("IMAGE_SESSION_PER_HOUR", "12"))
+IMAGE_GLOBAL_PER_MINUTE = int(os.getenv("IMAGE_GLOBAL_PER_MINUTE", "30"))
+IMAGE_QUEUE_SIZE = int(os.getenv("IMAGE_QUEUE_SIZE", "64"))
+
 
 # 환경변수 검증
 def validate_config():
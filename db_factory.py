@@ -1,10 +1,15 @@
 import os
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
 import config
 from db_interface import DBInterface
 from db_base import LegacyDBManager
 from db_manager import LangchainNeo4jDBManager
 
+# 프로세스 전역 DB 매니저 (세션 간 공유)
+_shared_db_manager: Optional[DBInterface] = None
+_shared_db_manager_lock = threading.Lock()
+
 
 def get_db_manager(manager_type: str = "langchain", **kwargs) -> DBInterface:
     """데이터베이스 매니저 인스턴스를 생성합니다.
@@ -41,3 +46,15 @@ def get_db_manager(manager_type: str = "langchain", **kwargs) -> DBInterface:
     except Exception as e:
         print(f"Failed to create DB manager: {str(e)}")  # 디버깅용
         raise
+
+
+def get_shared_db_manager(manager_type: str = "langchain", **kwargs) -> DBInterface:
+    """세션 간에 공유되는 데이터베이스 매니저를 반환합니다.
+
+    드라이버 연결과 스키마 조회는 프로세스당 한 번만 수행됩니다.
+    """
+    global _shared_db_manager
+    with _shared_db_manager_lock:
+        if _shared_db_manager is None:
+            _shared_db_manager = get_db_manager(manager_type, **kwargs)
+        return _shared_db_manager
@@ -12,6 +12,8 @@ from db_utils import (
     create_relationship,
     clear_database,
 )
+from world_version import compute_data_version, stamp_world_version
+from scene_bundle import materialize_scene_bundles
 
 # 필요한 파일 경로
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -129,6 +131,20 @@ def init_database():
 
         print("씬 데이터 초기화 완료")
 
+        world_version = compute_data_version(
+            [CHARACTER_FILE_PATH, MAP_FILE_PATH, SCENE_FILE_PATH]
+        )
+
+        print("씬 번들 생성 중...")
+        bundle_count = materialize_scene_bundles(
+            db_manager, scenes, maps, characters, version=world_version
+        )
+        print(f"씬 번들 {bundle_count}개 생성 완료")
+
+        # 월드 버전 갱신 (실행 중인 앱의 씬 그래프 캐시 무효화)
+        stamp_world_version(db_manager, world_version)
+        print(f"월드 버전 갱신: {world_version}")
+
         print("데이터베이스 초기화가 성공적으로 완료되었습니다.")
 
     except Exception as e:
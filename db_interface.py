@@ -1,5 +1,25 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import json
+
+# 한 턴에 필요한 씬 비트/씬/맵/행동 정보를 한 번의 왕복으로 조회하는 쿼리
+TURN_CONTEXT_QUERY = """
+MATCH (sb:SceneBeat {id: $beat_id})
+OPTIONAL MATCH (sb)-[:CONDITION {action: $action}]->(cond:SceneBeat)
+WITH sb, head(collect(cond)) AS cond
+WITH coalesce(
+    cond,
+    CASE WHEN $action = '' THEN head([(sb)-[:NEXT]->(n:SceneBeat) | n]) END
+) AS next_sb
+OPTIONAL MATCH (next_sb)-[:PART_OF]->(s:Scene)
+OPTIONAL MATCH (s)-[:TAKES_PLACE_IN]->(m:Map)
+RETURN next_sb AS beat,
+       s.id AS scene_id,
+       m.id AS map_id,
+       coalesce(next_sb.available_actions, s.available_actions, []) AS available_actions,
+       size([(next_sb)-[:CONDITION]->() | 1]) > 1 AS is_choice
+"""
 
 
 class DBInterface(ABC):
@@ -41,3 +61,55 @@ class DBInterface(ABC):
     def close(self) -> None:
         """데이터베이스 연결을 종료합니다."""
         pass
+
+    async def aquery(self, query: str, params: Dict[str, Any]) -> Any:
+        """query의 비동기 버전. 비동기 드라이버가 없는 구현은 스레드에서 실행합니다."""
+        return await asyncio.to_thread(self.query, query=query, params=params)
+
+    def fetch_turn_context(
+        self, beat_id: str, action: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        """한 번의 Cypher 왕복으로 다음 턴의 컨텍스트를 조회합니다.
+
+        Args:
+            beat_id: 현재 씬 비트 ID
+            action: 선택한 행동 (없으면 NEXT 관계를 따름)
+
+        Returns:
+            next_beat_id, scene_id, map_id, available_actions, is_choice,
+            beat(파싱된 씬 비트 속성)를 담은 딕셔너리.
+            현재 씬 비트가 없으면 None
+        """
+        result = self.query(
+            query=TURN_CONTEXT_QUERY,
+            params={"beat_id": beat_id, "action": action or ""},
+        )
+        if not result:
+            return None
+
+        row = result[0]
+        beat = self._parse_node_data(dict(row["beat"])) if row["beat"] else {}
+        return {
+            "next_beat_id": beat.get("id"),
+            "scene_id": row["scene_id"],
+            "map_id": row["map_id"],
+            "available_actions": row["available_actions"] or [],
+            "is_choice": bool(row["is_choice"]),
+            "beat": beat,
+        }
+
+    @staticmethod
+    def _parse_node_data(node_data: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON 문자열로 저장된 노드 속성을 파싱합니다."""
+        parsed_data = {}
+        for key, value in node_data.items():
+            if isinstance(value, str) and (
+                value.startswith("{") or value.startswith("[")
+            ):
+                try:
+                    parsed_data[key] = json.loads(value)
+                except json.JSONDecodeError:
+                    parsed_data[key] = value
+            else:
+                parsed_data[key] = value
+        return parsed_data
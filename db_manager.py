@@ -1,4 +1,5 @@
 from langchain_neo4j import Neo4jGraph
+from neo4j import AsyncGraphDatabase
 from typing import Dict, Any, List, Optional, Tuple
 from db_interface import DBInterface
 from langchain_core.documents import Document
@@ -34,6 +35,8 @@ class LangchainNeo4jDBManager(DBInterface):
             database=database,
             refresh_schema=refresh_schema,
         )
+        # 비동기 턴 그래프용 드라이버 (처음 aquery를 호출할 때 생성)
+        self._async_driver = None
 
     def _sanitize_state(self, game_state: Dict[str, Any]) -> Dict[str, Any]:
         """게임 상태를 저장 가능한 형태로 변환"""
@@ -102,6 +105,24 @@ class LangchainNeo4jDBManager(DBInterface):
         """
         return self.neo4j_graph.query(query, params)
 
+    async def aquery(self, query: str, params: Dict[str, Any]) -> Any:
+        """Neo4j 비동기 드라이버로 Cypher 쿼리 실행
+
+        비동기 드라이버는 처음 사용한 이벤트 루프에 묶이므로
+        async_runtime의 백그라운드 루프에서만 호출합니다.
+
+        Returns:
+            query와 같은 형식의 레코드 딕셔너리 리스트
+        """
+        if self._async_driver is None:
+            self._async_driver = AsyncGraphDatabase.driver(
+                self.uri, auth=(self.user, self.password)
+            )
+        records, _, _ = await self._async_driver.execute_query(
+            query, params or {}, database_=self.database
+        )
+        return [record.data() for record in records]
+
     def close(self) -> None:
         """데이터베이스 연결 종료
 
@@ -109,7 +130,14 @@ class LangchainNeo4jDBManager(DBInterface):
         인터페이스 일관성을 위해 구현합니다.
         """
         # Neo4jGraph에는 명시적인 close 메서드가 없음
-        pass
+        if self._async_driver is not None:
+            from async_runtime import run_sync
+
+            try:
+                run_sync(self._async_driver.close(), timeout=5)
+            except Exception as e:
+                print(f"Error closing async driver: {e}")
+            self._async_driver = None
 
     def get_schema(self) -> str:
         """데이터베이스 스키마 정보 반환
@@ -1,8 +1,17 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from db_interface import DBInterface
-from db_manager import LangchainNeo4jDBManager
-from db_base import LegacyDBManager
+from scene_bundle import load_scene_bundle
+from world_version import current_world_version
+import copy
 import json
+import threading
+
+INITIAL_SCENE_ID = "scene:00_Pangyo_Station"
+
+# 프로세스 전역 초기 세션 템플릿 (월드 버전별로 한 번만 생성)
+_template: Optional[Dict[str, Any]] = None
+_template_version: Optional[str] = None
+_template_lock = threading.Lock()
 
 
 class DBStateInjector:
@@ -19,28 +28,46 @@ class DBStateInjector:
         self.db_manager = db_manager
 
     def inject(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """상태를 주입하고 초기화합니다."""
+        """상태를 주입하고 초기화합니다.
+
+        초기 상태는 프로세스 전역 템플릿의 복사본을 사용하므로,
+        새 세션을 만들 때 데이터베이스 쿼리가 발생하지 않습니다.
+        """
         if not state.get("initialized"):
-            # 초기 씬 데이터 로드
-            query = "MATCH (s:Scene) WHERE s.id = 'scene:00_Pangyo_Station' RETURN s"
-            initial_scene = self.db_manager.query(query=query, params={})
-
-            if initial_scene:
-                scene_data = initial_scene[0]["s"]
-                # JSON 문자열로 저장된 속성 파싱
-                parsed_scene = self._parse_node_data(scene_data)
-
-                state.update(
-                    {
-                        "current_scene": parsed_scene,
-                        "initialized": True,
-                        "context": parsed_scene.get("context", ""),
-                        "available_actions": parsed_scene.get("available_actions", []),
-                    }
-                )
+            template = get_initial_state_template(self.db_manager)
+            if template:
+                state.update(copy.deepcopy(template))
 
         return state
 
+    def build_initial_state(self) -> Optional[Dict[str, Any]]:
+        """초기 씬 데이터로 새 세션의 초기 상태를 생성합니다."""
+        # 미리 생성된 씬 번들을 우선 사용 (한 번의 조회, 속성별 파싱 없음)
+        bundle = load_scene_bundle(self.db_manager, INITIAL_SCENE_ID)
+        if bundle:
+            parsed_scene = bundle["scene"]
+        else:
+            # 초기 씬 데이터 로드
+            query = "MATCH (s:Scene {id: $scene_id}) RETURN s"
+            initial_scene = self.db_manager.query(
+                query=query, params={"scene_id": INITIAL_SCENE_ID}
+            )
+            if not initial_scene:
+                return None
+            # JSON 문자열로 저장된 속성 파싱
+            parsed_scene = self._parse_node_data(initial_scene[0]["s"])
+
+        initial_state = {
+            "current_scene": parsed_scene,
+            "initialized": True,
+            "context": parsed_scene.get("context", ""),
+            "available_actions": parsed_scene.get("available_actions", []),
+        }
+        if bundle:
+            initial_state["current_map"] = bundle["map"]
+            initial_state["characters"] = bundle["characters"]
+        return initial_state
+
     def _parse_node_data(self, node_data: Dict[str, Any]) -> Dict[str, Any]:
         """Neo4j 노드 데이터를 파싱합니다."""
         parsed_data = {}
@@ -55,3 +82,30 @@ class DBStateInjector:
             else:
                 parsed_data[key] = value
         return parsed_data
+
+
+def get_initial_state_template(db_manager: DBInterface) -> Optional[Dict[str, Any]]:
+    """새 세션에 복사해 사용할 초기 상태 템플릿을 반환합니다.
+
+    월드 버전이 바뀌면 (db_init 재실행) 다시 생성합니다.
+    반환된 템플릿은 공유 객체이므로 수정하지 말고 복사해서 사용합니다.
+    """
+    global _template, _template_version
+    version = current_world_version(db_manager)
+
+    with _template_lock:
+        if _template is not None and _template_version == version:
+            return _template
+
+        template = DBStateInjector(db_manager).build_initial_state()
+        # 초기 씬이 아직 없으면 캐시하지 않음 (db_init 이전)
+        if template is not None:
+            _template, _template_version = template, version
+        return template
+
+
+def invalidate_initial_state_template() -> None:
+    """초기 상태 템플릿을 비웁니다. 다음 세션에서 다시 생성됩니다."""
+    global _template
+    with _template_lock:
+        _template = None
@@ -2,14 +2,67 @@
 from neo4j import GraphDatabase
 from typing import Dict, Any, List
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableLambda
 import os
 from db_interface import DBInterface
+from clients import get_chat_model, limit_concurrency
+from hedging import hedged
+from er_writer import ERWriteResult, write_er_data
+from prompt_registry import register_prompt
 import json
+import threading
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+_ere_chain = None
+_ere_chain_lock = threading.Lock()
+
+# 정적 지침을 앞에 두고 스키마/입력 텍스트를 뒤에 붙임 (prompt_registry)
+ERE_PROMPT = register_prompt(
+    "ere_extraction",
+    [
+        (
+            "instructions",
+            """
+    You are a top-tier algorithm designed for extracting
+    information in structured formats to build a knowledge graph.
+
+    Extract the entities (nodes) and specify their type from the following text.
+    Also extract the relationships between these nodes.
+
+    Return result as JSON using the following format:
+    {{"nodes": [ {{"id": "0", "label": "Character", "properties": {{"name": "Taehoon"}} }}],
+    "relationships": [{{"type": "KNOWS", "start_node_id": "0", "end_node_id": "1", "properties": {{"since": "Player in the office"}} }}] }}
+
+    Assign a unique ID (string) to each node, and reuse it to define relationships.
+    Do respect the source and target node types for relationship and
+    the relationship direction.
+
+    Make sure you adhere to the following rules to produce valid JSON objects:
+    - Do not return any additional information other than the JSON in it.
+    - Omit any backticks around the JSON - simply output the JSON on its own.
+    - The JSON object must not wrapped into a list - it is its own JSON object.
+    - Property names must be enclosed in double quotes
+""",
+        ),
+        (
+            "schema",
+            """
+    Use only fhe following nodes and relationships (if provided):
+    {schema}
+""",
+        ),
+        (
+            "input",
+            """
+    Input text:
+
+    {text}
+    """,
+        ),
+    ],
+)
+
 
 def clear_database(db_manager: DBInterface) -> None:
     """데이터베이스의 모든 노드와 관계를 삭제합니다."""
@@ -186,61 +239,55 @@ def extract_entities_and_relationships(
     if not user_input or not isinstance(user_input, str):
         raise ValueError("유효한 사용자 입력이 필요합니다.")
 
-    ere_prompt_template = """
-    You are a top-tier algorithm designed for extracting
-    information in structured formats to build a knowledge graph.
-
-    Extract the entities (nodes) and specify their type from the following text.
-    Also extract the relationships between these nodes.
-
-    Return result as JSON using the following format:
-    {{"nodes": [ {{"id": "0", "label": "Character", "properties": {{"name": "Taehoon"}} }}],
-    "relationships": [{{"type": "KNOWS", "start_node_id": "0", "end_node_id": "1", "properties": {{"since": "{Player} in the office"}} }}] }}
-
-    Use only fhe following nodes and relationships (if provided):
-    {{schema}}
-
-    Assign a unique ID (string) to each node, and reuse it to define relationships.
-    Do respect the source and target node types for relationship and
-    the relationship direction.
-
-    Make sure you adhere to the following rules to produce valid JSON objects:
-    - Do not return any additional information other than the JSON in it.
-    - Omit any backticks around the JSON - simply output the JSON on its own.
-    - The JSON object must not wrapped into a list - it is its own JSON object.
-    - Property names must be enclosed in double quotes
-
-    Input text:
-
-    {text}
-    """
-    ere_prompt = PromptTemplate.from_template(ere_prompt_template)
-    model = ChatOpenAI(model="gpt-4o-mini", openai_api_key=OPENAI_API_KEY)
-    output_parser = JsonOutputParser()
-
-    ere_chain = ere_prompt | model | output_parser
+    ere_chain = _get_ere_chain()
     try:
         result = ere_chain.invoke({"text": user_input, "schema": schema})
-        # check result struct
-        if not isinstance(result, dict):
-            raise ValueError("Invalid output from LLM, expect dict")
-        if "nodes" not in result:
-            result["nodes"] = []
-        if "relationships" not in result:
-            result["relationships"] = []
-        return result
+        return _normalize_er_result(result)
 
     except Exception as e:
         raise ValueError(f"엔티티 추출 중 오류: {e}")
 
 
-def update_graph_from_er(driver, er_data: Dict[str, Any]):
+def _get_ere_chain():
+    """ERE 체인을 반환합니다. 체인과 모델 클라이언트는 프로세스에서 한 번만 만듭니다."""
+    global _ere_chain
+    with _ere_chain_lock:
+        if _ere_chain is None:
+            ere_prompt = RunnableLambda(ERE_PROMPT, name="ere_extraction_prompt")
+            model = hedged(
+                limit_concurrency(
+                    get_chat_model("gpt-4o-mini", cache_node="ere_extraction"),
+                    "gpt-4o-mini",
+                ),
+                "ere_extraction",
+            )
+            output_parser = JsonOutputParser()
+            _ere_chain = ere_prompt | model | output_parser
+        return _ere_chain
+
+
+def _normalize_er_result(result: Any) -> Dict[str, Any]:
+    # check result struct
+    if not isinstance(result, dict):
+        raise ValueError("Invalid output from LLM, expect dict")
+    if "nodes" not in result:
+        result["nodes"] = []
+    if "relationships" not in result:
+        result["relationships"] = []
+    return result
+
+
+def update_graph_from_er(driver, er_data: Dict[str, Any]) -> ERWriteResult:
     """
     추출된 엔티티와 관계 데이터를 바탕으로 그래프를 업데이트합니다.
+    노드는 레이블별, 관계는 유형별로 묶어 한 트랜잭션으로 씁니다. (er_writer 참고)
 
     Args:
         driver: Neo4j 드라이버.
         er_data: 추출된 엔티티와 관계를 담은 딕셔너리.
+
+    Returns:
+        ERWriteResult(쓴 노드 수, 쓴 관계 수, 건너뛴 항목 수)
     """
     if not isinstance(er_data, dict):
         raise ValueError("유효한 엔티티/관계 데이터가 필요합니다. (딕셔너리 타입)")
@@ -252,64 +299,11 @@ def update_graph_from_er(driver, er_data: Dict[str, Any]):
         raise ValueError("유효한 노드/관계 데이터가 없습니다.")
 
     try:
-        with driver.session() as session:
-            for node in nodes:
-                session.write_transaction(_upsert_node, node)
-            for rel in rels:
-                session.write_transaction(_upsert_relationship, rel)
+        return write_er_data(driver, er_data)
     except Exception as e:
         raise Exception(f"그래프 업데이트 중 오류 발생: {e}")
 
 
-def _upsert_node(neo4j_graph, label: str, node_properties: Dict[str, Any]) -> None:
-    """노드를 생성하거나 업데이트합니다.
-
-    Args:
-        neo4j_graph: Neo4j 그래프 객체
-        label: 노드 레이블
-        node_properties: 노드 속성
-    """
-    query = f"""
-    MERGE (n:{label} {{id: $properties.id}})
-    SET n += $properties
-    """
-    neo4j_graph.query(query=query, params={"properties": node_properties})
-
-
-def _upsert_relationship(
-    neo4j_graph,
-    from_label: str,
-    from_id: str,
-    rel_type: str,
-    to_label: str,
-    to_id: str,
-    rel_properties: Dict[str, Any] = None,
-) -> None:
-    """두 노드 간 관계를 생성하거나 업데이트합니다.
-
-    Args:
-        neo4j_graph: Neo4j 그래프 객체
-        from_label: 시작 노드 레이블
-        from_id: 시작 노드 ID
-        rel_type: 관계 유형
-        to_label: 끝 노드 레이블
-        to_id: 끝 노드 ID
-        rel_properties: 관계 속성 (기본값: None)
-    """
-    if rel_properties is None:
-        rel_properties = {}
-
-    query = f"""
-    MATCH (a:{from_label} {{id: $from_id}}), (b:{to_label} {{id: $to_id}})
-    MERGE (a)-[r:{rel_type}]->(b)
-    SET r += $rel_properties
-    """
-    neo4j_graph.query(
-        query=query,
-        params={"from_id": from_id, "to_id": to_id, "rel_properties": rel_properties},
-    )
-
-
 def get_map_data(db_manager: DBInterface, map_id: str) -> Dict[str, Any]:
     query = """
     MATCH (m:Map {id: $map_id})
@@ -0,0 +1,206 @@
+"""SQLite-backed LRU cache with an optional embedding-similarity lookup.
+
+프로세스를 다시 시작해도 유지되는 로컬 캐시입니다. 항목 수가 max_entries를 넘으면
+가장 오래 사용하지 않은 항목부터 제거합니다. 임베딩과 함께 저장한 항목은
+find_similar로 코사인 유사도 검색을 할 수 있습니다.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    value TEXT NOT NULL,
+    embedding TEXT,
+    expires_at REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_entries_namespace ON entries (namespace);
+"""
+
+
+def make_key(*parts: str) -> str:
+    """여러 문자열로 캐시 키(sha256)를 만듭니다."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class DiskLRUCache:
+    """SQLite 파일에 저장되는 LRU 캐시
+
+    여러 세션(스레드)이 하나의 연결을 공유하므로 모든 연산은 잠금으로 보호됩니다.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000):
+        """
+        Args:
+            path: SQLite 파일 경로 (":memory:"면 메모리에만 저장)
+            max_entries: 최대 항목 수
+        """
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.commit()
+
+        # namespace별 임베딩 인덱스 (처음 검색할 때 디스크에서 읽어 옴)
+        self._vectors: Dict[str, Dict[str, List[float]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """값을 반환합니다. 없거나 만료되었으면 None을 반환합니다."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(
+        self,
+        key: str,
+        value: str,
+        namespace: str = "",
+        embedding: Optional[List[float]] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """값을 저장합니다. embedding을 주면 유사도 검색 대상이 됩니다."""
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        vector = _normalize(embedding) if embedding else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, namespace, value, embedding, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    namespace,
+                    value,
+                    json.dumps(vector) if vector else None,
+                    expires_at,
+                    now,
+                ),
+            )
+            if vector and namespace in self._vectors:
+                self._vectors[namespace][key] = vector
+            self._evict()
+            self._conn.commit()
+
+    def find_similar(
+        self, namespace: str, embedding: List[float], threshold: float
+    ) -> Optional[Tuple[str, float]]:
+        """namespace 안에서 가장 유사한 항목의 키와 유사도를 반환합니다.
+
+        Args:
+            namespace: 검색 범위
+            embedding: 질의 임베딩
+            threshold: 최소 코사인 유사도
+
+        Returns:
+            (키, 유사도) 또는 threshold 이상인 항목이 없으면 None
+        """
+        query = _normalize(embedding)
+        with self._lock:
+            vectors = self._load_vectors(namespace)
+            best_key, best_score = None, threshold
+            for key, vector in vectors.items():
+                score = sum(a * b for a, b in zip(query, vector))
+                if score >= best_score:
+                    best_key, best_score = key, score
+        if best_key is None:
+            return None
+        return best_key, best_score
+
+    def clear(self, prefix: Optional[str] = None) -> None:
+        """항목을 비웁니다. prefix를 주면 namespace가 prefix로 시작하는 항목만 비웁니다."""
+        with self._lock:
+            if prefix is None:
+                self._conn.execute("DELETE FROM entries")
+                self._vectors.clear()
+            else:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE substr(namespace, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+                for namespace in list(self._vectors):
+                    if namespace.startswith(prefix):
+                        del self._vectors[namespace]
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _load_vectors(self, namespace: str) -> Dict[str, List[float]]:
+        if namespace not in self._vectors:
+            rows = self._conn.execute(
+                "SELECT key, embedding FROM entries "
+                "WHERE namespace = ? AND embedding IS NOT NULL",
+                (namespace,),
+            ).fetchall()
+            self._vectors[namespace] = {key: json.loads(emb) for key, emb in rows}
+        return self._vectors[namespace]
+
+    def _delete(self, key: str) -> None:
+        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        for vectors in self._vectors.values():
+            vectors.pop(key, None)
+
+    def _evict(self) -> None:
+        """만료된 항목과 max_entries를 넘는 오래된 항목을 제거합니다."""
+        self._conn.execute(
+            "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),),
+        )
+        count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+        evicted = [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?",
+                (overflow,),
+            ).fetchall()
+        ]
+        for key in evicted:
+            self._delete(key)
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = sum(v * v for v in vector) ** 0.5
+    if norm == 0:
+        return list(vector)
+    return [v / norm for v in vector]
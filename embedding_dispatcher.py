@@ -0,0 +1,160 @@
+"""Cross-session embedding dispatcher.
+
+여러 세션에서 동시에 들어오는 embed_query 요청을 짧은 윈도우 동안 모아
+하나의 embed_documents 배치로 전송합니다.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+
+class EmbeddingDispatcher:
+    """임베딩 요청을 마이크로 배치로 묶어 전송하는 디스패처
+
+    - 윈도우(window_ms) 동안 들어온 요청을 하나의 embed_documents 호출로 묶습니다.
+    - 같은 문자열은 배치 안에서 한 번만 임베딩합니다.
+    - 이미 대기 중이거나 처리 중인 문자열은 같은 Future를 공유합니다 (singleflight).
+
+    embed_query / embed_documents를 제공하므로 기존 임베딩 객체 대신 그대로 주입할 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        window_ms: float = 10.0,
+        max_batch_size: int = 64,
+        timeout: Optional[float] = 30.0,
+    ):
+        """
+        Args:
+            embeddings: embed_documents를 제공하는 임베딩 제공자 (예: OpenAIEmbeddings)
+            window_ms: 첫 요청 이후 배치를 모으는 시간 (밀리초)
+            max_batch_size: 한 번의 provider 호출에 포함할 최대 문자열 수
+            timeout: 호출자가 결과를 기다리는 최대 시간 (초)
+        """
+        self.embeddings = embeddings
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._has_pending = threading.Condition(self._lock)
+        self._pending: List[str] = []
+        self._inflight: Dict[str, Future] = {}
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.stats = {"requests": 0, "coalesced": 0, "provider_calls": 0, "texts": 0}
+
+    def embed_query(self, text: str) -> List[float]:
+        """단일 문자열의 임베딩을 반환합니다."""
+        return self._submit(text).result(timeout=self.timeout)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """여러 문자열의 임베딩을 입력 순서대로 반환합니다."""
+        futures = [self._submit(text) for text in texts]
+        return [future.result(timeout=self.timeout) for future in futures]
+
+    def close(self) -> None:
+        """워커를 종료합니다. 대기 중인 요청은 마지막 배치로 처리됩니다."""
+        with self._lock:
+            self._closed = True
+            self._has_pending.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout=self.timeout)
+
+    def _submit(self, text: str) -> Future:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("EmbeddingDispatcher is closed")
+            self.stats["requests"] += 1
+
+            # 대기 중이거나 처리 중인 동일 요청은 결과를 공유
+            future = self._inflight.get(text)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future
+
+            future = Future()
+            self._inflight[text] = future
+            self._pending.append(text)
+
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-dispatcher", daemon=True
+                )
+                self._worker.start()
+            self._has_pending.notify()
+            return future
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._has_pending.wait()
+                if not self._pending and self._closed:
+                    return
+
+            # 첫 요청 이후 윈도우 동안 추가 요청을 모음
+            deadline = time.monotonic() + self.window
+            with self._lock:
+                while len(self._pending) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._has_pending.wait(remaining)
+                batch = self._pending[: self.max_batch_size]
+                del self._pending[: self.max_batch_size]
+
+            self._flush(batch)
+
+    def _flush(self, batch: List[str]) -> None:
+        if not batch:
+            return
+        try:
+            vectors = self.embeddings.embed_documents(batch)
+            if len(vectors) != len(batch):
+                raise ValueError(
+                    f"Expected {len(batch)} embeddings, got {len(vectors)}"
+                )
+            error = None
+        except Exception as e:
+            vectors, error = None, e
+
+        with self._lock:
+            self.stats["provider_calls"] += 1
+            self.stats["texts"] += len(batch)
+            futures = [self._inflight.pop(text) for text in batch]
+
+        for i, future in enumerate(futures):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(vectors[i])
+
+
+# 프로세스 전역 디스패처 (모델별로 하나씩)
+_dispatchers: Dict[str, EmbeddingDispatcher] = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_embedding_dispatcher(
+    model: str = "text-embedding-3-small",
+) -> EmbeddingDispatcher:
+    """모델별로 공유되는 EmbeddingDispatcher를 반환합니다."""
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(model)
+        if dispatcher is None:
+            import config
+            from clients import get_embeddings
+
+            dispatcher = EmbeddingDispatcher(
+                get_embeddings(model),
+                window_ms=config.EMBEDDING_BATCH_WINDOW_MS,
+                max_batch_size=config.EMBEDDING_MAX_BATCH_SIZE,
+            )
+            _dispatchers[model] = dispatcher
+        return dispatcher
@@ -0,0 +1,251 @@
+"""Entity resolution for extracted entities.
+
+ERE 프롬프트는 호출할 때마다 "0", "1" 같은 새 ID를 붙이므로, 그대로 쓰면 같은 인물이
+턴마다 새 노드로 생깁니다. 그래프에 쓰기 전에 추출된 엔티티를 세션/월드별 메모리
+인덱스에서 찾아 기존 Character/Location/Player ID로 바꿉니다.
+
+- 정규화한 이름과 별칭으로 먼저 찾고, 없으면 (설정된 경우) 임베딩 유사도로 찾습니다.
+- 찾지 못한 엔티티는 "<레이블>:<정규화한 이름>" 형태의 안정적인 ID를 받아 인덱스에
+  등록되므로, 다음 턴에 다시 언급되어도 같은 노드로 MERGE됩니다.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from er_writer import normalize_label
+
+# 기존 노드에 연결할 레이블
+RESOLVABLE_LABELS = ("Character", "Location", "Player")
+DEFAULT_EMBEDDING_THRESHOLD = 0.9
+# 메모리에 유지할 세션/월드 인덱스 수
+MAX_INDEXES = 256
+
+SEED_QUERY = """
+MATCH (n)
+WHERE n:Character OR n:Location OR n:Player
+RETURN [label IN labels(n) WHERE label IN $labels][0] AS label,
+       n.id AS id, n.name AS name, n.aliases AS aliases
+"""
+
+_PUNCTUATION = re.compile(r"[\s\W_]+", re.UNICODE)
+
+EmbedFunc = Callable[[List[str]], List[List[float]]]
+
+
+def normalize_name(name: Any) -> str:
+    """비교용 이름: 유니코드 정규화, 소문자, 공백/문장부호 제거"""
+    if not isinstance(name, str):
+        return ""
+    return _PUNCTUATION.sub("", unicodedata.normalize("NFKC", name).casefold())
+
+
+def _unit(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class EntityIndex:
+    """레이블별로 정규화한 이름/별칭 -> 엔티티 ID를 찾는 인덱스
+
+    Args:
+        embed: 이름 목록을 임베딩하는 함수 (없으면 임베딩 대체 검색을 하지 않음)
+        threshold: 임베딩 대체 검색의 최소 코사인 유사도
+    """
+
+    def __init__(
+        self,
+        embed: Optional[EmbedFunc] = None,
+        threshold: float = DEFAULT_EMBEDDING_THRESHOLD,
+    ):
+        self._embed = embed
+        self._threshold = threshold
+        self._by_name: Dict[str, Dict[str, str]] = {}
+        self._names: Dict[str, Dict[str, str]] = {}  # 레이블 -> ID -> 대표 이름
+        self._vectors: Dict[str, Dict[str, List[float]]] = {}
+        self._lock = threading.RLock()
+
+    def add(
+        self,
+        label: str,
+        entity_id: str,
+        name: Optional[str] = None,
+        aliases: Iterable[str] = (),
+    ) -> None:
+        """엔티티와 이름/별칭을 등록합니다."""
+        with self._lock:
+            names = self._by_name.setdefault(label, {})
+            if name:
+                self._names.setdefault(label, {}).setdefault(entity_id, name)
+            for alias in (name, *aliases):
+                key = normalize_name(alias)
+                if key:
+                    names.setdefault(key, entity_id)
+
+    def resolve(
+        self, label: str, name: Optional[str], aliases: Iterable[str] = ()
+    ) -> Optional[str]:
+        """이름/별칭(없으면 임베딩)으로 등록된 엔티티 ID를 찾습니다."""
+        with self._lock:
+            names = self._by_name.get(label, {})
+            for alias in (name, *aliases):
+                entity_id = names.get(normalize_name(alias))
+                if entity_id:
+                    return entity_id
+        if name and self._embed is not None:
+            return self._resolve_by_embedding(label, name)
+        return None
+
+    def _resolve_by_embedding(self, label: str, name: str) -> Optional[str]:
+        with self._lock:
+            vectors = self._vectors.setdefault(label, {})
+            missing = [
+                (entity_id, entity_name)
+                for entity_id, entity_name in self._names.get(label, {}).items()
+                if entity_id not in vectors
+            ]
+        if not missing and not vectors:
+            return None
+        try:
+            embedded = self._embed([name] + [entity_name for _, entity_name in missing])
+        except Exception as e:
+            print(f"Error embedding entity names: {e}")
+            return None
+
+        query = _unit(embedded[0])
+        with self._lock:
+            for (entity_id, _), vector in zip(missing, embedded[1:]):
+                vectors[entity_id] = _unit(vector)
+            best_id, best_score = None, self._threshold
+            for entity_id, vector in vectors.items():
+                score = sum(a * b for a, b in zip(query, vector))
+                if score >= best_score:
+                    best_id, best_score = entity_id, score
+        return best_id
+
+    def resolve_er_data(self, er_data: Dict[str, Any]) -> Dict[str, Any]:
+        """추출 결과의 노드 ID를 기존/안정적인 ID로 바꾼 사본을 반환합니다."""
+        id_map: Dict[str, str] = {}
+        nodes = []
+        for node in er_data.get("nodes") or []:
+            if not isinstance(node, dict):
+                continue
+            properties = node.get("properties")
+            properties = properties if isinstance(properties, dict) else {}
+            name = properties.get("name")
+            aliases = properties.get("aliases")
+            aliases = (
+                [a for a in aliases if isinstance(a, str)]
+                if isinstance(aliases, list)
+                else []
+            )
+            label = normalize_label(node.get("label"))
+            raw_id = str(node.get("id", ""))
+
+            entity_id = None
+            if label in RESOLVABLE_LABELS:
+                entity_id = self.resolve(label, name, aliases)
+            if entity_id is not None:
+                # 기존 엔티티의 대표 이름은 다른 표기로 덮어쓰지 않음
+                properties = {k: v for k, v in properties.items() if k != "name"}
+            elif label is not None and normalize_name(name):
+                entity_id = f"{label.lower()}:{normalize_name(name)}"
+            if entity_id is None:
+                nodes.append(node)  # 이름이 없으면 ID를 바꾸지 않음
+                continue
+
+            self.add(label, entity_id, name, aliases)
+            id_map[raw_id] = entity_id
+            nodes.append({**node, "id": entity_id, "properties": properties})
+
+        relationships = []
+        for rel in er_data.get("relationships") or []:
+            if not isinstance(rel, dict):
+                continue
+            start = str(rel.get("start_node_id"))
+            end = str(rel.get("end_node_id"))
+            relationships.append(
+                {
+                    **rel,
+                    "start_node_id": id_map.get(start, start),
+                    "end_node_id": id_map.get(end, end),
+                }
+            )
+        return {**er_data, "nodes": nodes, "relationships": relationships}
+
+
+def fetch_seed_entities(driver) -> List[Tuple[str, str, Optional[str], List[str]]]:
+    """그래프에 있는 Character/Location/Player 노드를 (레이블, ID, 이름, 별칭)으로 가져옵니다."""
+    records, _, _ = driver.execute_query(
+        SEED_QUERY, {"labels": list(RESOLVABLE_LABELS)}
+    )
+    seeds = []
+    for record in records:
+        if record.get("label") and record.get("id"):
+            aliases = record.get("aliases") or []
+            if isinstance(aliases, str):
+                aliases = [aliases]
+            seeds.append((record["label"], record["id"], record.get("name"), aliases))
+    return seeds
+
+
+_indexes: "OrderedDict[Tuple[str, str], EntityIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _default_embed() -> Optional[EmbedFunc]:
+    try:
+        import config
+
+        if not config.ENTITY_RESOLUTION_EMBEDDINGS:
+            return None
+        from embedding_dispatcher import get_embedding_dispatcher
+
+        return get_embedding_dispatcher().embed_documents
+    except Exception as e:
+        print(f"Entity resolution embeddings disabled: {e}")
+        return None
+
+
+def get_entity_index(
+    session_id: str,
+    world_version: Optional[str] = None,
+    seed: Optional[Callable[[], Iterable[Tuple[str, str, Optional[str], List[str]]]]] = None,
+    embed: Optional[EmbedFunc] = None,
+) -> EntityIndex:
+    """세션/월드별 EntityIndex를 반환합니다. 처음 만들 때 seed로 기존 노드를 등록합니다.
+
+    Args:
+        session_id: 게임 세션 ID
+        world_version: 월드 데이터 버전 (바뀌면 새 인덱스를 만듦)
+        seed: (레이블, ID, 이름, 별칭) 목록을 반환하는 함수
+        embed: 임베딩 함수. 없으면 config 설정에 따라 공유 임베딩 디스패처 사용
+    """
+    key = (session_id or "", world_version or "")
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+    index = EntityIndex(embed=embed or _default_embed())
+    if seed is not None:
+        try:
+            for label, entity_id, name, aliases in seed():
+                index.add(label, entity_id, name, aliases)
+        except Exception as e:
+            # 캐시하지 않으므로 다음 작업에서 다시 시도
+            print(f"Error seeding entity index: {e}")
+            return index
+
+    with _indexes_lock:
+        existing = _indexes.get(key)
+        if existing is not None:
+            return existing
+        _indexes[key] = index
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
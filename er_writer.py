@@ -0,0 +1,207 @@
+"""Batched writes of extracted entities and relationships.
+
+추출된 노드는 레이블별로, 관계는 (시작 레이블, 유형, 끝 레이블)별로 묶어 UNWIND + MERGE
+하나씩으로 만들고, 이를 CALL 서브쿼리로 이어 붙인 단일 쿼리로 실행합니다. 따라서 턴당
+그래프 업데이트는 한 트랜잭션, 한 번의 왕복입니다.
+
+레이블과 관계 유형은 쿼리 파라미터로 넘길 수 없어 쿼리 문자열에 들어가므로,
+허용 목록에 있는 값만 사용하고 나머지는 건너뜁니다.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# 추출 결과에서 그래프에 쓸 수 있는 노드 레이블
+ERE_NODE_LABELS = {
+    "Character",
+    "Player",
+    "Location",
+    "Item",
+    "Object",
+    "Creature",
+    "Organization",
+    "Event",
+}
+
+# 추출 결과에서 그래프에 쓸 수 있는 관계 유형
+ERE_RELATIONSHIP_TYPES = {
+    "KNOWS",
+    "MET",
+    "TALKED_TO",
+    "ALLY_OF",
+    "ENEMY_OF",
+    "ATTACKED",
+    "HELPED",
+    "FOLLOWS",
+    "LOCATED_IN",
+    "MOVED_TO",
+    "HAS",
+    "OWNS",
+    "USED",
+    "GAVE",
+    "FOUND",
+    "PART_OF",
+    "MEMBER_OF",
+    "PARTICIPATED_IN",
+}
+
+_LABELS_BY_KEY = {label.lower(): label for label in ERE_NODE_LABELS}
+_NON_IDENTIFIER = re.compile(r"[^A-Z0-9_]+")
+
+
+class ERWriteResult(NamedTuple):
+    nodes_written: int
+    relationships_written: int
+    skipped: int  # 허용되지 않았거나 끝점이 없어 건너뛴 노드/관계 수
+
+
+def normalize_label(label: Any) -> Optional[str]:
+    """허용된 노드 레이블이면 정식 표기를, 아니면 None을 반환합니다."""
+    if not isinstance(label, str):
+        return None
+    return _LABELS_BY_KEY.get(label.strip().lower())
+
+
+def normalize_relationship_type(rel_type: Any) -> Optional[str]:
+    """허용된 관계 유형이면 정식 표기(대문자, 밑줄)를, 아니면 None을 반환합니다."""
+    if not isinstance(rel_type, str):
+        return None
+    normalized = _NON_IDENTIFIER.sub("_", rel_type.strip().upper()).strip("_")
+    return normalized if normalized in ERE_RELATIONSHIP_TYPES else None
+
+
+def _properties(data: Any) -> Dict[str, Any]:
+    """Neo4j 속성으로 쓸 수 있도록 중첩된 값을 JSON 문자열로 바꿉니다."""
+    if not isinstance(data, dict):
+        return {}
+    properties = {}
+    for key, value in data.items():
+        if value is None:
+            continue
+        if isinstance(value, dict) or (
+            isinstance(value, list) and any(isinstance(v, (dict, list)) for v in value)
+        ):
+            value = json.dumps(value, ensure_ascii=False)
+        properties[str(key)] = value
+    return properties
+
+
+def build_er_write_query(
+    er_data: Dict[str, Any],
+) -> Tuple[Optional[str], Dict[str, Any], int]:
+    """추출 결과를 한 번에 쓰는 쿼리를 만듭니다.
+
+    Args:
+        er_data: {"nodes": [...], "relationships": [...]} 형태의 추출 결과
+
+    Returns:
+        (쿼리, 파라미터, 건너뛴 항목 수). 쓸 항목이 없으면 쿼리는 None
+    """
+    skipped = 0
+    node_groups: Dict[str, List[Dict[str, Any]]] = {}
+    labels_by_id: Dict[str, str] = {}
+    for node in er_data.get("nodes") or []:
+        label = normalize_label(node.get("label")) if isinstance(node, dict) else None
+        node_id = node.get("id") if isinstance(node, dict) else None
+        if label is None or node_id in (None, ""):
+            skipped += 1
+            continue
+        node_id = str(node_id)
+        labels_by_id[node_id] = label
+        node_groups.setdefault(label, []).append(
+            {"id": node_id, "properties": _properties(node.get("properties"))}
+        )
+
+    rel_groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+    for rel in er_data.get("relationships") or []:
+        if not isinstance(rel, dict):
+            skipped += 1
+            continue
+        rel_type = normalize_relationship_type(rel.get("type"))
+        start_label = labels_by_id.get(str(rel.get("start_node_id")))
+        end_label = labels_by_id.get(str(rel.get("end_node_id")))
+        if rel_type is None or start_label is None or end_label is None:
+            skipped += 1
+            continue
+        rel_groups.setdefault((start_label, rel_type, end_label), []).append(
+            {
+                "start": str(rel["start_node_id"]),
+                "end": str(rel["end_node_id"]),
+                "properties": _properties(rel.get("properties")),
+            }
+        )
+
+    if not node_groups and not rel_groups:
+        return None, {}, skipped
+
+    parts: List[str] = []
+    params: Dict[str, Any] = {}
+    node_counts: List[str] = []
+    rel_counts: List[str] = []
+    # 관계의 MATCH가 같은 쿼리에서 MERGE한 노드를 보도록 노드를 먼저 씀
+    for index, (label, rows) in enumerate(sorted(node_groups.items())):
+        params[f"nodes{index}"] = rows
+        parts.append(
+            f"CALL {{ UNWIND $nodes{index} AS row "
+            f"MERGE (n:{label} {{id: row.id}}) SET n += row.properties "
+            f"RETURN count(n) AS n{index} }}"
+        )
+        node_counts.append(f"n{index}")
+    for index, ((start_label, rel_type, end_label), rows) in enumerate(
+        sorted(rel_groups.items())
+    ):
+        params[f"rels{index}"] = rows
+        parts.append(
+            f"CALL {{ UNWIND $rels{index} AS row "
+            f"MATCH (a:{start_label} {{id: row.start}}) "
+            f"MATCH (b:{end_label} {{id: row.end}}) "
+            f"MERGE (a)-[r:{rel_type}]->(b) SET r += row.properties "
+            f"RETURN count(r) AS r{index} }}"
+        )
+        rel_counts.append(f"r{index}")
+
+    parts.append(
+        f"RETURN {' + '.join(node_counts) or '0'} AS nodes_written, "
+        f"{' + '.join(rel_counts) or '0'} AS relationships_written"
+    )
+    return "\n".join(parts), params, skipped
+
+
+def resolve_driver(target):
+    """Neo4j 드라이버, LangChain Neo4jGraph, DB 매니저 중 무엇이 와도 드라이버를 꺼냅니다."""
+    if hasattr(target, "neo4j_graph"):
+        target = target.neo4j_graph
+    if not hasattr(target, "execute_query") and hasattr(target, "_driver"):
+        target = target._driver
+    if not hasattr(target, "execute_query") and hasattr(target, "driver"):
+        target = target.driver
+    return target
+
+
+def write_er_data(
+    target, er_data: Dict[str, Any], database: Optional[str] = None
+) -> ERWriteResult:
+    """추출 결과를 한 트랜잭션(한 번의 왕복)으로 그래프에 씁니다.
+
+    Args:
+        target: Neo4j 드라이버 (또는 드라이버를 가진 그래프/DB 매니저)
+        er_data: 추출된 엔티티와 관계
+        database: 대상 데이터베이스 이름 (없으면 드라이버 기본값)
+
+    Returns:
+        ERWriteResult(쓴 노드 수, 쓴 관계 수, 건너뛴 항목 수)
+    """
+    query, params, skipped = build_er_write_query(er_data)
+    if query is None:
+        return ERWriteResult(0, 0, skipped)
+
+    kwargs = {"database_": database} if database else {}
+    records, _, _ = resolve_driver(target).execute_query(query, params, **kwargs)
+    if not records:
+        return ERWriteResult(0, 0, skipped)
+    return ERWriteResult(
+        records[0].get("nodes_written", 0),
+        records[0].get("relationships_written", 0),
+        skipped,
+    )
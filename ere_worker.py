@@ -0,0 +1,187 @@
+"""Background entity/relationship extraction.
+
+엔티티/관계 추출(LLM 호출)과 그래프 업데이트는 현재 턴의 이야기에 쓰이지 않고 다음
+턴부터 의미가 있으므로, 턴 그래프는 작업을 큐에 넣기만 하고 백그라운드 작업 스레드가
+처리합니다.
+
+- 세션 ID로 샤드를 고르므로 한 세션의 작업은 항상 같은 스레드에서 들어온 순서대로
+  처리됩니다. (같은 세션의 그래프 쓰기가 서로 앞지르지 않음)
+- 샤드 큐는 크기가 제한되어 있어, 가득 차면 잠시 기다린 뒤 새 작업을 버리고
+  telemetry에 기록합니다. (턴이 추출 작업 때문에 막히지 않음)
+"""
+
+import threading
+import time
+import zlib
+from queue import Full, Queue
+from typing import Any, Callable, List, NamedTuple, Optional
+
+import telemetry
+
+DEFAULT_SHARDS = 4
+DEFAULT_QUEUE_SIZE = 64
+# 큐가 가득 찼을 때 작업을 버리기 전까지 기다리는 시간 (초)
+ENQUEUE_TIMEOUT = 0.05
+_STOP = object()
+
+
+class EREJob(NamedTuple):
+    session_id: str
+    user_input: str
+    driver: Any  # Neo4j 드라이버 (None이면 추출만 수행)
+    world_version: Optional[str] = None
+
+
+def process_ere_job(job: EREJob) -> None:
+    """사용자 입력에서 엔티티/관계를 추출하고, 기존 엔티티에 연결한 뒤 그래프를 업데이트합니다."""
+    from db_utils import extract_entities_and_relationships, update_graph_from_er
+    from entity_resolution import fetch_seed_entities, get_entity_index
+    from er_writer import resolve_driver
+
+    extracted_data = extract_entities_and_relationships(job.user_input)
+    if job.driver is not None:
+        driver = resolve_driver(job.driver)
+        index = get_entity_index(
+            job.session_id, job.world_version, lambda: fetch_seed_entities(driver)
+        )
+        extracted_data = index.resolve_er_data(extracted_data)
+        result = update_graph_from_er(job.driver, extracted_data)
+        telemetry.increment("ere.nodes_written", result.nodes_written)
+        telemetry.increment("ere.relationships_written", result.relationships_written)
+        telemetry.increment("ere.skipped", result.skipped)
+
+
+class EREWorker:
+    """세션별 순서를 지키는 샤드 작업 큐
+
+    Args:
+        process: 작업 하나를 처리하는 함수 (기본값 process_ere_job)
+        shards: 작업 스레드(샤드) 수
+        queue_size: 샤드별 최대 대기 작업 수
+        enqueue_timeout: 큐가 가득 찼을 때 기다리는 시간 (초)
+    """
+
+    def __init__(
+        self,
+        process: Optional[Callable[[EREJob], None]] = None,
+        shards: int = DEFAULT_SHARDS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        enqueue_timeout: float = ENQUEUE_TIMEOUT,
+    ):
+        self._process = process or process_ere_job
+        self._queues: List[Queue] = [Queue(maxsize=queue_size) for _ in range(shards)]
+        self._threads: List[threading.Thread] = []
+        self._enqueue_timeout = enqueue_timeout
+        self._lock = threading.Lock()
+
+    def _shard(self, session_id: str) -> Queue:
+        index = zlib.crc32(session_id.encode("utf-8")) % len(self._queues)
+        return self._queues[index]
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for index, shard in enumerate(self._queues):
+                thread = threading.Thread(
+                    target=self._run, args=(shard,), name=f"ere-worker-{index}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self, shard: Queue) -> None:
+        while True:
+            job = shard.get()
+            try:
+                if job is _STOP:
+                    return
+                self._process(job)
+                telemetry.increment("ere.processed")
+            except Exception as e:
+                telemetry.increment("ere.failed")
+                print(f"Error during background ere extraction: {e}")
+            finally:
+                shard.task_done()
+
+    def submit(
+        self,
+        session_id: str,
+        user_input: str,
+        driver: Any = None,
+        world_version: Optional[str] = None,
+    ) -> bool:
+        """작업을 세션의 샤드 큐에 넣습니다.
+
+        Returns:
+            큐에 넣었으면 True, 큐가 가득 차 버렸으면 False
+        """
+        if not user_input:
+            return False
+        self._start()
+        job = EREJob(session_id or "", user_input, driver, world_version)
+        try:
+            self._shard(job.session_id).put(job, timeout=self._enqueue_timeout)
+        except Full:
+            telemetry.record_event("ere_dropped", session_id=job.session_id)
+            print(f"ERE queue full, dropped extraction for session {job.session_id}")
+            return False
+        telemetry.increment("ere.enqueued")
+        return True
+
+    def pending(self) -> int:
+        """아직 처리되지 않은 작업 수"""
+        return sum(shard.unfinished_tasks for shard in self._queues)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """모든 작업이 끝날 때까지 기다립니다. (테스트/종료용)
+
+        Returns:
+            시간 안에 모두 끝났으면 True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for shard in self._queues:
+            with shard.all_tasks_done:
+                while shard.unfinished_tasks:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    shard.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """대기 중인 작업을 처리한 뒤 작업 스레드를 멈춥니다."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        if not threads:
+            return
+        for shard in self._queues:
+            shard.put(_STOP)
+        for thread in threads:
+            thread.join(timeout=timeout)
+
+
+_worker: Optional[EREWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_ere_worker() -> EREWorker:
+    """프로세스 전역 EREWorker를 반환합니다."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            import config
+
+            _worker = EREWorker(
+                shards=config.ERE_WORKER_SHARDS, queue_size=config.ERE_QUEUE_SIZE
+            )
+        return _worker
+
+
+def enqueue_ere(
+    session_id: str,
+    user_input: str,
+    driver: Any = None,
+    world_version: Optional[str] = None,
+) -> bool:
+    """턴 그래프에서 사용: 추출 작업을 백그라운드 큐에 넣기만 합니다."""
+    return get_ere_worker().submit(session_id, user_input, driver, world_version)
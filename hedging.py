@@ -0,0 +1,306 @@
+"""Hedged requests and latency-aware retries for model calls.
+
+첫 요청이 최근 지연 시간의 백분위수(기본 p90) 안에 응답하지 않으면 같은 요청을 한 번 더
+보내고, 먼저 끝난 응답을 사용한 뒤 나머지는 취소합니다. 일시적인 오류(타임아웃, 429, 5xx)는
+tenacity로 지수 백오프 재시도합니다. 결과적으로 턴 지연 시간이 제공자의 꼬리 지연 대신
+중앙값을 따라갑니다.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures import wait as wait_futures
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from turn_budget import config_remaining
+
+# 일시적인 오류로 보고 재시도할 예외 이름 (제공자 SDK를 직접 import하지 않음)
+TRANSIENT_ERROR_NAMES = {
+    "APITimeoutError",
+    "APIConnectionError",
+    "RateLimitError",
+    "InternalServerError",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "ResourceExhausted",
+    "TimeoutException",
+    "ConnectError",
+    "ReadTimeout",
+    "RemoteProtocolError",
+    "TimeoutError",
+}
+
+
+class HedgePolicy(NamedTuple):
+    percentile: float = 0.9  # 이 백분위수 지연 시간이 지나면 중복 요청
+    min_delay: float = 0.5  # 중복 요청 전 최소 대기 (초)
+    max_delay: float = 10.0  # 중복 요청 전 최대 대기 (초)
+    default_delay: float = 3.0  # 표본이 부족할 때의 대기 (초)
+    min_samples: int = 20  # 백분위수를 믿을 수 있는 최소 표본 수
+    max_attempts: int = 3  # 요청 하나의 최대 시도 횟수 (재시도 포함)
+    retry_budget: float = 30.0  # 재시도를 포함한 요청 하나의 최대 시간 (초)
+    # False이면 재시도만 하고 중복 요청은 보내지 않음 (응답이 길고 비싼 호출용)
+    hedge: bool = True
+
+
+class LatencyTracker:
+    """최근 성공한 호출의 지연 시간을 기록하고 백분위수를 계산합니다."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(p * (len(samples) - 1)))))
+        return samples[index]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedged-call")
+
+# 호출 이름별 통계 {"calls", "hedged", "hedge_wins", "retries"}
+stats: Dict[str, Dict[str, int]] = {}
+
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    with _trackers_lock:
+        tracker = _trackers.get(name)
+        if tracker is None:
+            tracker = _trackers[name] = LatencyTracker()
+        return tracker
+
+
+def hedge_delay(name: str, policy: HedgePolicy) -> float:
+    """중복 요청을 보내기 전에 기다릴 시간 (초)"""
+    tracker = get_latency_tracker(name)
+    if len(tracker) < policy.min_samples:
+        return policy.default_delay
+    delay = tracker.percentile(policy.percentile)
+    return min(policy.max_delay, max(policy.min_delay, delay))
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """재시도할 만한 일시적인 오류인지 판단합니다."""
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def _count(name: str, key: str) -> None:
+    with _trackers_lock:
+        counters = stats.setdefault(
+            name, {"calls": 0, "hedged": 0, "hedge_wins": 0, "retries": 0}
+        )
+        counters[key] += 1
+
+
+def _retrying(name: str, policy: HedgePolicy, is_async: bool):
+    import tenacity
+
+    kwargs = dict(
+        stop=tenacity.stop_after_attempt(policy.max_attempts)
+        | tenacity.stop_after_delay(policy.retry_budget),
+        wait=tenacity.wait_exponential_jitter(initial=0.25, max=4.0),
+        retry=tenacity.retry_if_exception(is_transient_error),
+        before_sleep=lambda state: _count(name, "retries"),
+        reraise=True,
+    )
+    return tenacity.AsyncRetrying(**kwargs) if is_async else tenacity.Retrying(**kwargs)
+
+
+def call_with_retries(
+    name: str, func: Callable[[], Any], policy: HedgePolicy = HedgePolicy()
+) -> Any:
+    """func를 일시적인 오류에 한해 재시도하며 호출합니다."""
+    return _retrying(name, policy, is_async=False)(func)
+
+
+async def acall_with_retries(
+    name: str, func: Callable[[], Any], policy: HedgePolicy = HedgePolicy()
+) -> Any:
+    """call_with_retries의 비동기 버전. func는 코루틴을 반환해야 합니다."""
+    return await _retrying(name, policy, is_async=True)(func)
+
+
+def call_hedged(
+    name: str,
+    primary: Callable[[], Any],
+    hedge: Optional[Callable[[], Any]] = None,
+    policy: HedgePolicy = HedgePolicy(),
+) -> Any:
+    """primary를 호출하고, 늦으면 hedge(없으면 primary)를 한 번 더 호출합니다.
+
+    스레드에서 실행 중인 패배한 호출은 강제로 멈출 수 없으므로 결과만 버립니다.
+    """
+    _count(name, "calls")
+    if not policy.hedge:
+        return primary()
+    hedge = hedge or primary
+    started = time.monotonic()
+    first = _hedge_executor.submit(primary)
+    try:
+        result = first.result(timeout=hedge_delay(name, policy))
+        get_latency_tracker(name).record(time.monotonic() - started)
+        return result
+    except FuturesTimeoutError:
+        pass
+
+    _count(name, "hedged")
+    hedge_started = time.monotonic()
+    second = _hedge_executor.submit(hedge)
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            for loser in pending:
+                loser.cancel()
+            if future is second:
+                _count(name, "hedge_wins")
+                get_latency_tracker(name).record(time.monotonic() - hedge_started)
+            else:
+                get_latency_tracker(name).record(time.monotonic() - started)
+            return future.result()
+    raise error
+
+
+async def acall_hedged(
+    name: str,
+    primary: Callable[[], Any],
+    hedge: Optional[Callable[[], Any]] = None,
+    policy: HedgePolicy = HedgePolicy(),
+) -> Any:
+    """call_hedged의 비동기 버전. 패배한 요청(또는 호출이 취소되면 모든 요청)은 취소합니다."""
+    _count(name, "calls")
+    if not policy.hedge:
+        return await primary()
+    hedge = hedge or primary
+    started = time.monotonic()
+    first = asyncio.ensure_future(primary())
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait({first}, timeout=hedge_delay(name, policy))
+        if done:
+            result = first.result()
+            get_latency_tracker(name).record(time.monotonic() - started)
+            return result
+
+        _count(name, "hedged")
+        hedge_started = time.monotonic()
+        second = asyncio.ensure_future(hedge())
+        tasks.append(second)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                if task is second:
+                    _count(name, "hedge_wins")
+                    get_latency_tracker(name).record(time.monotonic() - hedge_started)
+                else:
+                    get_latency_tracker(name).record(time.monotonic() - started)
+                return task.result()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def hedged(runnable, name: str, policy: Optional[HedgePolicy] = None):
+    """runnable의 invoke/ainvoke에 재시도와 중복 요청을 적용합니다.
+
+    중복 요청에는 콜백을 전달하지 않으므로 스트리밍 토큰이 두 번 나오지 않습니다.
+    중복 요청이 이기면 스트리밍된 토큰과 최종 결과가 다를 수 있으므로 화면에는
+    최종 결과를 표시해야 합니다.
+
+    Args:
+        runnable: 감쌀 모델 또는 체인
+        name: 지연 시간 통계를 구분하는 호출 이름
+        policy: HedgePolicy. 없으면 config의 설정으로 만든 기본 정책
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    if policy is None:
+        policy = default_policy()
+
+    def without_callbacks(config):
+        return {**(config or {}), "callbacks": None}
+
+    def invoke(value, config):
+        call_policy = bounded_policy(policy, config)
+        return call_hedged(
+            name,
+            lambda: call_with_retries(
+                name, lambda: runnable.invoke(value, config), call_policy
+            ),
+            lambda: call_with_retries(
+                name,
+                lambda: runnable.invoke(value, without_callbacks(config)),
+                call_policy,
+            ),
+            call_policy,
+        )
+
+    async def ainvoke(value, config):
+        call_policy = bounded_policy(policy, config)
+        return await acall_hedged(
+            name,
+            lambda: acall_with_retries(
+                name, lambda: runnable.ainvoke(value, config), call_policy
+            ),
+            lambda: acall_with_retries(
+                name,
+                lambda: runnable.ainvoke(value, without_callbacks(config)),
+                call_policy,
+            ),
+            call_policy,
+        )
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=f"hedged:{name}")
+
+
+def bounded_policy(policy: HedgePolicy, config: Optional[dict]) -> HedgePolicy:
+    """config의 브랜치 마감 시각을 넘겨 재시도하지 않도록 retry_budget을 줄입니다."""
+    remaining = config_remaining(config)
+    if remaining >= policy.retry_budget:
+        return policy
+    return policy._replace(retry_budget=max(0.0, remaining))
+
+
+def default_policy(hedge: bool = True) -> HedgePolicy:
+    """config 설정으로 만든 정책. hedge=False이면 중복 요청 없이 재시도만 함"""
+    import config
+
+    return HedgePolicy(
+        percentile=config.HEDGE_PERCENTILE,
+        min_delay=config.HEDGE_MIN_DELAY,
+        max_delay=config.HEDGE_MAX_DELAY,
+        max_attempts=config.LLM_MAX_ATTEMPTS,
+        hedge=hedge,
+    )
@@ -0,0 +1,189 @@
+"""Rolling history summarization.
+
+세션이 길어져도 프롬프트에 들어가는 이야기 히스토리의 크기가 일정하도록
+오래된 턴은 요약으로 접고 최근 N개의 턴만 원문으로 유지합니다.
+"""
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from token_counter import count_tokens
+
+# 기본 설정
+HISTORY_RECENT_TURNS = 4
+HISTORY_TOKEN_BUDGET = 1500
+SUMMARY_TOKEN_BUDGET = 400
+SUMMARY_PREFIX = "[이전 이야기 요약] "
+
+# (이전 요약, 접을 턴 목록) -> 새 요약
+Summarizer = Callable[[str, List[str]], str]
+
+_default_summarizer: Optional[Summarizer] = None
+
+# 모든 세션이 공유하는 백그라운드 압축 작업자
+_compaction_executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="history-compaction"
+)
+
+
+def get_default_summarizer() -> Optional[Summarizer]:
+    """프로세스 전역 LLM 요약 함수를 반환합니다. 만들 수 없으면 None (추출 요약 사용)."""
+    global _default_summarizer
+    if _default_summarizer is None:
+        try:
+            from story_chain import create_history_summarizer
+
+            _default_summarizer = create_history_summarizer()
+        except Exception as e:
+            print(f"LLM 요약기 생성 실패, 추출 요약 사용: {e}")
+    return _default_summarizer
+
+
+def trim_history(
+    history: Optional[List[str]],
+    max_turns: int = HISTORY_RECENT_TURNS,
+    token_budget: int = HISTORY_TOKEN_BUDGET,
+) -> List[str]:
+    """히스토리에서 최근 항목만 max_turns개, token_budget 이내로 남깁니다.
+
+    요약 항목(SUMMARY_PREFIX로 시작)은 예산이 허락하는 한 맨 앞에 유지합니다.
+    """
+    history = list(history or [])
+    summary = [h for h in history[:1] if isinstance(h, str) and h.startswith(SUMMARY_PREFIX)]
+    turns = history[len(summary) :]
+
+    kept: List[str] = []
+    used = count_tokens(summary[0]) if summary else 0
+    for turn in reversed(turns[-max_turns:] if max_turns > 0 else []):
+        tokens = count_tokens(str(turn))
+        if kept and used + tokens > token_budget:
+            break
+        kept.append(turn)
+        used += tokens
+    kept.reverse()
+
+    if summary and used <= token_budget:
+        return summary + kept
+    return kept
+
+
+def extractive_summary(
+    previous_summary: str, turns: List[str], token_budget: int = SUMMARY_TOKEN_BUDGET
+) -> str:
+    """각 턴의 첫 문장을 이어 붙이는 추출 요약. 예산을 넘으면 오래된 문장부터 버립니다."""
+    sentences = [s for s in re.split(r"(?<=[.!?。])\s+", previous_summary) if s]
+    for turn in turns:
+        first = re.split(r"(?<=[.!?。])\s+", turn.strip(), maxsplit=1)[0]
+        if first:
+            sentences.append(first)
+
+    while len(sentences) > 1 and count_tokens(" ".join(sentences)) > token_budget:
+        sentences.pop(0)
+    return " ".join(sentences)
+
+
+class HistoryManager:
+    """요약 + 최근 N턴으로 이야기 히스토리를 관리합니다.
+
+    - add_turn: 새 턴을 추가하고 백그라운드에서 압축을 예약합니다.
+    - prompt_history: 프롬프트에 넣을 히스토리 (요약 + 최근 턴, 토큰 예산 이내)
+    """
+
+    def __init__(
+        self,
+        max_recent_turns: int = HISTORY_RECENT_TURNS,
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        summary_token_budget: int = SUMMARY_TOKEN_BUDGET,
+        summarizer: Optional[Summarizer] = None,
+        background: bool = True,
+    ):
+        """
+        Args:
+            max_recent_turns: 원문으로 유지할 최근 턴 수
+            token_budget: 요약 + 최근 턴의 최대 토큰 수
+            summary_token_budget: 요약의 최대 토큰 수
+            summarizer: LLM 요약 함수. 없거나 실패하면 추출 요약을 사용
+            background: True면 압축을 백그라운드 스레드에서 실행
+        """
+        self.max_recent_turns = max_recent_turns
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.summarizer = summarizer
+        self.background = background
+
+        self.summary = ""
+        self.turns: List[str] = []
+        self._lock = threading.Lock()
+        self._compacting = False
+
+    def add_turn(self, text: str) -> None:
+        """생성된 이야기 한 턴을 추가합니다."""
+        if not text:
+            return
+        with self._lock:
+            self.turns.append(text)
+            if self._compacting or not self._needs_compaction():
+                return
+            self._compacting = True
+
+        if self.background:
+            _compaction_executor.submit(self.compact)
+        else:
+            self.compact()
+
+    def prompt_history(self) -> List[str]:
+        """프롬프트에 넣을 히스토리를 반환합니다. 압축이 끝나지 않았어도 예산을 지킵니다."""
+        with self._lock:
+            history = [SUMMARY_PREFIX + self.summary] if self.summary else []
+            history.extend(self.turns)
+        return trim_history(history, self.max_recent_turns, self.token_budget)
+
+    def compact(self) -> None:
+        """최근 턴 수/토큰 예산을 넘는 오래된 턴을 요약으로 접습니다."""
+        try:
+            while True:
+                with self._lock:
+                    overflow = self._overflow_count()
+                    if overflow <= 0:
+                        return
+                    previous_summary = self.summary
+                    folded = self.turns[:overflow]
+
+                # 요약(LLM 호출 가능)은 잠금 밖에서 수행
+                summary = self._summarize(previous_summary, folded)
+
+                with self._lock:
+                    self.summary = summary
+                    del self.turns[: len(folded)]
+        except Exception as e:
+            print(f"히스토리 압축 중 오류 발생: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def _summarize(self, previous_summary: str, turns: List[str]) -> str:
+        if self.summarizer is not None:
+            try:
+                summary = self.summarizer(previous_summary, turns)
+                if summary and count_tokens(summary) <= self.summary_token_budget:
+                    return summary.strip()
+                if summary:
+                    # 예산을 넘는 LLM 요약은 추출 방식으로 다시 줄임
+                    return extractive_summary("", [summary], self.summary_token_budget)
+            except Exception as e:
+                print(f"LLM 요약 실패, 추출 요약으로 대체: {e}")
+        return extractive_summary(previous_summary, turns, self.summary_token_budget)
+
+    def _overflow_count(self) -> int:
+        overflow = max(0, len(self.turns) - self.max_recent_turns)
+        budget = self.token_budget - count_tokens(self.summary)
+        while overflow < len(self.turns) - 1 and (
+            sum(count_tokens(t) for t in self.turns[overflow:]) > budget
+        ):
+            overflow += 1
+        return overflow
+
+    def _needs_compaction(self) -> bool:
+        return self._overflow_count() > 0
@@ -1,19 +1,100 @@
-from google import genai
-from google.genai import types
-from PIL import Image
-from io import BytesIO
-import os
-from dotenv import load_dotenv
-from typing import Optional
+import hashlib
+import json
+from typing import Dict, Optional, Tuple
 
-# .env 파일 로드
-load_dotenv()
+# Gemini 클라이언트와 API 키(.env)는 clients.get_genai_client가 처음 호출될 때 준비
+from clients import get_genai_client, get_model_limiter
+from ttl_cache import TTLCache
 
-# Gemini API 키 설정
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+TEXT_MODEL = "gemini-2.0-flash"
+IMAGE_MODEL = "gemini-2.0-flash-exp-image-generation"
 
-# Gemini 클라이언트 생성
-client = genai.Client(api_key=GEMINI_API_KEY)
+
+# 번역/요약 결과 캐시 (map_context는 여러 턴 동안 같으므로 대부분 적중)
+_translation_cache = TTLCache(maxsize=1024, ttl=24 * 3600)
+
+# 번역/요약에 실패했을 때 쓰는 기본 묘사
+FALLBACK_DESCRIPTION = "scene in dark post-apocalyptic setting"
+
+
+def _translation_key(text: str, max_words: int) -> str:
+    return hashlib.sha256(f"{max_words}\0{text}".encode("utf-8")).hexdigest()
+
+
+def build_translation_prompt(items: Dict[str, Tuple[str, int]]) -> str:
+    """여러 한글 텍스트를 한 번에 번역/요약하는 프롬프트를 만듭니다.
+
+    Args:
+        items: 결과 키 -> (한글 텍스트, 최대 단어 수)
+
+    Returns:
+        같은 키를 가진 JSON 객체로 답하도록 요청하는 프롬프트
+    """
+    blocks = "\n\n".join(
+        f'"{key}" (within {max_words} words):\n{text}'
+        for key, (text, max_words) in items.items()
+    )
+    keys = ", ".join(f'"{key}"' for key in items)
+    return f"""
+    Translate each of the following Korean texts to English and summarize it within the given number of words.
+    Focus on the visual elements, mood, setting, and atmosphere that would be useful for generating an image.
+
+    {blocks}
+
+    Respond with a JSON object with the keys {keys}, each mapped to its English translation and summary.
+    """
+
+
+def translate_and_summarize_batch(items: Dict[str, Tuple[str, int]]) -> Dict[str, str]:
+    """여러 한글 텍스트를 한 번의 모델 호출로 영문 번역/요약합니다.
+
+    텍스트 해시로 결과를 캐시하므로, 캐시에 없는 텍스트만 모아 한 번 호출하고
+    모두 캐시에 있으면 호출하지 않습니다.
+
+    Args:
+        items: 결과 키 -> (한글 텍스트, 최대 단어 수)
+
+    Returns:
+        결과 키 -> 번역 및 요약된 영문 텍스트
+    """
+    results: Dict[str, str] = {}
+    missing: Dict[str, Tuple[str, int]] = {}
+    for key, (text, max_words) in items.items():
+        if not text:
+            results[key] = ""
+            continue
+        cached = _translation_cache.get(_translation_key(text, max_words))
+        if cached is not None:
+            results[key] = cached
+        else:
+            missing[key] = (text, max_words)
+    if not missing:
+        return results
+
+    try:
+        # Gemini 모델을 사용하여 번역 및 요약 (공유 클라이언트, JSON 응답)
+        with get_model_limiter(TEXT_MODEL):
+            response = get_genai_client().models.generate_content(
+                model=TEXT_MODEL,
+                contents=build_translation_prompt(missing),
+                config={"response_mime_type": "application/json"},
+            )
+        translated = json.loads(response.text)
+        if not isinstance(translated, dict):
+            raise ValueError(f"unexpected response: {response.text[:200]}")
+    except Exception as e:
+        print(f"번역 및 요약 실패: {e}")
+        translated = {}
+
+    for key, (text, max_words) in missing.items():
+        value = translated.get(key)
+        if isinstance(value, str) and value.strip():
+            results[key] = value.strip()
+            _translation_cache.set(_translation_key(text, max_words), results[key])
+        else:
+            # 오류 발생 시 기본 묘사로 대체 (캐시하지 않으므로 다음에 다시 시도)
+            results[key] = FALLBACK_DESCRIPTION
+    return results
 
 
 # 한글 텍스트를 영문으로 번역하고 요약하는 함수
@@ -28,41 +109,18 @@ def translate_and_summarize(text: str, max_words: int = 50) -> str:
     Returns:
         번역 및 요약된 영문 텍스트
     """
-    try:
-        if not text:
-            return ""
-
-        # 번역 및 요약 프롬프트
-        prompt = f"""
-        Translate the following Korean text to English and summarize it within {max_words} words. 
-        Focus on the visual elements, mood, setting, and atmosphere that would be useful for generating an image.
-        
-        Korean text: {text}
-        
-        English translation and summary:
-        """
-
-        # Gemini 모델을 사용하여 번역 및 요약
-        response = client.models.generate_content(
-            model="gemini-2.0-flash", contents=prompt
-        )
-
-        # 응답에서 텍스트 추출
-        translated_summary = response.text.strip()
-        return translated_summary
-
-    except Exception as e:
-        print(f"번역 및 요약 실패: {e}")
-        # 오류 발생 시 원본 텍스트를 영어로 간단히 대체
-        return "scene in dark post-apocalyptic setting"
+    return translate_and_summarize_batch({"text": (text, max_words)})["text"]
 
 
 def generate_scene_image(summary: str, current_scene: str) -> Optional[bytes]:
     """이미지 프롬프트 템플릿을 사용하여 현재 씬에 대한 이미지를 생성합니다."""
     try:
-        # 한글 텍스트를 영문으로 번역하고 요약
-        translated_summary = translate_and_summarize(summary, max_words=30)
-        translated_scene = translate_and_summarize(current_scene, max_words=50)
+        # 한글 텍스트를 영문으로 번역하고 요약 (한 번의 호출, 캐시된 텍스트는 생략)
+        translated = translate_and_summarize_batch(
+            {"summary": (summary, 30), "scene": (current_scene, 50)}
+        )
+        translated_summary = translated["summary"]
+        translated_scene = translated["scene"]
 
         # print(f"번역된 요약: {translated_summary}")
         # print(f"번역된 장면: {translated_scene}")
@@ -75,11 +133,12 @@ def generate_scene_image(summary: str, current_scene: str) -> Optional[bytes]:
         Digital art with photorealistic elements"""
 
         # Gemini 2.0 Flash 모델로 이미지 생성 API 호출
-        response = client.models.generate_content(
-            model="gemini-2.0-flash-exp-image-generation",
-            contents=prompt,
-            config=types.GenerateContentConfig(response_modalities=["Text", "Image"]),
-        )
+        with get_model_limiter(IMAGE_MODEL):
+            response = get_genai_client().models.generate_content(
+                model=IMAGE_MODEL,
+                contents=prompt,
+                config={"response_modalities": ["Text", "Image"]},
+            )
 
         # 응답에서 이미지 데이터 추출
         for part in response.candidates[0].content.parts:
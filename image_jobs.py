@@ -0,0 +1,159 @@
+"""Background scene image generation.
+
+장면 이미지 생성은 번역/요약 호출과 이미지 모델 호출을 거치므로 수 초 이상 걸립니다.
+턴은 작업을 큐에 넣고 작업 ID만 받아 바로 이야기를 표시하고, 작업 스레드 풀이 이미지를
+만듭니다. 화면은 주기적으로 collect()를 호출해 끝난 이미지를 해당 이야기에 붙입니다.
+
+저장소(image_store)를 주면 작업 스레드가 이미지를 디스크에 쓰고 결과로 참조(해시)만
+돌려주므로, 이미지 바이트가 큐나 세션 상태에 남지 않습니다.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+import telemetry
+
+DEFAULT_WORKERS = 2
+# 찾아가지 않은 결과를 보관하는 시간 (초). 세션이 끝나도 결과가 쌓이지 않도록 함
+RESULT_TTL = 3600.0
+
+GenerateFunc = Callable[[str, str], Optional[bytes]]
+
+
+class ImageJob(NamedTuple):
+    job_id: str
+    session_id: str
+    summary: str  # 맵/장면 요약
+    scene: str  # 생성된 이야기
+
+
+class ImageJobQueue:
+    """이미지 생성 작업 풀
+
+    Args:
+        generate: (요약, 이야기) -> 이미지 바이트. 기본값 image_gen.generate_scene_image
+        workers: 동시에 실행할 작업 수
+        result_ttl: 끝난 작업 결과를 보관하는 시간 (초)
+        store: 이미지를 저장할 ImageStore. 있으면 결과는 이미지 참조(해시)
+    """
+
+    def __init__(
+        self,
+        generate: Optional[GenerateFunc] = None,
+        workers: int = DEFAULT_WORKERS,
+        result_ttl: float = RESULT_TTL,
+        store: Optional[Any] = None,
+    ):
+        self._generate = generate
+        self._store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="image-job"
+        )
+        self._result_ttl = result_ttl
+        self._jobs: Dict[str, Tuple[ImageJob, Future, float]] = {}
+        self._lock = threading.Lock()
+
+    def _run(self, job: ImageJob) -> Optional[Any]:
+        if self._generate is None:
+            from image_gen import generate_scene_image
+
+            self._generate = generate_scene_image
+        started = time.monotonic()
+        try:
+            image = self._generate(job.summary, job.scene)
+        except Exception as e:
+            telemetry.increment("image_jobs.failed")
+            print(f"Image generation error: {e}")
+            return None
+        latency_ms = int((time.monotonic() - started) * 1000)
+        telemetry.increment("image_jobs.latency_ms", latency_ms)
+        telemetry.increment("image_jobs.completed" if image else "image_jobs.empty")
+        if image and self._store is not None:
+            try:
+                return self._store.put(image)
+            except OSError as e:
+                telemetry.increment("image_jobs.failed")
+                print(f"Error storing generated image: {e}")
+                return None
+        return image
+
+    def _prune(self) -> None:
+        expired_before = time.monotonic() - self._result_ttl
+        for job_id, (_, future, submitted_at) in list(self._jobs.items()):
+            if future.done() and submitted_at < expired_before:
+                del self._jobs[job_id]
+
+    def submit(self, session_id: str, summary: str, scene: str) -> str:
+        """이미지 생성 작업을 큐에 넣고 바로 작업 ID를 반환합니다."""
+        job = ImageJob(uuid.uuid4().hex, session_id or "", summary or "", scene)
+        future = self._executor.submit(self._run, job)
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = (job, future, time.monotonic())
+        telemetry.increment("image_jobs.submitted")
+        return job.job_id
+
+    def status(self, job_id: str) -> str:
+        """작업 상태: pending, done 또는 (모르는 작업이면) unknown"""
+        with self._lock:
+            entry = self._jobs.get(job_id)
+        if entry is None:
+            return "unknown"
+        return "done" if entry[1].done() else "pending"
+
+    def collect(self, job_ids: Iterable[str]) -> Dict[str, Optional[Any]]:
+        """끝난 작업의 결과(이미지 참조 또는 바이트, 실패하면 None)를 꺼냅니다.
+
+        꺼낸 작업은 큐에서 지워집니다.
+
+        모르는 작업 ID(보관 시간이 지났거나 서버가 재시작됨)도 None으로 반환하므로
+        호출한 쪽은 반환된 작업을 더 기다리지 않아도 됩니다.
+        """
+        finished: Dict[str, Optional[Any]] = {}
+        with self._lock:
+            for job_id in job_ids:
+                entry = self._jobs.get(job_id)
+                if entry is None:
+                    finished[job_id] = None
+                elif entry[1].done():
+                    del self._jobs[job_id]
+                    finished[job_id] = entry[1].result()
+        return finished
+
+    def pending(self) -> int:
+        """아직 끝나지 않은 작업 수"""
+        with self._lock:
+            return sum(not future.done() for _, future, _ in self._jobs.values())
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """모든 작업이 끝날 때까지 기다립니다. (테스트/종료용)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_queue: Optional[ImageJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_image_jobs() -> ImageJobQueue:
+    """프로세스 전역 ImageJobQueue를 반환합니다."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            import config
+            from image_store import get_image_store
+
+            _queue = ImageJobQueue(
+                workers=config.IMAGE_JOB_WORKERS, store=get_image_store()
+            )
+        return _queue
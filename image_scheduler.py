@@ -0,0 +1,389 @@
+"""Scene image scheduling.
+
+모든 턴마다 이미지를 만들면 이미지 모델 비용과 대기 시간이 플레이어 수에 비례해
+늘어납니다. 스케줄러가 턴마다 이미지를 만들지 정하고, 만들 이미지는 세션을 가로지르는
+우선순위 큐에 넣어 전역 처리량 안에서 이미지 작업 풀(image_jobs)로 보냅니다.
+
+- 트리거: 장면/맵이 바뀌었거나, 마지막 이미지 이후 min_turns_between 턴이 지났고
+  이야기가 마지막으로 그린 이야기와 충분히 다를 때 (significance)
+- 예산: 세션별 시간당 이미지 수, 전역 분당 이미지 수, 큐 크기, 최대 대기 시간
+- 재사용: 트리거된 턴이 전에 그린 (장면, 비트)이면 저장소에 있는 이미지를 그대로 씀
+"""
+
+import heapq
+import itertools
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import telemetry
+from ttl_cache import TTLCache
+
+# 메모리에 유지할 세션 기록 수
+MAX_SESSIONS = 4096
+# 트리거별 우선순위 (작을수록 먼저 처리)
+TRIGGER_PRIORITY = {"scene_change": 0, "significance": 1}
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class ImagePolicy(NamedTuple):
+    min_turns_between: int = 3  # 장면이 바뀌지 않았을 때 이미지 사이 최소 턴 수
+    significance_threshold: float = 0.6  # 이보다 덜 새로운 이야기는 그리지 않음
+    session_per_hour: int = 12  # 세션별 시간당 최대 이미지 수
+    global_per_minute: int = 30  # 전역 분당 최대 이미지 작업 수
+    max_queue: int = 64  # 대기열 최대 길이 (넘치면 우선순위가 가장 낮은 요청을 버림)
+    max_wait: float = 120.0  # 대기열에서 기다릴 수 있는 최대 시간 (초)
+    max_in_flight: int = 2  # 작업 풀에 동시에 보낼 작업 수
+    # 찾아가지 않은 요청을 보관하는 시간 (초). 작업 풀의 결과 보관 시간과 같음
+    result_ttl: float = 3600.0
+
+
+class ImageDecision(NamedTuple):
+    action: str  # "reuse" | "queued" | "skip"
+    reason: str
+    ticket: Optional[str] = None  # action이 "queued"일 때 collect()에 넘길 ID
+    ref: Optional[str] = None  # action이 "reuse"일 때 이미지 참조
+
+
+class _SessionRecord:
+    def __init__(self):
+        self.scene_key: Optional[Tuple[str, str]] = None
+        self.turns_since_image = 0
+        self.last_words: frozenset = frozenset()
+        self.requested_at: deque = deque()
+
+
+class _Ticket:
+    def __init__(
+        self,
+        session_id: str,
+        cache_key: Tuple[str, str],
+        summary: str,
+        text: str,
+        queued_at: float,
+    ):
+        self.session_id = session_id
+        self.cache_key = cache_key
+        self.summary = summary
+        self.text = text
+        self.queued_at = queued_at
+        self.job_id: Optional[str] = None
+
+
+def significance_score(text: str, previous: Iterable[str]) -> float:
+    """마지막으로 그린 이야기에 없던 단어의 비율 (0~1). 처음 그리는 이야기는 1"""
+    words = set(_WORD.findall(text.casefold()))
+    if not words:
+        return 0.0
+    return len(words - set(previous)) / len(words)
+
+
+class ImageScheduler:
+    """이미지 생성 여부를 정하고 세션을 가로질러 생성 순서를 조절합니다.
+
+    Args:
+        jobs: submit(session_id, summary, scene)/collect(job_ids)/pending()을 가진
+            이미지 작업 풀 (기본값 image_jobs.get_image_jobs())
+        policy: 트리거와 예산 설정
+        store: 재사용할 이미지가 아직 있는지 확인할 저장소 (ref in store)
+        clock: 현재 시각 함수 (초)
+        background: True이면 대기열을 처리하는 스레드를 띄움. False이면 dispatch()를
+            직접 호출해야 함 (테스트용)
+    """
+
+    def __init__(
+        self,
+        jobs: Optional[Any] = None,
+        policy: ImagePolicy = ImagePolicy(),
+        store: Optional[Any] = None,
+        clock: Callable[[], float] = time.monotonic,
+        background: bool = True,
+    ):
+        self._jobs = jobs
+        self.policy = policy
+        self._store = store
+        self._clock = clock
+        self._background = background
+        self._sessions: "OrderedDict[str, _SessionRecord]" = OrderedDict()
+        self._queue: List[Tuple[Tuple[int, int, int], str]] = []
+        self._tickets: Dict[str, _Ticket] = {}
+        self._dispatched_at: deque = deque()
+        self._cache = TTLCache(maxsize=4096, ttl=None)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def jobs(self):
+        if self._jobs is None:
+            from image_jobs import get_image_jobs
+
+            self._jobs = get_image_jobs()
+        return self._jobs
+
+    def _session(self, session_id: str) -> _SessionRecord:
+        record = self._sessions.get(session_id)
+        if record is None:
+            record = self._sessions[session_id] = _SessionRecord()
+            while len(self._sessions) > MAX_SESSIONS:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return record
+
+    def _cached(self, cache_key: Tuple[str, str]) -> Optional[str]:
+        ref = self._cache.get(cache_key)
+        if ref is not None and self._store is not None and ref not in self._store:
+            self._cache.pop(cache_key)  # 보존 정책으로 지워진 이미지
+            return None
+        return ref
+
+    @staticmethod
+    def _expire(window: deque, now: float, span: float) -> None:
+        while window and window[0] <= now - span:
+            window.popleft()
+
+    def schedule(
+        self,
+        session_id: str,
+        text: str,
+        scene: str = "",
+        scene_beat: str = "",
+        map_id: str = "",
+        summary: str = "",
+        action_result: Optional[str] = None,
+    ) -> ImageDecision:
+        """이번 턴에 이미지를 만들지 정하고, 만들 이미지는 대기열에 넣습니다.
+
+        Args:
+            session_id: 게임 세션 ID
+            text: 이번 턴에 생성된 이야기
+            scene: 현재 장면 ID
+            scene_beat: 현재 장면 비트 ID
+            map_id: 현재 맵 ID (장면 변화 판단에 함께 사용)
+            summary: 이미지 프롬프트에 들어갈 맵/장면 요약
+            action_result: 턴 결과 ("invalid_input"이면 그리지 않음)
+        """
+        decision = self._decide(
+            session_id or "", text, scene, scene_beat, map_id, summary, action_result
+        )
+        telemetry.increment(f"image_scheduler.{decision.action}.{decision.reason}")
+        return decision
+
+    def schedule_turn(
+        self, session_id: str, result: Dict[str, Any], state: Dict[str, Any]
+    ) -> ImageDecision:
+        """턴 결과로 schedule()을 호출합니다.
+
+        장면/비트/맵은 이번 턴에 바뀌었을 수 있으므로 턴 결과(result)를 먼저 보고,
+        없으면 턴 이전 상태(state)의 값을 씁니다.
+        """
+
+        def current(key: str) -> Any:
+            return result.get(key) or state.get(key, "")
+
+        return self.schedule(
+            session_id,
+            result.get("generation", ""),
+            scene=current("scene"),
+            scene_beat=current("scene_beat"),
+            map_id=current("map"),
+            summary=current("map_context"),
+            action_result=result.get("action_result"),
+        )
+
+    def _decide(
+        self,
+        session_id: str,
+        text: str,
+        scene: str,
+        scene_beat: str,
+        map_id: str,
+        summary: str,
+        action_result: Optional[str],
+    ) -> ImageDecision:
+        if not text or action_result == "invalid_input":
+            return ImageDecision("skip", "invalid_input")
+
+        cache_key = (scene, scene_beat)
+        now = self._clock()
+        with self._condition:
+            record = self._session(session_id)
+            record.turns_since_image += 1
+            scene_changed = record.scene_key != (scene, map_id)
+            record.scene_key = (scene, map_id)
+
+            words = frozenset(_WORD.findall(text.casefold()))
+            if scene_changed:
+                trigger = "scene_change"
+            elif record.turns_since_image < self.policy.min_turns_between:
+                return ImageDecision("skip", "too_soon")
+            elif (
+                significance_score(text, record.last_words)
+                < self.policy.significance_threshold
+            ):
+                return ImageDecision("skip", "not_significant")
+            else:
+                trigger = "significance"
+
+            # 다시 찾은 (장면, 비트)는 예산을 쓰지 않고 전에 만든 이미지를 씀
+            ref = self._cached(cache_key) if any(cache_key) else None
+            if ref is not None:
+                record.turns_since_image = 0
+                record.last_words = words
+                return ImageDecision("reuse", trigger, ref=ref)
+
+            self._expire(record.requested_at, now, 3600.0)
+            if len(record.requested_at) >= self.policy.session_per_hour:
+                return ImageDecision("skip", "session_budget")
+
+            ticket_id = uuid.uuid4().hex
+            priority = (
+                TRIGGER_PRIORITY[trigger],
+                len(record.requested_at),  # 이미지를 적게 받은 세션 먼저
+                next(self._sequence),
+            )
+            if len(self._queue) >= self.policy.max_queue:
+                worst = max(self._queue)
+                if worst[0] < priority:
+                    return ImageDecision("skip", "queue_full")
+                self._queue.remove(worst)
+                heapq.heapify(self._queue)
+                self._tickets.pop(worst[1], None)
+                telemetry.increment("image_scheduler.dropped")
+
+            record.requested_at.append(now)
+            record.turns_since_image = 0
+            record.last_words = words
+            self._tickets[ticket_id] = _Ticket(
+                session_id, cache_key, summary, text, now
+            )
+            heapq.heappush(self._queue, (priority, ticket_id))
+            self._condition.notify()
+        self._start()
+        return ImageDecision("queued", trigger, ticket=ticket_id)
+
+    def _prune_tickets(self, now: float) -> None:
+        # self._condition을 잡은 상태에서 호출. 끝난 세션이 찾아가지 않은 요청을 지움
+        expired_before = now - self.policy.max_wait - self.policy.result_ttl
+        for ticket_id, ticket in list(self._tickets.items()):
+            if ticket.queued_at < expired_before:
+                del self._tickets[ticket_id]
+
+    def dispatch(self) -> int:
+        """전역 예산 안에서 대기열의 요청을 작업 풀로 보냅니다.
+
+        Returns:
+            보낸 요청 수
+        """
+        sent = 0
+        while True:
+            now = self._clock()
+            with self._condition:
+                self._expire(self._dispatched_at, now, 60.0)
+                if not sent:
+                    self._prune_tickets(now)
+                if not self._queue:
+                    return sent
+                if len(self._dispatched_at) >= self.policy.global_per_minute:
+                    return sent
+                if self.jobs.pending() >= self.policy.max_in_flight:
+                    return sent
+                _, ticket_id = heapq.heappop(self._queue)
+                ticket = self._tickets.get(ticket_id)
+                if ticket is None:
+                    continue
+                if now - ticket.queued_at > self.policy.max_wait:
+                    # 너무 오래 기다린 이미지는 이미 지나간 장면이므로 버림
+                    del self._tickets[ticket_id]
+                    telemetry.increment("image_scheduler.expired")
+                    continue
+                self._dispatched_at.append(now)
+            job_id = self.jobs.submit(ticket.session_id, ticket.summary, ticket.text)
+            with self._condition:
+                ticket.job_id = job_id
+            telemetry.increment(
+                "image_scheduler.wait_ms", int((now - ticket.queued_at) * 1000)
+            )
+            sent += 1
+
+    def collect(self, tickets: Iterable[str]) -> Dict[str, Optional[Any]]:
+        """끝난 요청의 결과(이미지 참조, 실패하거나 버려졌으면 None)를 꺼냅니다."""
+        finished: Dict[str, Optional[Any]] = {}
+        dispatched: Dict[str, str] = {}
+        with self._condition:
+            self._prune_tickets(self._clock())
+            for ticket_id in tickets:
+                ticket = self._tickets.get(ticket_id)
+                if ticket is None:
+                    finished[ticket_id] = None  # 버려졌거나 모르는 요청
+                elif ticket.job_id is not None:
+                    dispatched[ticket.job_id] = ticket_id
+        if not dispatched:
+            return finished
+
+        results = self.jobs.collect(dispatched)
+        with self._condition:
+            for job_id, ref in results.items():
+                ticket_id = dispatched[job_id]
+                ticket = self._tickets.pop(ticket_id, None)
+                finished[ticket_id] = ref
+                if ref and ticket is not None and any(ticket.cache_key):
+                    self._cache.set(ticket.cache_key, ref)
+        return finished
+
+    def queued(self) -> int:
+        """작업 풀로 보내지 않고 기다리는 요청 수"""
+        with self._condition:
+            return len(self._queue)
+
+    def _start(self) -> None:
+        if not self._background:
+            return
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="image-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.dispatch()
+            except Exception as e:
+                print(f"Error dispatching image jobs: {e}")
+            # 새 요청이 들어오거나, 작업/예산에 여유가 생겼는지 주기적으로 확인
+            with self._condition:
+                self._condition.wait(timeout=0.5)
+
+
+_scheduler: Optional[ImageScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_image_scheduler() -> ImageScheduler:
+    """프로세스 전역 ImageScheduler를 반환합니다."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            import config
+            from image_store import get_image_store
+
+            _scheduler = ImageScheduler(
+                policy=ImagePolicy(
+                    min_turns_between=config.IMAGE_MIN_TURNS_BETWEEN,
+                    significance_threshold=config.IMAGE_SIGNIFICANCE_THRESHOLD,
+                    session_per_hour=config.IMAGE_SESSION_PER_HOUR,
+                    global_per_minute=config.IMAGE_GLOBAL_PER_MINUTE,
+                    max_queue=config.IMAGE_QUEUE_SIZE,
+                    max_in_flight=config.IMAGE_JOB_WORKERS,
+                ),
+                store=get_image_store(),
+            )
+        return _scheduler
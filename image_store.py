@@ -0,0 +1,220 @@
+"""Content-addressed on-disk image store.
+
+생성된 이미지를 세션 상태에 바이트로 들고 있으면 세션이 길어지고 플레이어가 많아질수록
+서버 메모리가 늘어납니다. 이미지는 내용 해시를 이름으로 디스크에 한 번만 쓰고, 세션
+상태에는 참조(해시)만 둡니다. 화면에는 축소하고 다시 인코딩한 표시용 이미지(WebP,
+지원하지 않으면 JPEG)를 파일 경로로 넘겨 필요할 때만 읽습니다.
+
+보존 정책: 전체 크기가 max_bytes를 넘거나 max_age보다 오래 쓰이지 않은 이미지는
+가장 오래전에 쓰인 것부터 지웁니다. (표시할 때마다 수정 시각을 갱신)
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from io import BytesIO
+from typing import List, Optional, Tuple
+
+import telemetry
+
+DEFAULT_STORE_PATH = os.path.join(".cache", "images")
+DEFAULT_MAX_BYTES = 2 * 1024**3
+DEFAULT_MAX_AGE = 30 * 24 * 3600.0
+# 표시용 이미지의 긴 변 최대 픽셀 수와 인코딩 품질
+DEFAULT_DISPLAY_SIZE = 1024
+DEFAULT_DISPLAY_QUALITY = 80
+# 보존 정책을 적용하는 최소 간격 (초). 저장할 때마다 디렉터리를 훑지 않도록 함
+RETENTION_INTERVAL = 300.0
+
+ORIGINAL_SUFFIX = ".img"
+DISPLAY_SUFFIXES = (".webp", ".jpg")
+
+_REF = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ImageStore:
+    """내용 해시로 이미지를 저장하는 디스크 저장소
+
+    Args:
+        path: 저장 디렉터리
+        max_bytes: 원본과 표시용 이미지를 합한 최대 크기
+        max_age: 쓰이지 않은 이미지를 보존하는 시간 (초)
+        display_size: 표시용 이미지의 긴 변 최대 픽셀 수
+        display_quality: 표시용 이미지 인코딩 품질 (1~100)
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_STORE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+        display_size: int = DEFAULT_DISPLAY_SIZE,
+        display_quality: int = DEFAULT_DISPLAY_QUALITY,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.display_size = display_size
+        self.display_quality = display_quality
+        self._lock = threading.Lock()
+        self._last_retention = 0.0
+
+    def _base(self, ref: str) -> str:
+        return os.path.join(self.path, ref[:2], ref)
+
+    def _write(self, path: str, data: bytes) -> None:
+        # 임시 파일에 쓴 뒤 이름을 바꾸므로 읽는 쪽이 쓰다 만 파일을 보지 않음
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _encode_display(self, data: bytes) -> Optional[Tuple[str, bytes]]:
+        """축소하고 다시 인코딩한 (확장자, 바이트). PIL을 쓸 수 없으면 None"""
+        try:
+            from PIL import Image
+        except ImportError:
+            return None
+        try:
+            with Image.open(BytesIO(data)) as image:
+                image.thumbnail((self.display_size, self.display_size))
+                for suffix, image_format in zip(DISPLAY_SUFFIXES, ("WEBP", "JPEG")):
+                    # JPEG는 알파 채널을 지원하지 않음
+                    converted = image
+                    if image_format == "JPEG":
+                        converted = image.convert("RGB")
+                    output = BytesIO()
+                    try:
+                        converted.save(
+                            output, format=image_format, quality=self.display_quality
+                        )
+                    except (KeyError, OSError):
+                        continue  # 이 형식의 인코더가 없음
+                    return suffix, output.getvalue()
+        except Exception as e:
+            print(f"Error encoding display image: {e}")
+        return None
+
+    def put(self, data: bytes) -> str:
+        """이미지를 저장하고 참조(SHA-256 해시)를 반환합니다.
+
+        같은 이미지는 한 번만 씁니다.
+        """
+        ref = hashlib.sha256(data).hexdigest()
+        base = self._base(ref)
+        if os.path.exists(base + ORIGINAL_SUFFIX):
+            telemetry.increment("image_store.dedup")
+            self._touch(base + ORIGINAL_SUFFIX)
+            return ref
+
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        # 표시용 이미지를 먼저 써야 원본이 있으면 표시용도 있음
+        display = self._encode_display(data)
+        if display is not None:
+            suffix, encoded = display
+            self._write(base + suffix, encoded)
+        self._write(base + ORIGINAL_SUFFIX, data)
+        telemetry.increment("image_store.stored")
+        telemetry.increment("image_store.bytes", len(data))
+
+        if time.monotonic() - self._last_retention >= RETENTION_INTERVAL:
+            self.enforce_retention()
+        return ref
+
+    def path_for(self, ref: str, display: bool = True) -> Optional[str]:
+        """이미지 파일 경로. 표시용 이미지가 없으면 원본, 지워졌으면 None"""
+        if not isinstance(ref, str) or not _REF.match(ref):
+            return None
+        base = self._base(ref)
+        candidates = [base + suffix for suffix in DISPLAY_SUFFIXES] if display else []
+        for path in candidates + [base + ORIGINAL_SUFFIX]:
+            if os.path.exists(path):
+                self._touch(path)
+                return path
+        return None
+
+    def get(self, ref: str, display: bool = True) -> Optional[bytes]:
+        """이미지 바이트를 읽습니다. 없으면 None"""
+        path = self.path_for(ref, display)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def __contains__(self, ref: str) -> bool:
+        return self.path_for(ref, display=False) is not None
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _groups(self) -> List[Tuple[float, int, List[str]]]:
+        """이미지별 (마지막으로 쓰인 시각, 크기 합계, 파일 목록)"""
+        groups = {}
+        for directory, _, files in os.walk(self.path):
+            for name in files:
+                ref = name.split(".", 1)[0]
+                if not _REF.match(ref) or name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                used, size, paths = groups.get(ref, (0.0, 0, []))
+                groups[ref] = (
+                    max(used, stat.st_mtime),
+                    size + stat.st_size,
+                    paths + [path],
+                )
+        return sorted(groups.values(), key=lambda group: group[0])
+
+    def enforce_retention(self) -> int:
+        """보존 정책을 적용하고 지운 이미지 수를 반환합니다."""
+        with self._lock:
+            self._last_retention = time.monotonic()
+            groups = self._groups()
+            total = sum(size for _, size, _ in groups)
+            expired_before = time.time() - self.max_age
+            removed = 0
+            for used, size, paths in groups:
+                if total <= self.max_bytes and used >= expired_before:
+                    break  # 오래된 순서이므로 나머지는 모두 보존
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+                removed += 1
+        if removed:
+            telemetry.increment("image_store.evicted", removed)
+        return removed
+
+
+_store: Optional[ImageStore] = None
+_store_lock = threading.Lock()
+
+
+def get_image_store() -> ImageStore:
+    """프로세스 전역 ImageStore를 반환합니다."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            import config
+
+            _store = ImageStore(
+                path=config.IMAGE_STORE_PATH,
+                max_bytes=config.IMAGE_STORE_MAX_MB * 1024**2,
+                max_age=config.IMAGE_STORE_MAX_AGE_DAYS * 24 * 3600,
+                display_size=config.IMAGE_DISPLAY_SIZE,
+            )
+        return _store
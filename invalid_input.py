@@ -0,0 +1,145 @@
+"""Fast path for unrecognized player input.
+
+가능한 행동과 매칭되지 않는 입력에는 이야기 생성(LLM)을 호출하지 않고, 씬 비트별로
+미리 만들어 둔 "아무 일도 일어나지 않는" 내레이션 중 하나를 돌려줍니다.
+비트별 내레이션은 오프라인에서 `python invalid_input.py`로 갱신합니다.
+"""
+
+import json
+import os
+import random
+import threading
+from typing import Any, Dict, List, Optional
+
+INVALID_NARRATION_FILE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "data",
+    "initial_data",
+    "invalid_narrations.json",
+)
+NARRATIONS_PER_BEAT = 5
+
+# 비트별 내레이션이 없을 때 사용하는 템플릿
+DEFAULT_NARRATIONS = [
+    "당신은 '{user_input}'을(를) 시도해 보지만, 어두운 역사 안에서는 아무 일도 일어나지 않습니다.",
+    "'{user_input}'... 잠시 망설이는 사이, 멀리서 기계음이 울립니다. 상황은 그대로입니다.",
+    "그 행동은 지금 이곳에서 아무런 의미가 없어 보입니다. 깜빡이는 비상등만이 당신을 비춥니다.",
+    "당신의 시도는 정적 속에 묻힙니다. 아무것도 변하지 않았습니다.",
+]
+ACTION_HINT = " 지금 할 수 있는 일: {actions}"
+
+_narrations: Optional[Dict[str, List[str]]] = None
+_narrations_mtime: Optional[float] = None
+_lock = threading.Lock()
+
+
+def load_invalid_narrations(
+    path: str = INVALID_NARRATION_FILE_PATH,
+) -> Dict[str, List[str]]:
+    """비트 ID별 내레이션을 불러옵니다. 파일이 바뀌면 다시 읽습니다."""
+    global _narrations, _narrations_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+
+    with _lock:
+        if _narrations is None or _narrations_mtime != mtime:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    _narrations = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Error loading invalid narrations: {e}")
+                _narrations = {}
+            _narrations_mtime = mtime
+        return _narrations
+
+
+def get_invalid_narration(
+    scene_beat: str,
+    user_input: str = "",
+    available_actions: Optional[List[str]] = None,
+    narrations: Optional[Dict[str, List[str]]] = None,
+) -> str:
+    """잘못된 입력에 대한 내레이션을 반환합니다.
+
+    Args:
+        scene_beat: 현재 씬 비트 ID
+        user_input: 사용자 입력
+        available_actions: 가능한 행동 목록 (내레이션 끝에 힌트로 붙임)
+        narrations: 비트별 내레이션. 없으면 파일에서 불러옴
+
+    Returns:
+        비트별 내레이션 또는 기본 템플릿 내레이션
+    """
+    if narrations is None:
+        narrations = load_invalid_narrations()
+    candidates = narrations.get(scene_beat) or DEFAULT_NARRATIONS
+    narration = random.choice(candidates).replace("{user_input}", user_input.strip())
+    if available_actions:
+        narration += ACTION_HINT.format(actions=", ".join(available_actions))
+    return narration
+
+
+def invalid_input_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """매칭되지 않은 입력에 LLM 호출 없이 응답하는 노드"""
+    return {
+        "generation": get_invalid_narration(
+            state.get("scene_beat", ""),
+            state.get("user_input", ""),
+            state.get("available_actions", []),
+        ),
+        "action_result": "invalid_input",
+    }
+
+
+def generate_invalid_narrations(
+    scenes: List[Dict[str, Any]], per_beat: int = NARRATIONS_PER_BEAT
+) -> Dict[str, List[str]]:
+    """씬 비트마다 LLM으로 "아무 일도 일어나지 않는" 내레이션을 생성합니다. (오프라인 전용)"""
+    from langchain_core.output_parsers import JsonOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    from clients import get_chat_model
+
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            (
+                "system",
+                "You write short narrations for an interactive novel set in a "
+                "post-apocalyptic Pangyo subway station. The player tried something "
+                "that has no effect. Write {count} different narrations in Korean, "
+                "1-2 sentences each, that keep the atmosphere of the scene and change "
+                "nothing in the story. You may use the placeholder {{user_input}} for "
+                "the player's attempt. Return a JSON list of strings only.",
+            ),
+            ("user", "Scene: {scene}\nScene beat: {beat}"),
+        ]
+    )
+    chain = prompt | get_chat_model("gpt-4o-mini", temperature=0.9) | JsonOutputParser()
+
+    narrations = {}
+    for scene in scenes:
+        for beat in scene.get("scene_beats", []):
+            try:
+                result = chain.invoke(
+                    {
+                        "count": per_beat,
+                        "scene": scene.get("context", ""),
+                        "beat": beat.get("context", ""),
+                    }
+                )
+                narrations[beat["id"]] = [str(n) for n in result if n]
+            except Exception as e:
+                print(f"Error generating narrations for {beat.get('id')}: {e}")
+    return narrations
+
+
+if __name__ == "__main__":
+    from db_init import SCENE_FILE_PATH
+    from db_utils import load_json_data
+
+    narrations = generate_invalid_narrations(load_json_data(SCENE_FILE_PATH))
+    with open(INVALID_NARRATION_FILE_PATH, "w", encoding="utf-8") as f:
+        json.dump(narrations, f, ensure_ascii=False, indent=2)
+    print(f"씬 비트 {len(narrations)}개의 내레이션 저장 완료")
@@ -0,0 +1,162 @@
+"""LLM response cache.
+
+같은 상황에서 같은 프롬프트가 반복되면 (씬 시작 내레이션, 같은 비트에서의 잘못된 입력 등)
+모델을 다시 호출하지 않고 저장된 응답을 반환합니다.
+
+- 정확 일치 계층: 프롬프트 + 모델 설정의 해시로 조회
+- 유사도 계층(선택): 프롬프트 임베딩의 코사인 유사도가 임계값 이상인 응답을 재사용
+
+노드마다 CACHE_POLICIES로 계층 사용 여부와 유효 시간을 정하고, 모델 생성 시
+cache=get_llm_cache("노드 이름")으로 연결합니다.
+"""
+
+import threading
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from disk_cache import DiskLRUCache, make_key
+from ttl_cache import TTLCache
+
+
+class CachePolicy(NamedTuple):
+    exact: bool = True  # 정확 일치 계층 사용
+    semantic: bool = False  # 유사도 계층 사용
+    threshold: float = 0.97  # 유사도 계층의 최소 코사인 유사도
+    ttl: Optional[float] = None  # 항목 유효 시간 (초). None이면 LRU로만 제거
+
+
+# 노드별 캐시 정책
+CACHE_POLICIES: Dict[str, CachePolicy] = {
+    # 이야기는 정확히 같은 상황(프롬프트)일 때만 재사용
+    "story_generation": CachePolicy(exact=True, semantic=False, ttl=7 * 24 * 3600),
+    # 액션 매칭/맵 분석 프롬프트는 대부분 고정 텍스트이고 짧은 입력이나 위치만 달라서
+    # 프롬프트 전체 임베딩은 다른 입력("pass"와 "help")도 비슷하다고 판단함.
+    # 잘못된 전환이나 다른 위치의 분석을 재사용하지 않도록 정확 일치만 사용
+    "action_matcher": CachePolicy(exact=True, semantic=False),
+    "map_analyst": CachePolicy(exact=True, semantic=False, ttl=24 * 3600),
+    # 같은 문장에서 추출한 엔티티/관계는 항상 같음
+    "ere_extraction": CachePolicy(exact=True, semantic=False),
+}
+
+_store: Optional[DiskLRUCache] = None
+_caches: Dict[str, "LLMResponseCache"] = {}
+_lock = threading.Lock()
+
+
+class LLMResponseCache(BaseCache):
+    """노드 하나의 정책을 적용하는 LangChain 캐시
+
+    LangChain은 lookup(prompt, llm_string)으로 먼저 조회하고, 실패하면 모델을
+    호출한 뒤 update로 결과를 저장합니다. llm_string에는 모델 이름과 temperature 등
+    설정이 들어 있으므로 설정이 다른 모델끼리는 응답을 공유하지 않습니다.
+    """
+
+    def __init__(
+        self,
+        node: str,
+        store: DiskLRUCache,
+        policy: Optional[CachePolicy] = None,
+        embeddings=None,
+    ):
+        """
+        Args:
+            node: 노드 이름 (캐시 namespace)
+            store: 디스크 캐시 저장소
+            policy: 캐시 정책. 없으면 CACHE_POLICIES[node] 또는 기본 정책
+            embeddings: 유사도 계층에 사용할 임베딩 (embed_query 제공)
+        """
+        self.node = node
+        self.store = store
+        self.policy = policy or CACHE_POLICIES.get(node, CachePolicy())
+        self._embeddings = embeddings
+        # 조회 실패 직후 update에서 같은 프롬프트를 다시 임베딩하지 않도록 보관
+        self._recent_embeddings = TTLCache(maxsize=256, ttl=120.0)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.policy.exact:
+            cached = self.store.get(self._key(prompt, llm_string))
+            if cached is not None:
+                return self._load(cached)
+
+        if self.policy.semantic:
+            embedding = self._embed(prompt)
+            if embedding is None:
+                return None
+            match = self.store.find_similar(
+                self._namespace(llm_string), embedding, self.policy.threshold
+            )
+            if match is not None:
+                cached = self.store.get(match[0])
+                if cached is not None:
+                    return self._load(cached)
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if not (self.policy.exact or self.policy.semantic):
+            return
+        embedding = self._embed(prompt) if self.policy.semantic else None
+        try:
+            value = dumps([generation for generation in return_val])
+        except Exception as e:
+            print(f"LLM 캐시 저장 실패 ({self.node}): {e}")
+            return
+        self.store.set(
+            self._key(prompt, llm_string),
+            value,
+            namespace=self._namespace(llm_string),
+            embedding=embedding,
+            ttl=self.policy.ttl,
+        )
+
+    def clear(self, **kwargs: Any) -> None:
+        """이 노드의 항목만 비웁니다."""
+        self.store.clear(prefix=f"{self.node}:")
+
+    def _namespace(self, llm_string: str) -> str:
+        return f"{self.node}:{make_key(llm_string)[:16]}"
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        return make_key(self.node, llm_string, prompt)
+
+    def _embed(self, prompt: str):
+        prompt_key = make_key(prompt)
+        embedding = self._recent_embeddings.get(prompt_key)
+        if embedding is not None:
+            return embedding
+        try:
+            if self._embeddings is None:
+                from embedding_dispatcher import get_embedding_dispatcher
+
+                self._embeddings = get_embedding_dispatcher()
+            embedding = self._embeddings.embed_query(prompt)
+            self._recent_embeddings.set(prompt_key, embedding)
+            return embedding
+        except Exception as e:
+            # 임베딩 실패 시 유사도 계층만 건너뜀
+            print(f"LLM 캐시 임베딩 실패 ({self.node}): {e}")
+            return None
+
+    @staticmethod
+    def _load(value: str) -> Optional[Sequence[Any]]:
+        try:
+            return loads(value)
+        except Exception as e:
+            print(f"LLM 캐시 항목 복원 실패: {e}")
+            return None
+
+
+def get_llm_cache(node: str) -> Optional[LLMResponseCache]:
+    """노드용 LLM 캐시를 반환합니다. 캐시가 꺼져 있으면 None (모델 기본 동작)."""
+    global _store
+    from config import LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH
+
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _lock:
+        if _store is None:
+            _store = DiskLRUCache(LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES)
+        if node not in _caches:
+            _caches[node] = LLMResponseCache(node, _store)
+        return _caches[node]
@@ -1,5 +1,28 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Optional, Hashable
+import hashlib
 import json
+from ttl_cache import TTLCache
+
+# 맵 분석 결과 캐시 (세션 간 공유). 맵이 정적이므로 같은 위치/방향/진행 단계면 재사용
+map_analysis_cache = TTLCache(maxsize=512, ttl=900.0)
+
+
+def map_analysis_key(
+    map_id: Any,
+    position: Any,
+    direction: Optional[str],
+    scene_beat: Optional[str] = None,
+    last_action: Optional[str] = None,
+) -> Hashable:
+    """(맵 ID, 플레이어 위치, 방향, 씬 비트, 마지막 액션)으로 맵 분석 캐시 키를 만듭니다.
+
+    생성된 이야기(history)는 매 턴 바뀌므로 키에 넣지 않고, 진행 상태를 나타내는
+    구조화된 값만 사용합니다. 같은 세션에서 이동하지 않은 턴은 캐시가 적중합니다.
+    """
+    if isinstance(position, dict):
+        position = tuple(sorted(position.items()))
+    map_hash = hashlib.sha256(str(map_id).encode("utf-8")).hexdigest()[:16]
+    return (map_hash, str(position), direction, scene_beat or "", last_action or "")
 
 
 class MapAgent:
@@ -52,7 +75,10 @@ class MapAgent:
             return None
 
         try:
-            locations = json.loads(self.current_map.get("locations_json", "[]"))
+            # 씬 번들에서 로드한 맵은 파싱된 locations를 가지고 있음
+            locations = self.current_map.get("locations")
+            if locations is None:
+                locations = json.loads(self.current_map.get("locations_json", "[]"))
             return next((loc for loc in locations if loc["id"] == location_id), None)
         except json.JSONDecodeError:
             return None
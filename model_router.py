@@ -0,0 +1,339 @@
+"""Per-stage model cascade routing.
+
+단계마다 싼/빠른 모델부터 강한 모델까지 순서대로 놓은 캐스케이드를 두고, 요청마다
+입력 길이, 응답 캐시 상태, 지난 신뢰도, 모델별 대기 호출 수를 보고 시작 모델을 고릅니다.
+응답의 신뢰도가 낮으면 다음 모델로 한 번 더 호출(승격)합니다. 쉬운 턴은 작은 모델로
+빠르게 끝나고 어려운 턴만 강한 모델을 씁니다.
+
+모델별 호출 수, 지연 시간, 추정 비용은 telemetry 카운터(router.*)로 발행합니다.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import telemetry
+from clients import get_model_limiter
+from token_counter import count_tokens
+from ttl_cache import TTLCache
+
+
+class ModelTier(NamedTuple):
+    model: str
+    provider: str  # "openai" | "gemini"
+    input_cost: float  # USD / 1M 입력 토큰
+    output_cost: float  # USD / 1M 출력 토큰
+
+
+MODEL_TIERS: Dict[str, ModelTier] = {
+    "gpt-4o-mini": ModelTier("gpt-4o-mini", "openai", 0.15, 0.60),
+    "gpt-4o": ModelTier("gpt-4o", "openai", 2.50, 10.00),
+    "gemini-2.0-flash": ModelTier("gemini-2.0-flash", "gemini", 0.10, 0.40),
+    "gemini-2.0-pro-exp-02-05": ModelTier(
+        "gemini-2.0-pro-exp-02-05", "gemini", 1.25, 10.00
+    ),
+}
+
+
+class StageRoute(NamedTuple):
+    cascade: Tuple[str, ...]  # 싼 모델 -> 강한 모델 순서
+    max_easy_tokens: int  # 입력이 이보다 길면 한 단계 강한 모델로 시작
+    min_confidence: float = 0.5  # 응답 신뢰도가 이보다 낮으면 다음 모델로 승격
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    cache_node: Optional[str] = None  # llm_cache.CACHE_POLICIES 이름
+    hedge: bool = True  # 늦은 요청을 중복으로 보낼지 (hedging.HedgePolicy.hedge)
+
+
+STAGE_ROUTES: Dict[str, StageRoute] = {
+    "action_match": StageRoute(
+        ("gpt-4o-mini", "gpt-4o"), 1500, temperature=0, cache_node="action_matcher"
+    ),
+    # 스트리밍 중에는 승격할 수 없으므로 빈 응답일 때만 승격
+    # 긴 이야기는 보통 중복 요청 대기 시간보다 오래 걸리므로 중복 요청하지 않음
+    "story_generation": StageRoute(
+        ("gpt-4o-mini", "gpt-4o"),
+        6000,
+        temperature=0.7,
+        max_tokens=2048,
+        cache_node="story_generation",
+        hedge=False,
+    ),
+    "map_analysis": StageRoute(
+        ("gemini-2.0-flash", "gemini-2.0-pro-exp-02-05"),
+        3000,
+        temperature=0.5,
+        cache_node="map_analyst",
+    ),
+}
+
+# 지난 신뢰도(지수 이동 평균)가 이보다 낮으면 작은 모델을 건너뜀
+MIN_SUCCESS_RATE = 0.7
+MIN_CONFIDENCE_SAMPLES = 10
+CONFIDENCE_DECAY = 0.9
+# 건너뛴 모델에도 이 횟수마다 한 번씩 요청을 보내 신뢰도가 회복될 수 있게 함
+# (호출한 모델만 기록되므로, 보내지 않으면 한 번 낮아진 평균이 그대로 남음)
+PROBE_INTERVAL = 20
+
+
+def prompt_text(value: Any) -> str:
+    """모델 입력(문자열, 메시지 목록, PromptValue)을 하나의 문자열로 만듭니다."""
+    if isinstance(value, str):
+        return value
+    if hasattr(value, "to_string"):
+        return value.to_string()
+    if isinstance(value, (list, tuple)):
+        parts = []
+        for message in value:
+            if isinstance(message, dict):
+                parts.append(str(message.get("content", "")))
+            else:
+                parts.append(str(getattr(message, "content", message)))
+        return "\n".join(parts)
+    return str(value)
+
+
+def response_text(value: Any) -> str:
+    return value if isinstance(value, str) else str(getattr(value, "content", value))
+
+
+class ModelRouter:
+    """단계별 캐스케이드에서 모델을 고르고 결과를 기록합니다.
+
+    Args:
+        routes: 단계 이름 -> StageRoute
+        limiter: 모델 이름 -> ModelLimiter (큐 깊이 확인용)
+    """
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, StageRoute]] = None,
+        limiter: Callable[[str], Any] = get_model_limiter,
+    ):
+        self.routes = routes or STAGE_ROUTES
+        self._limiter = limiter
+        self._confidence: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self._skipped: Dict[Tuple[str, str], int] = {}
+        # 같은 프롬프트를 처리한 모델 (그 모델로 보내면 응답 캐시가 적중)
+        self._served = TTLCache(maxsize=4096, ttl=24 * 3600)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _prompt_key(stage: str, text: str) -> str:
+        return hashlib.sha256(f"{stage}\0{text}".encode("utf-8")).hexdigest()
+
+    def success_rate(self, stage: str, model: str) -> Optional[float]:
+        """단계/모델의 지난 신뢰도 평균. 표본이 부족하면 None"""
+        with self._lock:
+            rate, samples = self._confidence.get((stage, model), (1.0, 0))
+        return rate if samples >= MIN_CONFIDENCE_SAMPLES else None
+
+    def _probe(self, stage: str, model: str) -> bool:
+        """신뢰도가 낮아 건너뛰는 모델에 이번 요청을 보내 볼지 여부"""
+        with self._lock:
+            skipped = self._skipped.get((stage, model), 0) + 1
+            self._skipped[(stage, model)] = skipped
+        return skipped % PROBE_INTERVAL == 0
+
+    def choose(self, stage: str, text: str) -> Tuple[str, str]:
+        """(모델, 선택 이유)를 반환합니다."""
+        cascade = self.routes[stage].cascade
+        cached = self._served.get(self._prompt_key(stage, text))
+        if cached in cascade:
+            return cached, "cache"
+
+        index, reason = 0, "default"
+        if count_tokens(text) > self.routes[stage].max_easy_tokens:
+            index, reason = 1, "length"
+        while index < len(cascade) - 1:
+            rate = self.success_rate(stage, cascade[index])
+            if rate is None or rate >= MIN_SUCCESS_RATE:
+                break
+            if self._probe(stage, cascade[index]):
+                reason = "probe"
+                break
+            index, reason = index + 1, "confidence"
+
+        # 고른 모델이 밀려 있으면 여유 있는 (같거나 강한) 모델로 보냄
+        if self._limiter(cascade[index]).saturated:
+            for candidate in cascade[index + 1 :]:
+                if not self._limiter(candidate).saturated:
+                    return candidate, "queue"
+        return cascade[index], reason
+
+    def next_model(self, stage: str, model: str) -> Optional[str]:
+        """승격할 다음 모델. 마지막 모델이면 None"""
+        cascade = self.routes[stage].cascade
+        if model not in cascade:
+            return None
+        index = cascade.index(model)
+        return cascade[index + 1] if index + 1 < len(cascade) else None
+
+    def record(
+        self,
+        stage: str,
+        model: str,
+        text: str,
+        result: Any,
+        latency: float,
+        confidence: float,
+    ) -> None:
+        """호출 결과를 기록합니다. (신뢰도 평균, 캐시 상태, 모델별 카운터)"""
+        with self._lock:
+            rate, samples = self._confidence.get((stage, model), (1.0, 0))
+            rate = rate * CONFIDENCE_DECAY + confidence * (1 - CONFIDENCE_DECAY)
+            self._confidence[(stage, model)] = (rate, samples + 1)
+        if confidence >= self.routes[stage].min_confidence:
+            self._served.set(self._prompt_key(stage, text), model)
+
+        usage = getattr(result, "usage_metadata", None) or {}
+        input_tokens = usage.get("input_tokens") or count_tokens(text)
+        output_tokens = usage.get("output_tokens") or count_tokens(
+            response_text(result)
+        )
+        tier = MODEL_TIERS.get(model)
+        cost = 0.0
+        if tier is not None:
+            cost = input_tokens * tier.input_cost + output_tokens * tier.output_cost
+            cost /= 1e6
+
+        prefix = f"router.model.{model}"
+        telemetry.increment(f"{prefix}.calls")
+        telemetry.increment(f"{prefix}.latency_ms", int(latency * 1000))
+        telemetry.increment(f"{prefix}.input_tokens", input_tokens)
+        telemetry.increment(f"{prefix}.output_tokens", output_tokens)
+        # 카운터는 정수이므로 마이크로 달러 단위로 누적
+        telemetry.increment(f"{prefix}.cost_micro_usd", int(round(cost * 1e6)))
+
+
+def router_stats() -> Dict[str, Dict[str, float]]:
+    """모델별 호출 수, 평균 지연 시간(ms), 누적 비용(USD)"""
+    counters = telemetry.snapshot()["counters"]
+    stats: Dict[str, Dict[str, float]] = {}
+    for name, value in counters.items():
+        if not name.startswith("router.model."):
+            continue
+        model, _, key = name[len("router.model.") :].rpartition(".")
+        stats.setdefault(model, {})[key] = value
+    for values in stats.values():
+        calls = values.get("calls", 0)
+        values["avg_latency_ms"] = (
+            values.get("latency_ms", 0) / calls if calls else 0.0
+        )
+        values["cost_usd"] = values.get("cost_micro_usd", 0) / 1e6
+    return stats
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+_stage_models: Dict[Tuple[str, str], Any] = {}
+
+
+def get_model_router() -> ModelRouter:
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+        return _router
+
+
+def get_stage_model(stage: str, model: str):
+    """단계 설정으로 만든 모델 (동시 호출 제한, 재시도/중복 요청 포함)"""
+    with _router_lock:
+        runnable = _stage_models.get((stage, model))
+        if runnable is not None:
+            return runnable
+
+    from clients import get_chat_model, get_gemini_chat_model, limit_concurrency
+    from hedging import default_policy, hedged
+
+    route = STAGE_ROUTES[stage]
+    if MODEL_TIERS[model].provider == "gemini":
+        client = get_gemini_chat_model(
+            model, temperature=route.temperature, cache_node=route.cache_node
+        )
+    else:
+        client = get_chat_model(
+            model,
+            temperature=route.temperature,
+            max_tokens=route.max_tokens,
+            cache_node=route.cache_node,
+        )
+    runnable = hedged(
+        limit_concurrency(client, model),
+        f"{stage}:{model}",
+        default_policy(hedge=route.hedge),
+    )
+    with _router_lock:
+        return _stage_models.setdefault((stage, model), runnable)
+
+
+def routed(
+    stage: str,
+    confidence: Optional[Callable[[str], float]] = None,
+    router: Optional[ModelRouter] = None,
+):
+    """단계의 캐스케이드에서 요청마다 모델을 골라 호출하는 runnable을 만듭니다.
+
+    Args:
+        stage: STAGE_ROUTES의 단계 이름
+        confidence: 응답 텍스트 -> 신뢰도(0~1). 없으면 빈 응답만 신뢰도 0
+        router: 사용할 ModelRouter (기본값 프로세스 전역 라우터)
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    def score(result) -> float:
+        text = response_text(result)
+        if not text.strip():
+            return 0.0
+        return confidence(text) if confidence else 1.0
+
+    def plan(value):
+        active = router or get_model_router()
+        text = prompt_text(value)
+        model, reason = active.choose(stage, text)
+        telemetry.increment(f"router.{stage}.{reason}")
+        return active, text, model
+
+    def invoke(value, config):
+        active, text, model = plan(value)
+        while True:
+            started = time.monotonic()
+            result = get_stage_model(stage, model).invoke(value, config)
+            confident = score(result)
+            latency = time.monotonic() - started
+            active.record(stage, model, text, result, latency, confident)
+            escalated = active.next_model(stage, model)
+            if confident >= active.routes[stage].min_confidence or escalated is None:
+                return result
+            telemetry.increment(f"router.{stage}.escalated")
+            model = escalated
+
+    async def ainvoke(value, config):
+        active, text, model = plan(value)
+        while True:
+            started = time.monotonic()
+            result = await get_stage_model(stage, model).ainvoke(value, config)
+            confident = score(result)
+            latency = time.monotonic() - started
+            active.record(stage, model, text, result, latency, confident)
+            escalated = active.next_model(stage, model)
+            if confident >= active.routes[stage].min_confidence or escalated is None:
+                return result
+            telemetry.increment(f"router.{stage}.escalated")
+            model = escalated
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=f"routed:{stage}")
+
+
+def short_answer_confidence(text: str, max_chars: int = 60) -> float:
+    """한 줄짜리 짧은 답을 기대하는 단계(액션 매칭)의 신뢰도"""
+    answer = text.strip()
+    return 1.0 if "\n" not in answer and len(answer) <= max_chars else 0.0
+
+
+def map_analysis_confidence(text: str) -> float:
+    """맵 분석 응답이 필요한 섹션을 갖추었는지로 본 신뢰도"""
+    required = ("Visible Area", "Map Analysis")
+    return sum(section in text for section in required) / len(required)
@@ -5,6 +5,9 @@ from states import PlayerState
 from character import Character
 from neo4j import GraphDatabase
 from db_interface import DBInterface  # DBManager 대신 DBInterface 사용
+from map_agent import map_analysis_cache, map_analysis_key
+from history_manager import trim_history
+from turn_budget import should_skip
 
 
 class BaseNode(ABC):
@@ -53,17 +56,37 @@ class AnalyseMapNode(BaseNode):
         self.map_analyst = map_analyst
 
     def execute(self, state: PlayerState) -> PlayerState:
-        # LangChain 지도 분석 체인을 호출하여 분석 결과를 저장
-        analysis = self.map_analyst.invoke(
-            {
-                "current_map": state["map"],
-                "player_position": state["player"]["position"],
-                "history": state["history"],
-            }
-        )
+        # 같은 맵/위치/방향/진행 단계면 캐시된 분석 결과를 사용 (LLM 호출 생략)
+        cache_key = self._cache_key(state)
+        analysis = map_analysis_cache.get(cache_key)
+        if analysis is None and should_skip(state, "analyse_map"):
+            # 턴 예산이 부족하면 이전 분석 결과를 그대로 사용
+            return state
+        if analysis is None:
+            # LangChain 지도 분석 체인을 호출하여 분석 결과를 저장
+            analysis = self.map_analyst.invoke(self._inputs(state))
+            map_analysis_cache.set(cache_key, analysis)
         state["map_context"] = analysis
         return state
 
+    @staticmethod
+    def _cache_key(state: PlayerState) -> str:
+        return map_analysis_key(
+            state["map"],
+            state["player"]["position"],
+            state["player"].get("direction"),
+            state.get("scene_beat"),
+            state.get("matched_action"),
+        )
+
+    @staticmethod
+    def _inputs(state: PlayerState) -> dict:
+        return {
+            "current_map": state["map"],
+            "player_position": state["player"]["position"],
+            "history": trim_history(state["history"]),
+        }
+
 
 class MakeStoryNode(BaseNode):
     def __init__(self, story_chain, **kwargs):
@@ -72,16 +95,18 @@ class MakeStoryNode(BaseNode):
 
     def execute(self, state: PlayerState) -> PlayerState:
         # LangChain 이야기 생성 체인을 호출하여 이야기를 생성
-        story = self.story_chain.invoke(
-            {
-                "map_context": state["map_context"],
-                "history": state["history"],
-                "name": state["player"].get("name", "모험가"),
-            }
-        )
+        story = self.story_chain.invoke(self._inputs(state))
         state["generation"] = story
         return state
 
+    @staticmethod
+    def _inputs(state: PlayerState) -> dict:
+        return {
+            "map_context": state["map_context"],
+            "history": trim_history(state["history"]),
+            "name": state["player"].get("name", "모험가"),
+        }
+
 
 class RouteMovingNode(BaseNode):
     def execute(self, state: PlayerState) -> str:
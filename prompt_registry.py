@@ -0,0 +1,197 @@
+"""Prompt registry.
+
+모든 프롬프트 템플릿을 프로세스에서 한 번만 읽고 컴파일합니다.
+
+- 템플릿은 섹션 단위로 나누고, 변수가 없는 정적 섹션을 앞에, 변수가 있는 동적 섹션을
+  뒤에 둡니다. 정적 접두사가 매 요청 같으므로 제공자 쪽 프롬프트 캐시가 적중합니다.
+- 버전은 템플릿 내용의 해시이므로 템플릿이 바뀌면 버전도 바뀝니다.
+- 섹션별 정적 토큰 수는 컴파일할 때, 동적 토큰 수는 렌더링할 때마다 기록하며
+  prompt_metrics()로 확인할 수 있습니다.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from string import Formatter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from token_counter import count_tokens
+
+PROMPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+
+# 마크다운 최상위 제목("# ...")에서 섹션을 나눔
+_TOP_LEVEL_HEADING = re.compile(r"^# ", re.MULTILINE)
+_FENCE = re.compile(r"^\s*```", re.MULTILINE)
+
+
+def _fields(template: str) -> List[str]:
+    return [field for _, field, _, _ in Formatter().parse(template) if field]
+
+
+class CompiledPrompt:
+    """섹션 단위로 컴파일된 프롬프트
+
+    Args:
+        name: 프롬프트 이름
+        sections: (섹션 이름, str.format 템플릿) 목록
+        reorder: True이면 정적 섹션을 동적 섹션보다 앞에 배치
+    """
+
+    def __init__(
+        self, name: str, sections: Sequence[Tuple[str, str]], reorder: bool = True
+    ):
+        self.name = name
+        self.version = hashlib.sha256(
+            "\0".join(f"{key}\0{text}" for key, text in sections).encode("utf-8")
+        ).hexdigest()[:12]
+
+        compiled = [(key, text, _fields(text)) for key, text in sections]
+        if reorder:
+            compiled.sort(key=lambda section: bool(section[2]))  # 안정 정렬
+        self._sections = compiled
+        self.input_variables = sorted({f for _, _, fields in compiled for f in fields})
+
+        # 정적 섹션은 미리 렌더링 ({{ }} 이스케이프 해제)
+        self._rendered = [
+            None if fields else text.format() for _, text, fields in compiled
+        ]
+        self._prefix_len = 0
+        while self._prefix_len < len(compiled) and not compiled[self._prefix_len][2]:
+            self._prefix_len += 1
+        self.static_prefix = "".join(self._rendered[: self._prefix_len])
+
+        self._section_metrics: Dict[str, Dict[str, Any]] = {}
+        for rendered, (key, _, fields) in zip(self._rendered, compiled):
+            if fields:
+                self._section_metrics[key] = {
+                    "static": False,
+                    "renders": 0,
+                    "tokens_total": 0,
+                    "tokens_last": 0,
+                }
+            else:
+                self._section_metrics[key] = {
+                    "static": True,
+                    "tokens": count_tokens(rendered),
+                }
+        self.static_tokens = sum(
+            m["tokens"] for m in self._section_metrics.values() if m["static"]
+        )
+        self._lock = threading.Lock()
+
+    def format(self, **kwargs: Any) -> str:
+        """변수를 채운 프롬프트 문자열을 반환하고 동적 토큰 수를 기록합니다."""
+        parts = [self.static_prefix]
+        dynamic_tokens = []
+        for index in range(self._prefix_len, len(self._sections)):
+            key, text, fields = self._sections[index]
+            rendered = self._rendered[index]
+            if fields:
+                rendered = text.format(**{f: kwargs.get(f, "") for f in fields})
+                dynamic_tokens.append((key, count_tokens(rendered)))
+            parts.append(rendered)
+
+        with self._lock:
+            for key, tokens in dynamic_tokens:
+                metrics = self._section_metrics[key]
+                metrics["renders"] += 1
+                metrics["tokens_total"] += tokens
+                metrics["tokens_last"] = tokens
+        return "".join(parts)
+
+    def __call__(self, inputs: Dict[str, Any]) -> str:
+        """체인에서 사용: 입력 딕셔너리로 format을 호출합니다."""
+        return self.format(**inputs)
+
+    def metrics(self) -> Dict[str, Any]:
+        """버전, 정적 토큰 수, 섹션별 토큰 통계"""
+        with self._lock:
+            sections = {key: dict(m) for key, m in self._section_metrics.items()}
+        dynamic_last = sum(m.get("tokens_last", 0) for m in sections.values())
+        return {
+            "version": self.version,
+            "static_tokens": self.static_tokens,
+            "dynamic_tokens_last": dynamic_last,
+            "sections": sections,
+        }
+
+
+def _outside_fences(template: str, positions: List[int]) -> List[int]:
+    """코드 블록(```) 안에 있지 않은 위치만 남깁니다."""
+    fences = [m.start() for m in _FENCE.finditer(template)]
+    return [
+        position
+        for position in positions
+        if sum(fence < position for fence in fences) % 2 == 0
+    ]
+
+
+def split_markdown_sections(template: str) -> List[Tuple[str, str]]:
+    """마크다운 템플릿을 최상위 제목 단위 섹션으로 나눕니다. (코드 블록 안의 제목 제외)"""
+    starts = _outside_fences(
+        template, [m.start() for m in _TOP_LEVEL_HEADING.finditer(template)]
+    )
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    sections = []
+    for index, start in enumerate(starts):
+        end = starts[index + 1] if index + 1 < len(starts) else len(template)
+        chunk = template[start:end]
+        if not chunk.strip():
+            continue
+        title = chunk.strip().splitlines()[0].lstrip("# ").strip() or f"section{index}"
+        if not chunk.endswith("\n"):
+            chunk += "\n"
+        sections.append((title, chunk))
+    return sections
+
+
+_prompts: Dict[str, CompiledPrompt] = {}
+_lock = threading.Lock()
+
+
+def register_prompt(
+    name: str, sections: Sequence[Tuple[str, str]], reorder: bool = True
+) -> CompiledPrompt:
+    """프롬프트를 컴파일해 등록합니다. 같은 내용이 이미 등록되어 있으면 그것을 반환합니다."""
+    prompt = CompiledPrompt(name, sections, reorder)
+    with _lock:
+        existing = _prompts.get(name)
+        if existing is not None and existing.version == prompt.version:
+            return existing
+        _prompts[name] = prompt
+        return prompt
+
+
+def load_prompt_file(name: str, path: str, reorder: bool = True) -> CompiledPrompt:
+    """LangChain 형식의 YAML 프롬프트 파일을 한 번만 읽어 등록합니다.
+
+    Args:
+        name: 등록할 프롬프트 이름
+        path: YAML 파일 경로 (상대 경로는 prompts 디렉터리 기준)
+        reorder: False이면 섹션을 파일 순서대로 둠 (입력 위치가 구조상 정해진 프롬프트)
+    """
+    with _lock:
+        if name in _prompts:
+            return _prompts[name]
+
+    import yaml
+
+    if not os.path.isabs(path):
+        path = os.path.join(PROMPT_DIR, path)
+    with open(path, "r", encoding="utf-8") as f:
+        template = yaml.safe_load(f)["template"]
+    return register_prompt(name, split_markdown_sections(template), reorder)
+
+
+def get_prompt(name: str) -> Optional[CompiledPrompt]:
+    with _lock:
+        return _prompts.get(name)
+
+
+def prompt_metrics() -> Dict[str, Dict[str, Any]]:
+    """등록된 모든 프롬프트의 토큰 통계"""
+    with _lock:
+        prompts = list(_prompts.values())
+    return {prompt.name: prompt.metrics() for prompt in prompts}
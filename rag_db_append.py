@@ -2,7 +2,7 @@ import os
 import json
 from typing import List, Dict, Any
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
+from clients import get_embeddings
 from langchain_community.vectorstores import Neo4jVector
 from langchain_neo4j import Neo4jGraph
 import config
@@ -18,7 +18,7 @@ class RAGDBManager:
     def __init__(self):
         """초기화 및 Neo4j 연결 설정"""
         load_dotenv()
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        self.embeddings = get_embeddings("text-embedding-3-small")
         self.graph = Neo4jGraph(
             url=config.NEO4J_URI,
             username=config.NEO4J_USER,
@@ -0,0 +1,202 @@
+"""Scene bundle materialization.
+
+씬 하나를 불러오는 데 필요한 데이터(씬 속성, 씬 비트, 조건, 위치가 파싱된 맵,
+등장 캐릭터)를 하나의 JSON 문서로 미리 만들어 Scene 노드의 bundle 속성에 저장합니다.
+씬 로드는 한 번의 조회와 한 번의 json.loads로 끝납니다.
+"""
+
+import copy
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from world_version import current_world_version
+
+PLAYER_CHARACTER_ID = "character:Player"
+
+# 프로세스 내부 번들 캐시 (월드 버전별)
+_bundles: Dict[str, Dict[str, Any]] = {}
+_bundles_version: Optional[str] = None
+_bundles_lock = threading.Lock()
+
+
+def _parse_json_value(value: Any) -> Any:
+    """JSON 문자열로 저장된 값을 파싱합니다."""
+    if isinstance(value, str) and (value.startswith("{") or value.startswith("[")):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return value
+    return value
+
+
+def _build_map(map_data: Dict[str, Any]) -> Dict[str, Any]:
+    """MapAgent가 그대로 사용할 수 있는 형태로 맵 데이터를 변환합니다."""
+    locations = _parse_json_value(map_data.get("locations", []))
+    if not isinstance(locations, list):
+        locations = []
+    return {
+        "id": map_data.get("id"),
+        "name": map_data.get("name"),
+        "description": map_data.get("description"),
+        "context": map_data.get("context"),
+        "map_data": str(map_data.get("map_data", "")),
+        "locations": locations,
+        "locations_json": json.dumps(locations),
+    }
+
+
+def build_scene_bundle(
+    scene_data: Dict[str, Any],
+    maps_by_id: Dict[str, Dict[str, Any]],
+    characters: List[Dict[str, Any]],
+    version: Optional[str] = None,
+) -> Dict[str, Any]:
+    """씬 하나의 번들 문서를 생성합니다.
+
+    Args:
+        scene_data: initial_scenes.json 형식의 씬 데이터
+        maps_by_id: 맵 ID를 키로 하는 맵 데이터
+        characters: 캐릭터 데이터 목록
+        version: 월드 버전
+
+    Returns:
+        씬 속성, 씬 비트, 조건, 맵, 등장 캐릭터를 담은 딕셔너리
+    """
+    scene = {
+        key: _parse_json_value(value)
+        for key, value in scene_data.items()
+        if key != "scene_beats"
+    }
+    beats = [
+        {key: _parse_json_value(value) for key, value in beat.items()}
+        for beat in scene_data.get("scene_beats", [])
+    ]
+    conditions = {beat["id"]: beat.get("conditions", {}) for beat in beats}
+
+    map_data = maps_by_id.get(scene.get("map"))
+
+    # 씬/비트에 명시된 캐릭터 (플레이어는 세션마다 따로 만들므로 제외)
+    character_ids = []
+    for item in [scene, *beats]:
+        for character_id in item.get("characters", []) or []:
+            if character_id == PLAYER_CHARACTER_ID or character_id in character_ids:
+                continue
+            character_ids.append(character_id)
+    characters_by_id = {c.get("id"): c for c in characters}
+    present = [characters_by_id[c] for c in character_ids if c in characters_by_id]
+
+    return {
+        "id": scene["id"],
+        "version": version,
+        "scene": scene,
+        "beats": beats,
+        "conditions": conditions,
+        "map": _build_map(map_data) if map_data else None,
+        "characters": present,
+    }
+
+
+def build_scene_bundles(
+    scenes: List[Dict[str, Any]],
+    maps: List[Dict[str, Any]],
+    characters: List[Dict[str, Any]],
+    version: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """모든 씬의 번들을 생성합니다. (scenebeat: 항목은 씬이 아니므로 제외)"""
+    maps_by_id = {m["id"]: m for m in maps if isinstance(m, dict)}
+    return {
+        scene_data["id"]: build_scene_bundle(scene_data, maps_by_id, characters, version)
+        for scene_data in scenes
+        if isinstance(scene_data, dict) and scene_data["id"].startswith("scene:")
+    }
+
+
+def materialize_scene_bundles(
+    db_manager,
+    scenes: List[Dict[str, Any]],
+    maps: List[Dict[str, Any]],
+    characters: List[Dict[str, Any]],
+    version: Optional[str] = None,
+) -> int:
+    """씬 번들을 생성하여 Scene 노드의 bundle 속성에 저장합니다.
+
+    Returns:
+        저장한 번들 수
+    """
+    bundles = build_scene_bundles(scenes, maps, characters, version)
+    rows = [
+        {"id": scene_id, "bundle": json.dumps(bundle, ensure_ascii=False)}
+        for scene_id, bundle in bundles.items()
+    ]
+    query = """
+    UNWIND $rows AS row
+    MATCH (s:Scene {id: row.id})
+    SET s.bundle = row.bundle
+    """
+    db_manager.query(query=query, params={"rows": rows})
+    invalidate_scene_bundles()
+    return len(rows)
+
+
+def load_scene_bundle(db_manager, scene_id: str) -> Optional[Dict[str, Any]]:
+    """씬 번들을 한 번의 조회로 불러옵니다. 같은 월드 버전 안에서는 캐시를 사용합니다.
+
+    캐시는 모든 세션이 공유하므로 호출한 쪽이 수정해도 되는 복사본을 반환합니다.
+    """
+    global _bundles_version
+    version = current_world_version(db_manager)
+
+    with _bundles_lock:
+        if _bundles_version != version:
+            _bundles.clear()
+            _bundles_version = version
+        bundle = _bundles.get(scene_id)
+    if bundle is not None:
+        return copy.deepcopy(bundle)
+
+    query = """
+    MATCH (s:Scene {id: $scene_id})
+    RETURN s.bundle AS bundle
+    """
+    try:
+        result = db_manager.query(query=query, params={"scene_id": scene_id})
+    except Exception as e:
+        print(f"Error loading scene bundle: {e}")
+        return None
+    if not result or not result[0]["bundle"]:
+        return None
+
+    bundle = json.loads(result[0]["bundle"])
+    with _bundles_lock:
+        if _bundles_version == version:
+            _bundles[scene_id] = bundle
+    return copy.deepcopy(bundle)
+
+
+def invalidate_scene_bundles() -> None:
+    """프로세스 내부 번들 캐시를 비웁니다."""
+    with _bundles_lock:
+        _bundles.clear()
+
+
+if __name__ == "__main__":
+    # 초기 데이터 파일로 번들을 다시 생성합니다 (db_init 이후 데이터만 바뀐 경우)
+    from db_factory import get_db_manager
+    from db_init import CHARACTER_FILE_PATH, MAP_FILE_PATH, SCENE_FILE_PATH
+    from db_utils import load_json_data
+    from world_version import compute_data_version, fetch_world_version
+
+    db_manager = get_db_manager()
+    try:
+        count = materialize_scene_bundles(
+            db_manager,
+            load_json_data(SCENE_FILE_PATH),
+            load_json_data(MAP_FILE_PATH),
+            load_json_data(CHARACTER_FILE_PATH),
+            version=fetch_world_version(db_manager)
+            or compute_data_version([CHARACTER_FILE_PATH, MAP_FILE_PATH, SCENE_FILE_PATH]),
+        )
+        print(f"씬 번들 {count}개 생성 완료")
+    finally:
+        db_manager.close()
@@ -0,0 +1,258 @@
+"""In-memory compiled scene graph.
+
+플레이 중에는 월드 그래프가 변하지 않으므로, SceneBeat 사이의 CONDITION/NEXT 관계와
+Scene의 TAKES_PLACE_IN 맵 정보를 한 번만 읽어 메모리에 보관합니다.
+씬 전환은 데이터베이스 왕복 없이 딕셔너리 조회로 처리됩니다.
+"""
+
+import copy
+import json
+import os
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from world_version import current_world_version
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCENE_FILE_PATH = os.path.join(SCRIPT_DIR, "data", "initial_data", "initial_scenes.json")
+
+
+class Transition(NamedTuple):
+    """(beat, action) 으로 결정된 다음 위치"""
+
+    beat_id: str
+    scene_id: Optional[str]
+    map_id: Optional[str]
+
+
+class _Beat(NamedTuple):
+    scene_id: Optional[str]
+    conditions: Dict[str, str]
+    next_ids: Tuple[str, ...]
+    available_actions: Tuple[str, ...]
+    properties: Dict[str, Any]
+
+
+def _parse_properties(properties: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """JSON 문자열로 저장된 노드 속성을 파싱합니다."""
+    parsed = {}
+    for key, value in (properties or {}).items():
+        if isinstance(value, str) and value[:1] in ("{", "["):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                pass
+        parsed[key] = value
+    return parsed
+
+
+class SceneGraph:
+    """beat id를 키로 하는 씬 그래프 인접 구조"""
+
+    def __init__(self, version: Optional[str] = None):
+        self.version = version
+        self._beats: Dict[str, _Beat] = {}
+        self._scene_maps: Dict[str, Optional[str]] = {}
+        self._scene_actions: Dict[str, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._beats)
+
+    def __contains__(self, beat_id: str) -> bool:
+        return beat_id in self._beats
+
+    def add_scene(
+        self,
+        scene_id: str,
+        map_id: Optional[str] = None,
+        available_actions: Optional[List[str]] = None,
+    ) -> None:
+        self._scene_maps[scene_id] = map_id
+        self._scene_actions[scene_id] = tuple(available_actions or ())
+
+    def add_beat(
+        self,
+        beat_id: str,
+        scene_id: Optional[str] = None,
+        conditions: Optional[Dict[str, str]] = None,
+        next_ids: Optional[List[str]] = None,
+        available_actions: Optional[List[str]] = None,
+        properties: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self._beats[beat_id] = _Beat(
+            scene_id=scene_id,
+            conditions=dict(conditions or {}),
+            next_ids=tuple(next_ids or ()),
+            available_actions=tuple(available_actions or ()),
+            properties={"id": beat_id, **_parse_properties(properties)},
+        )
+
+    @classmethod
+    def from_scene_data(
+        cls, scenes: List[Dict[str, Any]], version: Optional[str] = None
+    ) -> "SceneGraph":
+        """initial_scenes.json 형식의 데이터로 씬 그래프를 생성합니다."""
+        graph = cls(version=version)
+        for scene_data in scenes:
+            if not isinstance(scene_data, dict):
+                continue
+            if scene_data["id"].startswith("scenebeat:"):
+                # scene_beats 배열 외부의 SceneBeat (db_init과 동일하게 처리)
+                graph.add_beat(
+                    scene_data["id"],
+                    conditions=scene_data.get("conditions"),
+                    available_actions=scene_data.get("available_actions"),
+                    properties=scene_data,
+                )
+                continue
+
+            graph.add_scene(
+                scene_data["id"],
+                map_id=scene_data.get("map"),
+                available_actions=scene_data.get("available_actions"),
+            )
+            for beat in scene_data.get("scene_beats", []):
+                graph.add_beat(
+                    beat["id"],
+                    scene_id=scene_data["id"],
+                    conditions=beat.get("conditions"),
+                    next_ids=beat.get("next_scene_beats"),
+                    available_actions=beat.get("available_actions"),
+                    properties=beat,
+                )
+        return graph
+
+    @classmethod
+    def from_file(
+        cls, file_path: str = SCENE_FILE_PATH, version: Optional[str] = None
+    ) -> "SceneGraph":
+        """씬 JSON 파일에서 씬 그래프를 생성합니다."""
+        with open(file_path, "r", encoding="utf-8") as f:
+            return cls.from_scene_data(json.load(f), version=version)
+
+    @classmethod
+    def from_db(cls, db_manager, version: Optional[str] = None) -> "SceneGraph":
+        """Neo4j에서 씬 그래프를 한 번에 읽어 생성합니다."""
+        graph = cls(version=version)
+
+        scene_query = """
+        MATCH (s:Scene)
+        OPTIONAL MATCH (s)-[:TAKES_PLACE_IN]->(m:Map)
+        RETURN s.id AS scene_id, m.id AS map_id,
+               s.available_actions AS available_actions
+        """
+        for row in db_manager.query(query=scene_query, params={}):
+            graph.add_scene(row["scene_id"], row["map_id"], row["available_actions"])
+
+        beat_query = """
+        MATCH (sb:SceneBeat)
+        OPTIONAL MATCH (sb)-[:PART_OF]->(s:Scene)
+        RETURN sb.id AS beat_id, s.id AS scene_id,
+               sb.available_actions AS available_actions,
+               properties(sb) AS properties,
+               [(sb)-[c:CONDITION]->(t) | {action: c.action, target: t.id}] AS conditions,
+               [(sb)-[:NEXT]->(n:SceneBeat) | n.id] AS next_ids
+        ORDER BY sb.id
+        """
+        for row in db_manager.query(query=beat_query, params={}):
+            graph.add_beat(
+                row["beat_id"],
+                scene_id=row["scene_id"],
+                conditions={c["action"]: c["target"] for c in row["conditions"]},
+                next_ids=row["next_ids"],
+                available_actions=row["available_actions"],
+                properties=row["properties"],
+            )
+        return graph
+
+    def next_beat(self, beat_id: str, action: str = "") -> Optional[str]:
+        """(beat, action)에 해당하는 다음 씬 비트 ID를 반환합니다.
+
+        get_next_scene_beat 쿼리와 같은 규칙을 따릅니다:
+        action이 있으면 CONDITION, 없으면 첫 번째 NEXT 관계를 따르고,
+        둘 다 없으면 None을 반환합니다. (현재 씬 비트에 머묾)
+        """
+        beat = self._beats.get(beat_id)
+        if beat is not None:
+            if action:
+                target = beat.conditions.get(action)
+            else:
+                target = beat.next_ids[0] if beat.next_ids else None
+            # CONDITION이 맵 등 SceneBeat가 아닌 노드를 가리키는 경우는 제외
+            if target in self._beats:
+                return target
+        return None
+
+    def resolve(self, beat_id: str, action: str = "") -> Optional[Transition]:
+        """(beat, action)으로부터 다음 비트, 씬, 맵을 한 번에 결정합니다."""
+        next_beat_id = self.next_beat(beat_id, action)
+        if next_beat_id is None:
+            return None
+        scene_id = self.scene_of(next_beat_id)
+        return Transition(next_beat_id, scene_id, self.map_of(scene_id))
+
+    def scene_of(self, beat_id: str) -> Optional[str]:
+        beat = self._beats.get(beat_id)
+        return beat.scene_id if beat else None
+
+    def map_of(self, scene_id: Optional[str]) -> Optional[str]:
+        return self._scene_maps.get(scene_id) if scene_id else None
+
+    def available_actions(self, scene_or_beat_id: str) -> List[str]:
+        """씬 또는 씬 비트에서 가능한 행동 목록을 반환합니다."""
+        if scene_or_beat_id in self._scene_actions:
+            return list(self._scene_actions[scene_or_beat_id])
+        beat = self._beats.get(scene_or_beat_id)
+        if beat is None:
+            return []
+        if beat.available_actions:
+            return list(beat.available_actions)
+        return list(self._scene_actions.get(beat.scene_id, ()))
+
+    def beat(self, beat_id: str) -> Dict[str, Any]:
+        """씬 비트의 파싱된 속성 (공유 객체이므로 복사본을 반환)"""
+        beat = self._beats.get(beat_id)
+        return copy.deepcopy(beat.properties) if beat else {}
+
+    def is_choice(self, beat_id: str) -> bool:
+        """분기(선택지가 둘 이상)가 있는 씬 비트인지 확인합니다."""
+        beat = self._beats.get(beat_id)
+        return bool(beat) and len(beat.conditions) > 1
+
+
+# 프로세스 전역 씬 그래프
+_graph: Optional[SceneGraph] = None
+_graph_lock = threading.Lock()
+
+
+def get_scene_graph(db_manager=None) -> SceneGraph:
+    """공유 씬 그래프를 반환합니다.
+
+    월드 버전이 바뀌면 (db_init 재실행) 다시 적재합니다.
+    db_manager가 없거나 데이터베이스 적재에 실패하면 initial_scenes.json을 사용합니다.
+    """
+    global _graph
+    version = current_world_version(db_manager) if db_manager is not None else None
+
+    with _graph_lock:
+        if _graph is not None and (db_manager is None or _graph.version == version):
+            return _graph
+
+        graph = None
+        if db_manager is not None:
+            try:
+                graph = SceneGraph.from_db(db_manager, version=version)
+            except Exception as e:
+                print(f"Error loading scene graph from database: {e}")
+        if not graph:
+            graph = SceneGraph.from_file(version=version)
+
+        _graph = graph
+        return _graph
+
+
+def invalidate_scene_graph() -> None:
+    """공유 씬 그래프를 비웁니다. 다음 호출에서 다시 적재됩니다."""
+    global _graph
+    with _graph_lock:
+        _graph = None
@@ -1,9 +1,9 @@
 # state_graph.py
-from typing import TypedDict, List, Dict, Any
+from typing import TypedDict, List, Dict, Any, Callable, Optional
 from langgraph.graph import START, StateGraph, END
-from langchain_openai import ChatOpenAI
 from langgraph.checkpoint.memory import MemorySaver
 from states import GameState, PlayerState
+from scene_graph import get_scene_graph
 from node import (
     InitializeNode,
     AnalysisDirectionNode,
@@ -13,6 +13,19 @@ from node import (
     RouteMovingNode,
     CreatePlayerAndCharacterNodes,
 )
+import asyncio
+from langchain_core.runnables import RunnableConfig
+from ere_worker import enqueue_ere
+from world_version import current_world_version
+from story_memory import format_memories, get_story_memory
+from prompt_registry import register_prompt
+from story_chain import create_map_analyst
+from map_agent import map_analysis_cache, map_analysis_key
+from history_manager import trim_history
+from turn_budget import should_skip
+from turn_branches import async_branch_node, branch_node
+from model_router import routed, short_answer_confidence
+from invalid_input import invalid_input_node
 import streamlit as st
 
 
@@ -28,111 +41,306 @@ class GameState(TypedDict):
     generation: str
     characters: List[Dict]
     history: List[str]
+    player: Dict
+    context: str
+    memory: str
+    extracted_data: Dict
+    turn_deadline: float
+
+
+# 단계별 모델 캐스케이드: 쉬운 요청은 작은 모델, 신뢰도가 낮으면 강한 모델로 승격
+# (각 모델은 동시 호출 제한, 재시도/중복 요청이 적용됨 - model_router.get_stage_model)
+action_matcher_model = routed("action_match", confidence=short_answer_confidence)
+story_generator_model = routed("story_generation")
+
+# 턴마다 쓰는 프롬프트: 정적 지침이 앞에 오도록 한 번만 컴파일 (prompt_registry)
+ACTION_MATCH_PROMPT = register_prompt(
+    "action_match",
+    [
+        (
+            "instructions",
+            """
+        아래 사용자 입력이 가능한 행동들 중 어떤 것과 가장 잘 매칭되는지 판단하세요.
+        정확히 일치하지 않더라도, 의미상 가장 가까운 행동을 선택하세요.
+        매칭되는 행동이 있다면 그 행동을, 없다면 None을 반환하세요.
+""",
+        ),
+        (
+            "input",
+            """
+        사용자 입력: {user_input}
+        가능한 행동들: {available_actions}
+        """,
+        ),
+    ],
+)
+STORY_SYSTEM_PROMPT = register_prompt(
+    "story_system",
+    [
+        (
+            "setting",
+            """You are a storyteller creating an interactive novel in a post-apocalyptic world.
+        The setting is '판교역'(Pangyo subway station) where civilization has collapsed due to a machine rebellion.
+        Maintain a modern dystopian setting, not fantasy or medieval.
+        Generate pure narrative without system messages or technical explanations.
+""",
+        ),
+        (
+            "guidelines",
+            """
+        Important guidelines:
+        1. Write only the new part of the story that continues from the previous narrative. Do not repeat or summarize any part of the previous story.
+        2. Give subtle hints about available actions within the story context
+        3. Maintain story continuity with previous scenes
+        4. Always write in Korean
+        5. Focus on the post-apocalyptic atmosphere
+        6. Keep the story grounded in the subway station setting
+""",
+        ),
+        (
+            "scene",
+            """
+        Available actions for the player: {available_actions}
+        Current scene: {next_scene}
+        Current scene beat: {current_scene_beat}
+        Story conditions: {conditions}
+        """,
+        ),
+    ],
+)
+STORY_USER_PROMPT = register_prompt(
+    "story_user",
+    [
+        (
+            "instructions",
+            """
+        Based on the information below, generate a story that maintains the flow of the previous narrative while fitting the current situation.
+        Exclude system messages or technical explanations and write pure narrative only.
+        Write only the new part of the story that continues from the previous narrative.
+        Do not repeat or summarize any part of the previous story.
+""",
+        ),
+        (
+            "input",
+            """
+        이전 이야기: {previous_stories}
+        관련된 과거 기억: {memory}
+        현재 상황: {current_context}
+        현재 씬: {scene}
+        맵 분석: {map_context}
+        플레이어 행동: {user_input}
+        선택된 행동: {matched_action}
+        등장 인물: {characters}
+        """,
+        ),
+    ],
+)
 
+# 병렬 브랜치별 제한 시간 (초). 시간을 넘기면 기본값으로 대체하고 턴을 계속 진행
+BRANCH_TIMEOUTS = {
+    "process_action": 15.0,
+    "retrieve_context": 5.0,
+    "analyse_map": 20.0,
+}
 
-# 동기 버전의 모델 초기화
-action_matcher_model = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-story_generator_model = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
+_map_analyst = None
 
 
-def process_user_action(state: GameState) -> GameState:
-    """사용자 입력을 처리하고 씬 전환을 수행하는 통합 노드"""
-    user_input = state["user_input"]
-    available_actions = state["available_actions"]
-    current_scene_beat_id = state["scene_beat"]
-    db_manager = st.session_state.db_manager
+def get_dependency(config: Optional[RunnableConfig], name: str):
+    """그래프 config의 configurable 또는 st.session_state에서 의존 객체를 가져옵니다.
+
+    병렬 브랜치는 작업 스레드에서 실행되므로 config로 전달하는 것을 우선합니다.
+    """
+    configurable = (config or {}).get("configurable", {})
+    if name in configurable:
+        return configurable[name]
+    return st.session_state.get(name)
 
-    # 1. Action Matching
-    response = action_matcher_model.invoke(
-        [
-            {
-                "role": "user",
-                "content": f"""
-        사용자 입력: {user_input}
-        가능한 행동들: {', '.join(available_actions)}
-        
-        위 사용자 입력이 가능한 행동들 중 어떤 것과 가장 잘 매칭되는지 판단하세요.
-        정확히 일치하지 않더라도, 의미상 가장 가까운 행동을 선택하세요.
-        매칭되는 행동이 있다면 그 행동을, 없다면 None을 반환하세요.
-        """,
-            }
-        ]
-    )
 
-    matched_action = response.content
-    state["matched_action"] = matched_action if matched_action != "None" else None
-    state["action_result"] = "continue" if matched_action != "None" else "invalid_input"
+def _get_map_analyst():
+    global _map_analyst
+    if _map_analyst is None:
+        _map_analyst = create_map_analyst()
+    return _map_analyst
+
+
+def _neo4j_driver(db_manager):
+    """DB 매니저에서 Neo4j 드라이버를 꺼냅니다."""
+    if hasattr(db_manager, "neo4j_graph"):
+        return db_manager.neo4j_graph._driver
+    return db_manager.driver
+
+
+def build_action_match_messages(
+    user_input: str, available_actions: List[str]
+) -> List[Dict[str, str]]:
+    """액션 매칭 프롬프트 메시지를 만듭니다."""
+    return [
+        {
+            "role": "user",
+            "content": ACTION_MATCH_PROMPT.format(
+                user_input=user_input, available_actions=", ".join(available_actions)
+            ),
+        }
+    ]
+
+
+def apply_action_match(
+    matched_action: str, current_scene_beat_id: str, db_manager
+) -> Dict:
+    """매칭 결과로 상태 업데이트를 만들고, 매칭된 경우 씬 전환을 수행합니다."""
+    update = {
+        "matched_action": matched_action if matched_action != "None" else None,
+        "action_result": "continue" if matched_action != "None" else "invalid_input",
+    }
 
     # 2. Scene Transition (매칭된 액션이 있을 경우에만)
-    if state["matched_action"]:
+    if update["matched_action"]:
         try:
-            next_scene_beat = get_next_scene_beat(
-                db_manager=db_manager,
-                current_scene_beat_id=current_scene_beat_id,
-                choice=matched_action,  # matched_action을 choice로 전달
+            transition = get_scene_graph(db_manager).resolve(
+                current_scene_beat_id, matched_action  # matched_action을 choice로 전달
             )
 
-            if next_scene_beat:
-                state["scene_beat"] = next_scene_beat
+            if transition:
+                update["scene_beat"] = transition.beat_id
 
-                if next_scene_beat.startswith("scene:"):
-                    state["scene"] = next_scene_beat
+                if transition.scene_id:
+                    update["scene"] = transition.scene_id
 
-                    # Update map
-                    query = """
-                    MATCH (s:Scene {id: $scene_id})-[:LOCATED_IN]->(m:Map)
-                    RETURN m.id as map_id
-                    """
-                    result = db_manager.query(
-                        query=query, params={"scene_id": next_scene_beat}
-                    )
-
-                    if result:
-                        state["map"] = result[0]["map_id"]
+                if transition.map_id:
+                    update["map"] = transition.map_id
 
         except Exception as e:
             print(f"Error in scene transition: {e}")
             # 에러가 발생해도 매칭 결과는 유지
 
-    return state
+    return update
 
 
-def generate_story(state: GameState, system_prompt: str) -> Dict:
-    """Story generation"""
-    # 내부 처리용 history와 표시용 display_history 분리
+def process_user_action(state: GameState, config: RunnableConfig = None) -> Dict:
+    """사용자 입력을 처리하고 씬 전환을 수행하는 통합 노드"""
+    # 1. Action Matching
+    # config에 담긴 브랜치 마감 시각이 모델 호출까지 전달되도록 넘김
+    response = action_matcher_model.invoke(
+        build_action_match_messages(state["user_input"], state["available_actions"]),
+        config,
+    )
+    return apply_action_match(
+        response.content, state["scene_beat"], get_dependency(config, "db_manager")
+    )
+
+
+def retrieve_context(state: GameState, config: RunnableConfig = None) -> Dict:
+    """사용자 입력과 관련된 스토리라인/행동/감정과 이 세션의 과거 턴을 벡터 검색합니다."""
+    if should_skip(state, "retrieve_context"):
+        return {"context": "", "memory": ""}
+    story_retriever = get_dependency(config, "story_retriever")
+    context = ""
+    if story_retriever is not None:
+        results = story_retriever.retrieve_all(state["user_input"])
+        context = story_retriever.get_context_from_results(results)
+    return {"context": context, "memory": recall_memory(state, config)}
+
+
+def recall_memory(state: GameState, config: RunnableConfig = None) -> str:
+    """세션의 장기 기억에서 현재 입력과 관련된 과거 턴을 꺼냅니다. (최근 히스토리는 제외)"""
+    session_id = get_dependency(config, "session_id")
+    if not session_id:
+        return ""
+    try:
+        entries = get_story_memory().search(
+            session_id, state["user_input"], exclude=state.get("history", [])
+        )
+    except Exception as e:
+        print(f"Error during recall memory: {e}")
+        return ""
+    return format_memories(entries)
+
+
+def analyse_map(state: GameState, config: RunnableConfig = None) -> Dict:
+    """현재 맵과 플레이어 위치를 분석합니다. 같은 상황의 분석 결과는 캐시에서 가져옵니다."""
+    player = state.get("player", {})
+    cache_key = map_analysis_key(
+        state.get("map", ""),
+        player.get("position", {}),
+        player.get("direction"),
+        state.get("scene_beat"),
+        state.get("matched_action"),
+    )
+    analysis = map_analysis_cache.get(cache_key)
+    if analysis is None and should_skip(state, "analyse_map"):
+        # 시간이 부족하면 이전 분석 결과를 그대로 사용
+        return {"map_context": state.get("map_context", "")}
+    if analysis is None:
+        analysis = _get_map_analyst().invoke(
+            {
+                "current_map": state.get("map", ""),
+                "player_position": player.get("position", {}),
+                "history": trim_history(state.get("history", [])),
+            },
+            config,
+        )
+        map_analysis_cache.set(cache_key, analysis)
+    return {"map_context": analysis}
+
+
+def ere_extraction(state: GameState, config: RunnableConfig = None) -> Dict:
+    """엔티티/관계 추출과 그래프 업데이트를 백그라운드 큐에 넣습니다.
+
+    결과는 다음 턴부터 쓰이므로 현재 턴은 추출(LLM)과 그래프 쓰기를 기다리지 않습니다.
+    """
+    user_input = state.get("user_input")
+    if user_input:
+        db_manager = get_dependency(config, "db_manager")
+        if db_manager is None:
+            enqueue_ere(get_dependency(config, "session_id") or "", user_input)
+        else:
+            enqueue_ere(
+                get_dependency(config, "session_id") or "",
+                user_input,
+                _neo4j_driver(db_manager),
+                current_world_version(db_manager),
+            )
+    return {"extracted_data": {}}
+
+
+def build_story_messages(state: GameState, system_prompt: str) -> List[Dict[str, str]]:
+    """스토리 생성 프롬프트 메시지를 만듭니다."""
     history = state.get("history", [])
 
-    # Combine previous stories into a single context string (최근 3개만 사용)
-    previous_stories = "\n".join(history[-3:]) if history else ""
+    # 요약 + 최근 턴 (토큰 예산 이내)만 프롬프트에 사용
+    previous_stories = "\n".join(trim_history(history)) if history else ""
 
     # 현재 상황 컨텍스트
     current_context = state.get("context", "")
 
-    response = story_generator_model.invoke(
-        [
-            {"role": "system", "content": system_prompt},
-            {
-                "role": "user",
-                "content": f"""
-        이전 이야기: {previous_stories}
-        현재 상황: {current_context if current_context else state.get('generation', '')}
-        현재 씬: {state['scene']}
-        맵 분석: {state['map_context']}
-        플레이어 행동: {state['user_input']}
-        선택된 행동: {state['matched_action']}
-        등장 인물: {state['characters']}
-        
-        Based on the information above, generate a story that maintains the flow of the previous narrative while fitting the current situation.
-        Exclude system messages or technical explanations and write pure narrative only.
-        Write only the new part of the story that continues from the previous narrative. 
-        Do not repeat or summarize any part of the previous story. 
-        Exclude any system messages or technical explanations.
-        """,
-            },
-        ]
-    )
+    # 장기 기억에서 꺼낸 관련 과거 턴 (토큰 예산 이내)
+    memory = state.get("memory", "")
 
-    new_story = response.content
+    return [
+        {"role": "system", "content": system_prompt},
+        {
+            "role": "user",
+            "content": STORY_USER_PROMPT.format(
+                previous_stories=previous_stories,
+                memory=memory if memory else "없음",
+                current_context=(
+                    current_context if current_context else state.get("generation", "")
+                ),
+                scene=state["scene"],
+                map_context=state["map_context"],
+                user_input=state["user_input"],
+                matched_action=state["matched_action"],
+                characters=state["characters"],
+            ),
+        },
+    ]
+
+
+def story_update(state: GameState, new_story: str) -> Dict:
+    """생성된 이야기로 generation/history/display_history 업데이트를 만듭니다."""
+    # 내부 처리용 history와 표시용 display_history 분리
+    history = state.get("history", [])
 
     # history에는 내부 처리용으로 모든 이야기를 보관
     processed_history = history.copy()
@@ -153,6 +361,98 @@ def generate_story(state: GameState, system_prompt: str) -> Dict:
     }
 
 
+def generate_story(state: GameState, system_prompt: str) -> Dict:
+    """Story generation"""
+    response = story_generator_model.invoke(build_story_messages(state, system_prompt))
+    return story_update(state, response.content)
+
+
+def build_story_system_prompt(state: GameState) -> str:
+    """현재 씬 정보로 스토리 생성 시스템 프롬프트를 만듭니다."""
+    # 각 상태값에 대해 더 의미 있는 기본값 설정
+    available_actions = state.get("available_actions", [])
+    next_scene = state.get(
+        "next_scene", state.get("scene", "현재 씬")
+    )  # 현재 씬을 기본값으로
+    current_scene_beat = state.get("scene_beat", "현재 장면")
+    conditions = state.get("condition", "일반적인 상황")
+
+    return STORY_SYSTEM_PROMPT.format(
+        available_actions=available_actions,
+        next_scene=next_scene,
+        current_scene_beat=current_scene_beat,
+        conditions=conditions,
+    )
+
+
+# 비동기 턴 그래프 노드: 모델은 ainvoke, DB는 aquery, 동기 전용 호출은 스레드에서 실행
+
+
+async def aprocess_user_action(
+    state: GameState, config: RunnableConfig = None
+) -> Dict:
+    """process_user_action의 비동기 버전"""
+    response = await action_matcher_model.ainvoke(
+        build_action_match_messages(state["user_input"], state["available_actions"]),
+        config,
+    )
+    # 씬 그래프는 월드 버전이 바뀌었을 때만 DB를 조회하므로 스레드에서 실행
+    return await asyncio.to_thread(
+        apply_action_match,
+        response.content,
+        state["scene_beat"],
+        get_dependency(config, "db_manager"),
+    )
+
+
+async def aretrieve_context(state: GameState, config: RunnableConfig = None) -> Dict:
+    """retrieve_context의 비동기 버전 (벡터 검색과 장기 기억 검색을 동시에 실행)"""
+    if should_skip(state, "retrieve_context"):
+        return {"context": "", "memory": ""}
+    story_retriever = get_dependency(config, "story_retriever")
+    memory_task = asyncio.create_task(asyncio.to_thread(recall_memory, state, config))
+    context = ""
+    if story_retriever is not None:
+        results = await story_retriever.aretrieve_all(state["user_input"])
+        context = story_retriever.get_context_from_results(results)
+    return {"context": context, "memory": await memory_task}
+
+
+async def aanalyse_map(state: GameState, config: RunnableConfig = None) -> Dict:
+    """analyse_map의 비동기 버전"""
+    player = state.get("player", {})
+    cache_key = map_analysis_key(
+        state.get("map", ""),
+        player.get("position", {}),
+        player.get("direction"),
+        state.get("scene_beat"),
+        state.get("matched_action"),
+    )
+    analysis = map_analysis_cache.get(cache_key)
+    if analysis is None and should_skip(state, "analyse_map"):
+        return {"map_context": state.get("map_context", "")}
+    if analysis is None:
+        analysis = await _get_map_analyst().ainvoke(
+            {
+                "current_map": state.get("map", ""),
+                "player_position": player.get("position", {}),
+                "history": trim_history(state.get("history", [])),
+            },
+            config,
+        )
+        map_analysis_cache.set(cache_key, analysis)
+    return {"map_context": analysis}
+
+
+async def agenerate_story(state: GameState, config: RunnableConfig = None) -> Dict:
+    """스토리 생성 노드의 비동기 버전"""
+    # Python 3.11 미만에서는 config를 넘겨야 토큰 스트리밍 콜백이 연결됨
+    response = await story_generator_model.ainvoke(
+        build_story_messages(state, build_story_system_prompt(state)), config=config
+    )
+    return story_update(state, response.content)
+
+
 def should_continue(state: GameState) -> str:
     """다음 노드 결정"""
     if state.get("action_result") == "continue":
@@ -160,58 +460,128 @@ def should_continue(state: GameState) -> str:
     return "end"
 
 
-def create_game_graph():
-    """게임 그래프 생성"""
+def route_action(state: GameState, branches: List[str]) -> List[str] | str:
+    """매칭된 행동이면 스토리 생성 브랜치들로, 아니면 invalid_input 노드로 보냅니다."""
+    if state.get("action_result") == "continue":
+        return branches
+    return "invalid_input"
+
+
+def _build_game_graph(
+    process_action: Callable,
+    context_branches: Dict[str, Callable],
+    action_branches: Dict[str, Callable],
+    story_generation: Callable,
+):
+    """턴 그래프를 구성합니다. (동기/비동기 그래프가 같은 구조를 공유)
+
+    매칭된 행동과 관계없는 컨텍스트 검색(context_branches)은 액션 매칭과 동시에
+    시작하고, 매칭 결과가 필요한 단계(action_branches)와 스토리 생성은 매칭된 경우에만
+    실행합니다. 스토리 생성은 모든 브랜치가 끝난 뒤에 실행됩니다.
+    """
     workflow = StateGraph(GameState)
+    workflow.add_node("process_action", process_action)
+    for name, node in {**context_branches, **action_branches}.items():
+        workflow.add_node(name, node)
+    workflow.add_node("story_generation", story_generation)
+    workflow.add_node("invalid_input", invalid_input_node)
+
+    workflow.add_edge(START, "process_action")
+    for name in context_branches:
+        workflow.add_edge(START, name)
+    workflow.add_conditional_edges(
+        "process_action",
+        lambda state: route_action(state, list(action_branches)),
+        [*action_branches, "invalid_input"],
+    )
 
-    def story_generation_with_dynamic_prompt(state: GameState) -> Dict:
-        # 각 상태값에 대해 더 의미 있는 기본값 설정
-        available_actions = state.get("available_actions", [])
-        next_scene = state.get(
-            "next_scene", state.get("scene", "현재 씬")
-        )  # 현재 씬을 기본값으로
-        current_scene_beat = state.get("scene_beat", "현재 장면")
-        conditions = state.get("condition", "일반적인 상황")
-
-        system_prompt = f"""You are a storyteller creating an interactive novel in a post-apocalyptic world.
-        The setting is '판교역'(Pangyo subway station) where civilization has collapsed due to a machine rebellion.
-        Maintain a modern dystopian setting, not fantasy or medieval.
-        Generate pure narrative without system messages or technical explanations.
-        
-        Available actions for the player: {available_actions}
-        Current scene: {next_scene}
-        Current scene beat: {current_scene_beat}
-        Story conditions: {conditions}
-        
-        Important guidelines:
-        1. Write only the new part of the story that continues from the previous narrative. Do not repeat or summarize any part of the previous story.
-        2. Give subtle hints about available actions within the story context
-        3. Maintain story continuity with previous scenes
-        4. Always write in Korean
-        5. Focus on the post-apocalyptic atmosphere
-        6. Keep the story grounded in the subway station setting
-        """
+    # 모든 브랜치가 끝난 뒤 스토리 생성 (잘못된 입력이면 action_branches가 실행되지
+    # 않으므로 스토리 생성도 실행되지 않음)
+    workflow.add_edge([*context_branches, *action_branches], "story_generation")
+    workflow.add_edge("story_generation", END)
+    workflow.add_edge("invalid_input", END)
 
-        return generate_story(state, system_prompt)
+    return workflow.compile()
 
-    # 노드 추가
-    workflow.add_node("process_action", process_user_action)
-    workflow.add_node("story_generation", story_generation_with_dynamic_prompt)
 
-    workflow.set_entry_point("process_action")
+def _process_action_fallback(state: GameState) -> Dict:
+    return {"matched_action": None, "action_result": "invalid_input"}
 
-    workflow.add_conditional_edges(
-        "process_action",
-        lambda x: x["action_result"],
+
+PROCESS_ACTION_OUTPUTS = ["matched_action", "action_result", "scene_beat", "scene", "map"]
+
+
+def create_game_graph():
+    """게임 그래프 생성"""
+
+    def story_generation_with_dynamic_prompt(state: GameState) -> Dict:
+        return generate_story(state, build_story_system_prompt(state))
+
+    return _build_game_graph(
+        branch_node(
+            process_user_action,
+            PROCESS_ACTION_OUTPUTS,
+            timeout=BRANCH_TIMEOUTS["process_action"],
+            fallback=_process_action_fallback,
+            stage="process_action",
+        ),
         {
-            "continue": "story_generation",
-            "invalid_input": "story_generation",  # 둘 다 스토리 생성으로
+            "retrieve_context": branch_node(
+                retrieve_context,
+                ["context", "memory"],
+                timeout=BRANCH_TIMEOUTS["retrieve_context"],
+                fallback=lambda state: {"context": "", "memory": ""},
+                stage="retrieve_context",
+            ),
         },
+        {
+            "analyse_map": branch_node(
+                analyse_map,
+                ["map_context"],
+                timeout=BRANCH_TIMEOUTS["analyse_map"],
+                stage="analyse_map",
+            ),
+            # 큐에 넣기만 하므로 제한 시간 없이 바로 실행
+            "ere_extraction": ere_extraction,
+        },
+        story_generation_with_dynamic_prompt,
     )
 
-    workflow.add_edge("story_generation", END)
 
-    return workflow.compile()
+def create_async_game_graph():
+    """비동기 게임 그래프 생성 (run_game_turn으로 실행)
+
+    create_game_graph와 구조는 같고, 모든 노드가 ainvoke/aquery를 사용하므로
+    한 프로세스의 이벤트 루프에서 여러 세션의 턴을 동시에 처리할 수 있습니다.
+    """
+    return _build_game_graph(
+        async_branch_node(
+            aprocess_user_action,
+            PROCESS_ACTION_OUTPUTS,
+            timeout=BRANCH_TIMEOUTS["process_action"],
+            fallback=_process_action_fallback,
+            stage="process_action",
+        ),
+        {
+            "retrieve_context": async_branch_node(
+                aretrieve_context,
+                ["context", "memory"],
+                timeout=BRANCH_TIMEOUTS["retrieve_context"],
+                fallback=lambda state: {"context": "", "memory": ""},
+                stage="retrieve_context",
+            ),
+        },
+        {
+            "analyse_map": async_branch_node(
+                aanalyse_map,
+                ["map_context"],
+                timeout=BRANCH_TIMEOUTS["analyse_map"],
+                stage="analyse_map",
+            ),
+            "ere_extraction": ere_extraction,
+        },
+        agenerate_story,
+    )
 
 
 def create_state_graph(story_chain, map_analyst):
@@ -253,35 +623,25 @@ def scene_transition_node(state: PlayerState) -> PlayerState:
         current_scene_beat_id = state.get("scene_beat")
         user_input = state.get("user_input", "")
 
-        next_scene_beat_id = get_next_scene_beat(
-            db_manager=db_manager,
-            current_scene_beat_id=current_scene_beat_id,
-            choice=user_input,
+        transition = get_scene_graph(db_manager).resolve(
+            current_scene_beat_id, user_input
         )
 
-        if not next_scene_beat_id:
+        if not transition:
             print(f"No valid next scene beat for action: {user_input}")
             return state
 
-        state["scene_beat"] = next_scene_beat_id
+        state["scene_beat"] = transition.beat_id
 
-        # Update scene if next_scene_beat starts with "scene:"
-        if next_scene_beat_id.startswith("scene:"):
-            state["scene"] = next_scene_beat_id
+        # 다른 씬의 비트로 이동한 경우 씬과 맵도 갱신
+        if transition.scene_id:
+            state["scene"] = transition.scene_id
 
-            # Update map using db_manager
-            next_scene_id = next_scene_beat_id
-            query = """
-            MATCH (s:Scene {id: $scene_id})-[:LOCATED_IN]->(m:Map)
-            RETURN m.id as map_id
-            """
-            result = db_manager.query(query=query, params={"scene_id": next_scene_id})
-
-            if not result:
-                print(f"No valid map_id. scene: {next_scene_id}")
+            if not transition.map_id:
+                print(f"No valid map_id. scene: {transition.scene_id}")
                 return state
 
-            state["map"] = result[0]["map_id"]
+            state["map"] = transition.map_id
 
     except ValueError as e:
         print(f"Error in scene transition - Invalid value: {e}")
@@ -296,41 +656,17 @@ def scene_transition_node(state: PlayerState) -> PlayerState:
 def get_next_scene_beat(
     db_manager, current_scene_beat_id: str, choice: str = ""
 ) -> str:
-    """현재 씬 비트 ID에서 다음 씬 비트 ID를 가져옵니다."""
-    try:
-        if choice:
-            query = """
-            MATCH (sb:SceneBeat {id: $current_scene_beat_id})
-            -[r:CONDITION {action: $choice}]->(next_sb:SceneBeat)
-            RETURN next_sb.id AS next_scene_beat_id
-            """
-            params = {"current_scene_beat_id": current_scene_beat_id, "choice": choice}
-        else:
-            query = """
-            MATCH (sb:SceneBeat {id: $current_scene_beat_id})
-            -[:NEXT]->(next_sb:SceneBeat)
-            RETURN next_sb.id AS next_scene_beat_id
-            LIMIT 1
-            """
-            params = {"current_scene_beat_id": current_scene_beat_id}
-
-        result = db_manager.query(query=query, params=params)
-
-        if not result:
-            fallback_query = """
-            MATCH (sb:SceneBeat)
-            WHERE sb.id STARTS WITH 'scenebeat:scene:'
-            RETURN sb.id AS next_scene_beat_id
-            LIMIT 1
-            """
-            result = db_manager.query(query=fallback_query, params={})
-
-            if not result:
-                raise ValueError(
-                    f"No next scene beat found for {current_scene_beat_id}"
-                )
+    """현재 씬 비트 ID에서 다음 씬 비트 ID를 가져옵니다.
 
-        return result[0]["next_scene_beat_id"]
+    메모리에 컴파일된 씬 그래프를 사용하므로 데이터베이스 왕복이 없습니다.
+    """
+    try:
+        next_scene_beat_id = get_scene_graph(db_manager).next_beat(
+            current_scene_beat_id, choice
+        )
+        if not next_scene_beat_id:
+            raise ValueError(f"No next scene beat found for {current_scene_beat_id}")
+        return next_scene_beat_id
     except Exception as e:
         print(f"Error in get_next_scene_beat: {e}")
         return None
@@ -1,9 +1,44 @@
-from typing import Annotated, Dict, List, TypedDict, Callable, Union
+from typing import Annotated, Dict, List, TypedDict, Callable, Union, Optional
 from typing_extensions import TypedDict
 from langgraph.graph.message import add_messages
 from neo4j import GraphDatabase
 from abc import ABC, abstractmethod
 from ref_db_cls import Scene, SceneBeat  # Player state RAG용
+import copy
+import json
+import os
+import threading
+
+SAMPLE_STATE_FILE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "state", "sample_game_state.json"
+)
+
+DEFAULT_INITIAL_STATE = {
+    "player": {
+        "id": "character:Player",
+        "name": "Player",
+        "sex": "unknown",
+        "position": {"map": "map:Pangyo_B2_Concourse", "x": 1, "y": 1},
+        "direction": "north",
+        "field_of_view": 3,
+        "inventory": [],
+        "stamina": 100,
+        "status": "normal",
+    },
+    "map": "map:Pangyo_B2_Concourse",
+    "scene": "scene:00_Pangyo_Station",
+    "scene_beat": "scene_beat:00_Pangyo_Station_1",
+    "history": [],
+    "user_input": "",
+    "map_context": "",
+    "generation": "",
+    "characters": [],
+    "extracted_data": {},
+}
+
+# 프로세스 전역 초기 상태 템플릿 (파일은 한 번만 읽음)
+_initial_state_template: Optional[Dict] = None
+_initial_state_lock = threading.Lock()
 
 
 # https://wikidocs.net/265768 참조할 것 (서브스키마로 서로 다른 스키마 구조를 가질때)
@@ -38,6 +73,9 @@ class PlayerState(TypedDict):
     extracted_data: Annotated[Dict, "LLM으로 추출된 데이터"]
     session_id: Annotated[str, "st.session_state.id 고유값"]
     available_actions: Annotated[List[str], "사용자가 취할 수 있는 바람직한 행동들"]
+    current_beat: Annotated[Dict, "현재 씬 비트의 파싱된 속성"]
+    is_choice: Annotated[bool, "현재 씬 비트가 선택 분기인지 여부"]
+    action_result: Annotated[str, "입력 검증 결과 (continue / invalid_input)"]
 
 
 def initialize_player_state() -> PlayerState:
@@ -55,9 +93,31 @@ def initialize_player_state() -> PlayerState:
         "extracted_data": {},
         "session_id": "",
         "available_actions": [],
+        "current_beat": {},
+        "is_choice": False,
+        "action_result": "",
     }
 
 
+def load_initial_player_state() -> PlayerState:
+    """sample_game_state.json으로 만든 초기 상태의 복사본을 반환합니다.
+
+    파일이 없거나 잘못된 경우 DEFAULT_INITIAL_STATE를 사용합니다.
+    """
+    global _initial_state_template
+    with _initial_state_lock:
+        if _initial_state_template is None:
+            try:
+                with open(SAMPLE_STATE_FILE_PATH, "r", encoding="utf-8") as f:
+                    _initial_state_template = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                print(
+                    "Warning: Using default game state as the JSON file is missing or invalid."
+                )
+                _initial_state_template = DEFAULT_INITIAL_STATE
+        return PlayerState(copy.deepcopy(_initial_state_template))
+
+
 def update_player_state(state: PlayerState, updates: Dict) -> PlayerState:
     """PlayerState를 업데이트합니다. 새로운 상태 객체를 반환합니다."""
     new_state = state.copy()
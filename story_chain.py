@@ -1,20 +1,37 @@
 # story_chain.py
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import load_prompt
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
 from operator import itemgetter
+from clients import get_chat_model, limit_concurrency
+from hedging import default_policy, hedged
+from prompt_registry import load_prompt_file
+from model_router import map_analysis_confidence, routed
 
 
 def create_story_chain():
-    prompt = load_prompt("prompts/story-gen-prompt-eng.yaml")
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=1, max_tokens=2048)
+    # 정적 지침이 앞, 입력 데이터가 뒤에 오도록 컴파일된 프롬프트 (prompt_registry)
+    prompt = load_prompt_file("story_chain", "story-gen-prompt-eng.yaml")
+    llm = hedged(
+        limit_concurrency(
+            get_chat_model(
+                "gpt-4o-mini",
+                temperature=1,
+                max_tokens=2048,
+                cache_node="story_generation",
+            ),
+            "gpt-4o-mini",
+        ),
+        "story_chain",
+        # 긴 이야기는 보통 중복 요청 대기 시간보다 오래 걸리므로 재시도만 함
+        default_policy(hedge=False),
+    )
     story_chain = (
         {
             "map_context": itemgetter("map_context"),
             "history": itemgetter("history"),
             "name": itemgetter("name"),
         }
-        | prompt
+        | RunnableLambda(prompt, name="story_chain_prompt")
         | llm
         | StrOutputParser()
     )
@@ -22,19 +39,46 @@ def create_story_chain():
 
 
 def create_map_analyst():
-    prompt = load_prompt("prompts/analysis_map_prompt_eng.yaml")
-    # 예시: ChatGoogleGenerativeAI 사용 (Gemini 모델)
-    from langchain_google_genai import ChatGoogleGenerativeAI
-
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-pro-exp-02-05", temperature=0.5)
+    # 입력 데이터 뒤에 기호 설명과 출력 형식이 오도록 쓰인 프롬프트이므로 순서를 유지
+    prompt = load_prompt_file(
+        "map_analyst", "analysis_map_prompt_eng.yaml", reorder=False
+    )
+    # Gemini flash로 시작하고, 응답에 필요한 섹션이 없으면 pro로 승격 (model_router)
+    llm = routed("map_analysis", confidence=map_analysis_confidence)
     map_analyst = (
         {
             "current_map": itemgetter("current_map"),
             "player_position": itemgetter("player_position"),
             "history": itemgetter("history"),
         }
-        | prompt
+        | RunnableLambda(prompt, name="map_analyst_prompt")
         | llm
         | StrOutputParser()
     )
     return map_analyst
+
+
+def create_history_summarizer():
+    """이전 요약과 오래된 턴들을 하나의 짧은 요약으로 합치는 함수를 반환합니다."""
+    from langchain_core.prompts import ChatPromptTemplate
+
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            (
+                "system",
+                "You compress an interactive novel's past into a short recap. "
+                "Keep names, places, items, promises and unresolved threats. "
+                "Write at most 5 sentences in Korean. Output only the recap.",
+            ),
+            ("user", "Previous recap:\n{summary}\n\nNew events:\n{turns}"),
+        ]
+    )
+    llm = limit_concurrency(
+        get_chat_model("gpt-4o-mini", temperature=0, max_tokens=300), "gpt-4o-mini"
+    )
+    chain = prompt | llm | StrOutputParser()
+
+    def summarize(previous_summary: str, turns: list) -> str:
+        return chain.invoke({"summary": previous_summary, "turns": "\n\n".join(turns)})
+
+    return summarize
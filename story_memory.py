@@ -0,0 +1,305 @@
+"""Per-session long-term story memory.
+
+프롬프트에는 최근 몇 턴과 요약만 들어가므로 오래된 사건은 잊혀집니다. 매 턴의 플레이어
+입력과 생성된 이야기를 임베딩해 세션별 추가 전용(append-only) 벡터 인덱스에 쌓아 두고,
+이야기를 생성할 때 현재 입력과 관련된 과거 턴을 토큰 예산 안에서 top-k만 꺼내 씁니다.
+프롬프트 크기는 세션 길이와 관계없이 일정합니다.
+
+세션마다 디렉터리 하나에 항목 메타데이터(entries.jsonl)와 float32 벡터(vectors.f32)를
+이어 붙여 저장합니다. 메모리에서는 벡터를 numpy 행렬에 모아 두고 검색할 때 행렬 곱
+한 번으로 모든 항목의 유사도를 계산합니다. (numpy가 없으면 순수 파이썬으로 계산)
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from token_counter import count_tokens
+
+DEFAULT_MEMORY_PATH = os.path.join(".cache", "story_memory")
+DEFAULT_TOP_K = 4
+DEFAULT_TOKEN_BUDGET = 600
+# 이 값보다 덜 비슷한 턴은 관련 없는 것으로 보고 꺼내지 않음
+MIN_SIMILARITY = 0.3
+# 메모리에 올려 둘 세션 인덱스 수 (나머지는 필요할 때 디스크에서 다시 읽음)
+MAX_LOADED_SESSIONS = 128
+
+KIND_LABELS = {"player": "플레이어", "story": "이야기"}
+
+EmbedFunc = Callable[[List[str]], List[List[float]]]
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _unit(vector: Iterable[float]) -> array:
+    values = array("f", vector)
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return array("f", (v / norm for v in values))
+
+
+class _SessionIndex:
+    """세션 하나의 항목과 벡터 (디스크 파일과 동기화)"""
+
+    def __init__(self, directory: Optional[str]):
+        self.directory = directory
+        self.entries: List[Dict[str, Any]] = []
+        self.vectors: List[array] = []
+        # numpy 행렬 (행 수는 2배씩 늘림)과 행 -> 항목 위치
+        self._matrix = None
+        self._rows: List[int] = []
+        if directory:
+            self._load()
+
+    @property
+    def _entries_path(self) -> str:
+        return os.path.join(self.directory, "entries.jsonl")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.f32")
+
+    def _load(self) -> None:
+        if not os.path.exists(self._entries_path):
+            return
+        try:
+            with open(self._entries_path, "r", encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+            flat = array("f")
+            with open(self._vectors_path, "rb") as f:
+                flat.frombytes(f.read())
+        except (OSError, ValueError) as e:
+            print(f"Error loading story memory {self.directory}: {e}")
+            return
+
+        offset = 0
+        for entry in entries:
+            dim = entry.get("dim", 0)
+            if offset + dim > len(flat):
+                break  # 쓰기 도중 중단된 마지막 항목은 버림
+            self._add(entry, flat[offset : offset + dim])
+            offset += dim
+        if offset < len(flat):
+            # 항목 없이 남은 벡터를 잘라내야 다음 항목의 위치가 어긋나지 않음
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(offset * flat.itemsize)
+
+    def append(self, entry: Dict[str, Any], vector: array) -> None:
+        entry = {**entry, "dim": len(vector)}
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            # 벡터를 먼저 써야 중단되어도 항목이 벡터 없이 남지 않음
+            with open(self._vectors_path, "ab") as f:
+                f.write(vector.tobytes())
+            with open(self._entries_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._add(entry, vector)
+
+    def _add(self, entry: Dict[str, Any], vector: array) -> None:
+        self.entries.append(entry)
+        self.vectors.append(vector)
+        np = _numpy()
+        if np is None or not len(vector):
+            return
+        if self._matrix is None:
+            self._matrix = np.empty((16, len(vector)), dtype=np.float32)
+        elif len(vector) != self._matrix.shape[1]:
+            return  # 다른 차원의 벡터(임베딩 모델 변경)는 검색하지 않음
+        if len(self._rows) == len(self._matrix):
+            grown = np.empty((len(self._matrix) * 2, self._matrix.shape[1]), np.float32)
+            grown[: len(self._rows)] = self._matrix
+            self._matrix = grown
+        self._matrix[len(self._rows)] = np.frombuffer(vector, dtype=np.float32)
+        self._rows.append(len(self.entries) - 1)
+
+    def scorer(self) -> Callable[[array], List[Tuple[float, int]]]:
+        """지금까지의 항목에 대한 유사도 함수: 질의 벡터 -> [(유사도, 항목 위치)]
+
+        잠금 안에서 만들고 잠금 밖에서 호출합니다. 이후 추가되는 항목은 보지 않습니다.
+        """
+        if self._matrix is not None:
+            matrix, rows = self._matrix[: len(self._rows)], list(self._rows)
+            np = _numpy()
+
+            def score(query: array) -> List[Tuple[float, int]]:
+                if len(query) != matrix.shape[1]:
+                    return []
+                scores = matrix @ np.frombuffer(query, dtype=np.float32)
+                return list(zip(scores.tolist(), rows))
+
+            return score
+
+        vectors = list(self.vectors)
+
+        def score_python(query: array) -> List[Tuple[float, int]]:
+            return [
+                (sum(a * b for a, b in zip(query, vector)), position)
+                for position, vector in enumerate(vectors)
+                if len(vector) == len(query)
+            ]
+
+        return score_python
+
+
+class StoryMemory:
+    """세션별 장기 기억 저장소
+
+    Args:
+        path: 세션 인덱스를 저장할 디렉터리 (None이면 메모리에만 보관)
+        embed: 텍스트 목록을 임베딩하는 함수
+        top_k: 꺼낼 최대 항목 수
+        token_budget: 꺼낸 항목의 최대 토큰 수 합계
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_MEMORY_PATH,
+        embed: Optional[EmbedFunc] = None,
+        top_k: int = DEFAULT_TOP_K,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+    ):
+        self.path = path
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self._embed = embed
+        self._sessions: "OrderedDict[str, _SessionIndex]" = OrderedDict()
+        self._lock = threading.RLock()
+        # 기록은 한 스레드에서 순서대로 처리 (턴 순서 유지, 턴을 기다리게 하지 않음)
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="story-memory"
+        )
+
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        if self._embed is None:
+            from embedding_dispatcher import get_embedding_dispatcher
+
+            self._embed = get_embedding_dispatcher().embed_documents
+        return self._embed(texts)
+
+    def _session(self, session_id: str) -> _SessionIndex:
+        with self._lock:
+            index = self._sessions.get(session_id)
+            if index is None:
+                directory = None
+                if self.path:
+                    name = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+                    directory = os.path.join(self.path, name)
+                index = self._sessions[session_id] = _SessionIndex(directory)
+                while len(self._sessions) > MAX_LOADED_SESSIONS:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            return index
+
+    def add_turn(self, session_id: str, user_input: str, story: str) -> None:
+        """플레이어 입력과 생성된 이야기를 임베딩해 세션 인덱스에 추가합니다."""
+        items = [
+            (kind, text)
+            for kind, text in (("player", user_input), ("story", story))
+            if text
+        ]
+        if not items:
+            return
+        vectors = self._embed_texts([text for _, text in items])
+        with self._lock:
+            index = self._session(session_id)
+            turn = (index.entries[-1]["turn"] + 1) if index.entries else 0
+            for (kind, text), vector in zip(items, vectors):
+                index.append({"turn": turn, "kind": kind, "text": text}, _unit(vector))
+
+    def record_turn(self, session_id: str, user_input: str, story: str) -> Future:
+        """add_turn을 백그라운드에서 실행합니다."""
+
+        def run():
+            try:
+                self.add_turn(session_id, user_input, story)
+            except Exception as e:
+                print(f"Error recording story memory: {e}")
+
+        return self._writer.submit(run)
+
+    def search(
+        self,
+        session_id: str,
+        query: str,
+        top_k: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        exclude: Iterable[str] = (),
+    ) -> List[Dict[str, Any]]:
+        """query와 관련된 과거 항목을 토큰 예산 안에서 찾아 턴 순서대로 반환합니다.
+
+        Args:
+            session_id: 게임 세션 ID
+            query: 검색할 텍스트 (보통 현재 플레이어 입력)
+            top_k: 최대 항목 수 (기본값 self.top_k)
+            token_budget: 최대 토큰 수 합계 (기본값 self.token_budget)
+            exclude: 이미 프롬프트에 들어가는 텍스트 (최근 히스토리)
+        """
+        if not query:
+            return []
+        with self._lock:
+            index = self._session(session_id)
+            entries, score = list(index.entries), index.scorer()
+        if not entries:
+            return []
+
+        query_vector = _unit(self._embed_texts([query])[0])
+        excluded = set(exclude)
+        scored = []
+        for similarity, position in score(query_vector):
+            entry = entries[position]
+            if similarity >= MIN_SIMILARITY and entry["text"] not in excluded:
+                scored.append((similarity, entry))
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        budget = self.token_budget if token_budget is None else token_budget
+        selected, used = [], 0
+        for _, entry in scored[: top_k or self.top_k]:
+            tokens = count_tokens(entry["text"])
+            if used + tokens > budget:
+                continue
+            selected.append(entry)
+            used += tokens
+        return sorted(selected, key=lambda entry: (entry["turn"], entry["kind"]))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(index.entries) for index in self._sessions.values())
+
+
+def format_memories(entries: List[Dict[str, Any]]) -> str:
+    """검색된 항목을 프롬프트에 넣을 문자열로 만듭니다."""
+    return "\n".join(
+        f"[{KIND_LABELS.get(entry['kind'], entry['kind'])}] {entry['text']}"
+        for entry in entries
+    )
+
+
+_memory: Optional[StoryMemory] = None
+_memory_lock = threading.Lock()
+
+
+def get_story_memory() -> StoryMemory:
+    """프로세스 전역 StoryMemory를 반환합니다."""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            import config
+
+            _memory = StoryMemory(
+                path=config.STORY_MEMORY_PATH,
+                top_k=config.STORY_MEMORY_TOP_K,
+                token_budget=config.STORY_MEMORY_TOKEN_BUDGET,
+            )
+        return _memory
@@ -1,7 +1,46 @@
 """Story retriever implementation."""
 
+import asyncio
 from typing import Dict, List, Optional, Any
 from langchain_openai import OpenAIEmbeddings
+from embedding_dispatcher import get_embedding_dispatcher
+
+# 스토리라인 검색
+STORYLINE_QUERY = """
+CALL db.index.vector.queryNodes($index_name, $k, $embedding)
+YIELD node, score
+WITH node, score
+OPTIONAL MATCH (node)-[:INCLUDES]->(script:StoryScript)
+WITH node, score, collect(script.content) as scripts
+RETURN node.storyline as text, score, node.id as id, scripts
+"""
+
+# 행동 검색
+ACT_QUERY = """
+CALL db.index.vector.queryNodes($index_name, $k, $embedding)
+YIELD node, score
+WITH node, score
+OPTIONAL MATCH (script:StoryScript)-[:PERFORMS]->(node)
+WITH node, score, collect(script.content) as scripts
+RETURN node.act as text, score, node.id as id, scripts
+"""
+
+# 감정 검색
+EMOTION_QUERY = """
+CALL db.index.vector.queryNodes($index_name, $k, $embedding)
+YIELD node, score
+WITH node, score
+OPTIONAL MATCH (script:StoryScript)-[:FEELS]->(node)
+WITH node, score, collect(script.content) as scripts
+RETURN node.emotion as text, score, node.id as id, scripts
+"""
+
+# (결과 키, 벡터 인덱스, 쿼리, 결과의 ID 필드)
+VECTOR_SEARCHES = [
+    ("storylines", "storyline_embeddings", STORYLINE_QUERY, "unit_id"),
+    ("acts", "act_embeddings", ACT_QUERY, "act_id"),
+    ("emotions", "emotion_embeddings", EMOTION_QUERY, "emotion_id"),
+]
 
 
 class StoryRetriever:
@@ -16,11 +55,11 @@ class StoryRetriever:
         """
         Args:
             db_manager: Neo4j 데이터베이스 매니저 인스턴스
-            embeddings: 임베딩 제공자 (기본값: OpenAIEmbeddings)
+            embeddings: 임베딩 제공자 (기본값: 공유 EmbeddingDispatcher)
             k: 각 검색에서 반환할 결과 수
         """
         if embeddings is None:
-            embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+            embeddings = get_embedding_dispatcher("text-embedding-3-small")
 
         self.embeddings = embeddings
         self.db_manager = db_manager
@@ -35,98 +74,53 @@ class StoryRetriever:
         results = {"storylines": [], "acts": [], "emotions": []}
 
         try:
-            # 스토리라인 검색
-            storyline_query = """
-            CALL db.index.vector.queryNodes($index_name, $k, $embedding) 
-            YIELD node, score
-            WITH node, score
-            OPTIONAL MATCH (node)-[:INCLUDES]->(script:StoryScript)
-            WITH node, score, collect(script.content) as scripts
-            RETURN node.storyline as text, score, node.id as id, scripts
-            """
-
-            storyline_results = self.db_manager.query(
-                query=storyline_query,
-                params={
-                    "index_name": "storyline_embeddings",
-                    "k": self.k,
-                    "embedding": query_embedding,
-                },
-            )
-
-            for result in storyline_results:
-                results["storylines"].append(
-                    {
-                        "text": result.get("text", ""),
-                        "score": result.get("score", 0.0),
-                        "scripts": result.get("scripts", []),
-                        "unit_id": result.get("id", ""),
-                    }
+            for kind, index_name, cypher, id_key in VECTOR_SEARCHES:
+                rows = self.db_manager.query(
+                    query=cypher, params=self._search_params(index_name, query_embedding)
                 )
+                results[kind] = self._to_results(rows, id_key)
+        except Exception as e:
+            print(f"벡터 검색 중 오류 발생: {e}")
 
-            # 행동 검색
-            act_query = """
-            CALL db.index.vector.queryNodes($index_name, $k, $embedding) 
-            YIELD node, score
-            WITH node, score
-            OPTIONAL MATCH (script:StoryScript)-[:PERFORMS]->(node)
-            WITH node, score, collect(script.content) as scripts
-            RETURN node.act as text, score, node.id as id, scripts
-            """
-
-            act_results = self.db_manager.query(
-                query=act_query,
-                params={
-                    "index_name": "act_embeddings",
-                    "k": self.k,
-                    "embedding": query_embedding,
-                },
-            )
-
-            for result in act_results:
-                results["acts"].append(
-                    {
-                        "text": result.get("text", ""),
-                        "score": result.get("score", 0.0),
-                        "scripts": result.get("scripts", []),
-                        "act_id": result.get("id", ""),
-                    }
-                )
+        return results
 
-            # 감정 검색
-            emotion_query = """
-            CALL db.index.vector.queryNodes($index_name, $k, $embedding) 
-            YIELD node, score
-            WITH node, score
-            OPTIONAL MATCH (script:StoryScript)-[:FEELS]->(node)
-            WITH node, score, collect(script.content) as scripts
-            RETURN node.emotion as text, score, node.id as id, scripts
-            """
-
-            emotion_results = self.db_manager.query(
-                query=emotion_query,
-                params={
-                    "index_name": "emotion_embeddings",
-                    "k": self.k,
-                    "embedding": query_embedding,
-                },
-            )
+    async def aretrieve_all(self, query: str) -> Dict[str, List[Dict[str, Any]]]:
+        """retrieve_all의 비동기 버전. 세 벡터 검색을 동시에 실행합니다."""
+        query_embedding = await asyncio.to_thread(self.embeddings.embed_query, query)
 
-            for result in emotion_results:
-                results["emotions"].append(
-                    {
-                        "text": result.get("text", ""),
-                        "score": result.get("score", 0.0),
-                        "scripts": result.get("scripts", []),
-                        "emotion_id": result.get("id", ""),
-                    }
+        results = {"storylines": [], "acts": [], "emotions": []}
+        try:
+            all_rows = await asyncio.gather(
+                *(
+                    self.db_manager.aquery(
+                        query=cypher,
+                        params=self._search_params(index_name, query_embedding),
+                    )
+                    for _, index_name, cypher, _ in VECTOR_SEARCHES
                 )
-
+            )
+            for (kind, _, _, id_key), rows in zip(VECTOR_SEARCHES, all_rows):
+                results[kind] = self._to_results(rows, id_key)
         except Exception as e:
             print(f"벡터 검색 중 오류 발생: {e}")
 
         return results
 
+    def _search_params(self, index_name: str, embedding: List[float]) -> Dict[str, Any]:
+        return {"index_name": index_name, "k": self.k, "embedding": embedding}
+
+    @staticmethod
+    def _to_results(rows: List[Dict[str, Any]], id_key: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                "text": row.get("text", ""),
+                "score": row.get("score", 0.0),
+                "scripts": row.get("scripts", []),
+                id_key: row.get("id", ""),
+            }
+            for row in rows
+        ]
+
     def get_context_from_results(
         self, results: Dict[str, List[Dict[str, Any]]], k: int = 3
     ) -> str:
@@ -0,0 +1,47 @@
+"""In-process telemetry counters and recent events.
+
+외부 수집기 없이 프로세스 안에서 카운터와 최근 이벤트를 모읍니다.
+사이드바 디버그 정보나 로그로 snapshot()을 확인할 수 있습니다.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict
+
+_counters: Counter = Counter()
+_events: deque = deque(maxlen=500)
+_lock = threading.Lock()
+
+
+def increment(name: str, value: int = 1) -> None:
+    """카운터를 증가시킵니다."""
+    with _lock:
+        _counters[name] += value
+
+
+def record_event(kind: str, **fields: Any) -> None:
+    """이벤트를 기록하고 kind 카운터를 증가시킵니다."""
+    event = {"kind": kind, "time": time.time(), **fields}
+    with _lock:
+        _counters[kind] += 1
+        _events.append(event)
+
+
+def record_skip(stage: str, reason: str, **fields: Any) -> None:
+    """턴 단계를 건너뛴 것을 기록합니다. (stage_skipped.<stage> 카운터)"""
+    record_event("stage_skipped", stage=stage, reason=reason, **fields)
+    increment(f"stage_skipped.{stage}")
+    print(f"Skipped stage {stage}: {reason}")
+
+
+def snapshot() -> Dict[str, Any]:
+    """현재 카운터와 최근 이벤트의 복사본을 반환합니다."""
+    with _lock:
+        return {"counters": dict(_counters), "events": list(_events)}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _events.clear()
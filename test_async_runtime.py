@@ -0,0 +1,49 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from async_runtime import iterate_sync, run_sync
+
+
+def test_run_sync_runs_on_background_loop():
+    async def current_thread():
+        await asyncio.sleep(0)
+        return threading.current_thread().name
+
+    assert run_sync(current_thread(), timeout=5) == "async-runtime"
+
+
+def test_concurrent_coroutines_share_the_loop():
+    async def gather():
+        await asyncio.gather(*(asyncio.sleep(0.1) for _ in range(50)))
+        return True
+
+    start = time.monotonic()
+    assert run_sync(gather(), timeout=5)
+    # 50개의 대기가 겹쳐서 실행됨
+    assert time.monotonic() - start < 1.0
+
+
+def test_iterate_sync_produces_on_loop_and_yields_in_order():
+    async def numbers():
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield i, threading.current_thread().name
+
+    items = []
+    for i, producer in iterate_sync(numbers, timeout=5):
+        items.append(i)
+        assert producer == "async-runtime"
+        assert threading.current_thread().name != "async-runtime"
+    assert items == [0, 1, 2]
+
+
+def test_iterate_sync_propagates_errors():
+    async def broken():
+        yield 1
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        list(iterate_sync(broken, timeout=5))
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+
+from clients import ModelLimiter, get_model_limiter
+
+
+def test_limiter_is_shared_per_model():
+    assert get_model_limiter("gpt-4o-mini") is get_model_limiter("gpt-4o-mini")
+    assert get_model_limiter("gpt-4o-mini").limit == 32
+
+
+def test_sync_calls_are_limited():
+    limiter = ModelLimiter(2)
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal active, peak
+        with limiter:
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak == 2
+
+
+def test_async_calls_are_limited():
+    limiter = ModelLimiter(3)
+    active, peak = 0, 0
+
+    async def call():
+        nonlocal active, peak
+        async with limiter:
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(10)))
+
+    asyncio.run(main())
+    assert peak == 3
+
+
+def test_acquire_gives_up_at_timeout():
+    limiter = ModelLimiter(1)
+    assert limiter.acquire()
+    assert not limiter.acquire(timeout=0.01)
+    assert limiter.depth == 1
+    limiter.release()
+    assert limiter.depth == 0
+
+
+def test_sync_and_async_calls_share_one_limit():
+    limiter = ModelLimiter(2)
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def enter():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+
+    def leave():
+        nonlocal active
+        with lock:
+            active -= 1
+
+    def sync_call():
+        with limiter:
+            enter()
+            time.sleep(0.02)
+            leave()
+
+    async def async_call():
+        async with limiter:
+            enter()
+            await asyncio.sleep(0.02)
+            leave()
+
+    async def main():
+        await asyncio.gather(*(async_call() for _ in range(6)))
+
+    threads = [threading.Thread(target=sync_call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    asyncio.run(main())
+    for t in threads:
+        t.join()
+    assert peak == 2
+    assert limiter.depth == 0
+
+
+def test_cancelled_async_waiter_does_not_keep_a_slot():
+    limiter = ModelLimiter(1)
+
+    async def main():
+        async with limiter:
+            waiter = asyncio.ensure_future(limiter.__aenter__())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+        await asyncio.wait_for(limiter.__aenter__(), timeout=1.0)
+        await limiter.__aexit__()
+
+    asyncio.run(main())
+    assert limiter.depth == 0
@@ -0,0 +1,57 @@
+from db_interface import TURN_CONTEXT_QUERY, DBInterface
+
+
+class FakeDB(DBInterface):
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def save_state(self, game_state):
+        pass
+
+    def load_state(self, session_id):
+        return {}
+
+    def query(self, query, params):
+        self.calls.append((query, params))
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def test_fetch_turn_context_parses_single_row():
+    db = FakeDB(
+        [
+            {
+                "beat": {
+                    "id": "scenebeat:scene:1:2",
+                    "next_scene_beats": '["scenebeat:scene:1:3"]',
+                    "description": "[역 안내] 판교역",
+                },
+                "scene_id": "scene:1",
+                "map_id": "map:1",
+                "available_actions": None,
+                "is_choice": True,
+            }
+        ]
+    )
+    context = db.fetch_turn_context("scenebeat:scene:1:1", None)
+
+    assert db.calls == [
+        (TURN_CONTEXT_QUERY, {"beat_id": "scenebeat:scene:1:1", "action": ""})
+    ]
+    assert context["next_beat_id"] == "scenebeat:scene:1:2"
+    assert context["beat"]["next_scene_beats"] == ["scenebeat:scene:1:3"]
+    assert context["beat"]["description"] == "[역 안내] 판교역"  # JSON이 아닌 문자열
+    assert (context["scene_id"], context["map_id"]) == ("scene:1", "map:1")
+    assert context["available_actions"] == []
+    assert context["is_choice"] is True
+
+
+def test_fetch_turn_context_without_next_beat():
+    assert FakeDB([]).fetch_turn_context("missing") is None
+
+    row = {"beat": None, "scene_id": None, "map_id": None}
+    db = FakeDB([{**row, "available_actions": [], "is_choice": False}])
+    assert db.fetch_turn_context("scenebeat:x", "help")["next_beat_id"] is None
@@ -0,0 +1,73 @@
+import json
+
+from db_interface import DBInterface
+from db_state_injector import (
+    INITIAL_SCENE_ID,
+    DBStateInjector,
+    invalidate_initial_state_template,
+)
+from scene_bundle import invalidate_scene_bundles
+from world_version import invalidate_world_version
+
+
+def make_bundle(context):
+    return {
+        "scene": {"id": INITIAL_SCENE_ID, "context": context, "available_actions": []},
+        "map": {"id": "map:pangyo", "locations": [{"id": "loc:1"}]},
+        "characters": [{"id": "character:Youngchul", "name": "영철"}],
+    }
+
+
+class FakeDB(DBInterface):
+    def __init__(self, version, bundle):
+        self.version = version
+        self.bundle = bundle
+        self.bundle_queries = 0
+
+    def save_state(self, game_state):
+        pass
+
+    def load_state(self, session_id):
+        return {}
+
+    def query(self, query, params=None):
+        if "WorldVersion" in query:
+            return [{"version": self.version}]
+        self.bundle_queries += 1
+        return [{"bundle": json.dumps(self.bundle, ensure_ascii=False)}]
+
+    def close(self):
+        pass
+
+
+def setup_function():
+    invalidate_world_version()
+    invalidate_scene_bundles()
+    invalidate_initial_state_template()
+
+
+def test_session_changes_do_not_leak_into_template():
+    db = FakeDB("v1", make_bundle("판교역"))
+    injector = DBStateInjector(db)
+
+    first = injector.inject({})
+    first["current_map"]["locations"].append({"id": "loc:2"})
+    first["characters"].clear()
+    first["context"] = "changed"
+
+    second = injector.inject({})
+    assert second["context"] == "판교역"
+    assert second["current_map"]["locations"] == [{"id": "loc:1"}]
+    assert [c["id"] for c in second["characters"]] == ["character:Youngchul"]
+    assert db.bundle_queries == 1
+
+
+def test_world_version_bump_rebuilds_template():
+    db = FakeDB("v1", make_bundle("판교역"))
+    injector = DBStateInjector(db)
+    assert injector.inject({})["context"] == "판교역"
+
+    db.version, db.bundle = "v2", make_bundle("새 판교역")
+    invalidate_world_version()  # 버전 조회 간격이 지난 것과 같음
+    assert injector.inject({})["context"] == "새 판교역"
+    assert db.bundle_queries == 2
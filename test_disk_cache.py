@@ -0,0 +1,54 @@
+import time
+
+from disk_cache import DiskLRUCache, make_key
+
+
+def test_get_and_set_persist(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = DiskLRUCache(path)
+    cache.set(make_key("a"), "value")
+    cache.close()
+
+    reopened = DiskLRUCache(path)
+    assert reopened.get(make_key("a")) == "value"
+    assert reopened.get(make_key("missing")) is None
+
+
+def test_lru_eviction():
+    cache = DiskLRUCache(":memory:", max_entries=2)
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    time.sleep(0.01)
+    cache.get("a")  # a를 최근 사용으로 갱신
+    time.sleep(0.01)
+    cache.set("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert len(cache) == 2
+
+
+def test_entries_expire():
+    cache = DiskLRUCache(":memory:")
+    cache.set("a", "1", ttl=0.05)
+    cache.set("b", "2")
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "2"
+
+
+def test_find_similar_within_namespace():
+    cache = DiskLRUCache(":memory:")
+    cache.set("near", "1", namespace="map", embedding=[1.0, 0.1])
+    cache.set("far", "2", namespace="map", embedding=[0.0, 1.0])
+    cache.set("other", "3", namespace="story", embedding=[1.0, 0.0])
+
+    assert cache.find_similar("map", [1.0, 0.0], threshold=0.95)[0] == "near"
+    assert cache.find_similar("map", [-1.0, 0.0], threshold=0.95) is None
+
+    cache.clear(prefix="map")
+    assert cache.find_similar("map", [1.0, 0.0], threshold=0.5) is None
+    assert cache.get("other") == "3"
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from embedding_dispatcher import EmbeddingDispatcher
+
+
+class FakeEmbeddings:
+    """호출 횟수를 기록하는 테스트용 임베딩 제공자"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("provider error")
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def fake_embeddings():
+    return FakeEmbeddings()
+
+
+def test_embed_query_returns_vector(fake_embeddings):
+    dispatcher = EmbeddingDispatcher(fake_embeddings, window_ms=1)
+    assert dispatcher.embed_query("abc") == [3.0, 1.0]
+    dispatcher.close()
+
+
+def test_concurrent_requests_are_batched_and_deduped(fake_embeddings):
+    dispatcher = EmbeddingDispatcher(fake_embeddings, window_ms=50)
+    texts = ["help", "pass", "help", "go back", "pass", "help"]
+    results = {}
+
+    def worker(i, text):
+        results[i] = dispatcher.embed_query(text)
+
+    threads = [
+        threading.Thread(target=worker, args=(i, text)) for i, text in enumerate(texts)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    dispatcher.close()
+
+    # 하나의 provider 호출, 중복 제거된 입력
+    assert len(fake_embeddings.calls) == 1
+    assert sorted(fake_embeddings.calls[0]) == ["go back", "help", "pass"]
+    assert dispatcher.stats["coalesced"] == 3
+    for i, text in enumerate(texts):
+        assert results[i] == [float(len(text)), 1.0]
+
+
+def test_inflight_duplicate_is_coalesced():
+    embeddings = FakeEmbeddings(delay=0.1)
+    dispatcher = EmbeddingDispatcher(embeddings, window_ms=1)
+    first = dispatcher._submit("same text")
+    time.sleep(0.03)  # 첫 요청이 provider 호출 중인 시점
+    second = dispatcher._submit("same text")
+
+    assert first is second
+    assert first.result(timeout=1) == [9.0, 1.0]
+    assert len(embeddings.calls) == 1
+    dispatcher.close()
+
+
+def test_embed_documents_preserves_order(fake_embeddings):
+    dispatcher = EmbeddingDispatcher(fake_embeddings, window_ms=5, max_batch_size=2)
+    texts = ["a", "bbb", "cc", "a"]
+    vectors = dispatcher.embed_documents(texts)
+    dispatcher.close()
+
+    assert [v[0] for v in vectors] == [1.0, 3.0, 2.0, 1.0]
+    assert all(len(batch) <= 2 for batch in fake_embeddings.calls)
+
+
+def test_provider_error_is_propagated_to_all_callers():
+    dispatcher = EmbeddingDispatcher(FakeEmbeddings(fail=True), window_ms=1)
+    with pytest.raises(RuntimeError):
+        dispatcher.embed_documents(["x", "y"])
+    # 실패한 요청은 in-flight 목록에서 제거되어 재시도 가능
+    assert dispatcher._inflight == {}
+    dispatcher.close()
@@ -0,0 +1,58 @@
+from entity_resolution import EntityIndex, get_entity_index, normalize_name
+
+
+def test_resolves_names_and_aliases_to_existing_ids():
+    index = EntityIndex()
+    index.add("Character", "character:Guard", "Guard", aliases=["경비원"])
+    er_data = {
+        "nodes": [
+            {"id": "0", "label": "character", "properties": {"name": "경비원"}},
+            {"id": "1", "label": "Item", "properties": {"name": "Rusty Key"}},
+        ],
+        "relationships": [{"type": "HAS", "start_node_id": "0", "end_node_id": "1"}],
+    }
+
+    resolved = index.resolve_er_data(er_data)
+
+    assert [node["id"] for node in resolved["nodes"]] == [
+        "character:Guard",
+        "item:rustykey",
+    ]
+    assert "name" not in resolved["nodes"][0]["properties"]  # 대표 이름 유지
+    assert resolved["relationships"][0]["start_node_id"] == "character:Guard"
+    assert resolved["relationships"][0]["end_node_id"] == "item:rustykey"
+
+
+def test_new_entity_keeps_id_across_turns():
+    index = EntityIndex()
+    first = index.resolve_er_data(
+        {"nodes": [{"id": "0", "label": "Character", "properties": {"name": "민 지"}}]}
+    )
+    second = index.resolve_er_data(
+        {"nodes": [{"id": "3", "label": "Character", "properties": {"name": "민지!"}}]}
+    )
+    assert first["nodes"][0]["id"] == second["nodes"][0]["id"] == "character:민지"
+
+
+def test_embedding_fallback():
+    vectors = {"Guard": [1.0, 0.0], "station guard": [0.99, 0.05], "Rat": [0.0, 1.0]}
+    index = EntityIndex(embed=lambda texts: [vectors[t] for t in texts])
+    index.add("Character", "character:Guard", "Guard")
+
+    assert index.resolve("Character", "station guard") == "character:Guard"
+    assert index.resolve("Character", "Rat") is None
+
+
+def test_index_is_seeded_once_per_session_and_world():
+    calls = []
+
+    def seed():
+        calls.append(1)
+        return [("Location", "location:start", "시작 지점", [])]
+
+    index = get_entity_index("s1", "v1", seed, embed=lambda texts: [])
+    assert get_entity_index("s1", "v1", seed) is index
+    assert get_entity_index("s1", "v2", seed) is not index
+    assert len(calls) == 2
+    assert index.resolve("Location", "시작지점") == "location:start"
+    assert normalize_name(" Start-Point ") == "startpoint"
@@ -0,0 +1,51 @@
+from er_writer import build_er_write_query, write_er_data
+
+ER_DATA = {
+    "nodes": [
+        {"id": "0", "label": "character", "properties": {"name": "태훈"}},
+        {"id": "1", "label": "Character", "properties": {"name": "민지"}},
+        {"id": "2", "label": "Location", "properties": {"name": "판교역"}},
+        {"id": "3", "label": "Weapon) DETACH DELETE (x", "properties": {}},
+    ],
+    "relationships": [
+        {"type": "knows", "start_node_id": "0", "end_node_id": "1"},
+        {"type": "LOCATED IN", "start_node_id": "0", "end_node_id": "2"},
+        {"type": "DROP_ALL", "start_node_id": "0", "end_node_id": "1"},
+        {"type": "KNOWS", "start_node_id": "0", "end_node_id": "3"},
+    ],
+}
+
+
+class FakeDriver:
+    def __init__(self):
+        self.calls = []
+
+    def execute_query(self, query, params, **kwargs):
+        self.calls.append((query, params))
+        return [{"nodes_written": 3, "relationships_written": 2}], None, None
+
+
+def test_groups_by_label_and_type_and_skips_unknown():
+    query, params, skipped = build_er_write_query(ER_DATA)
+
+    assert skipped == 3  # 허용되지 않은 레이블, 유형, 끝점이 없는 관계
+    assert "DETACH" not in query and "DROP_ALL" not in query
+    assert query.count("UNWIND") == 4  # Character, Location, KNOWS, LOCATED_IN
+    assert [row["id"] for row in params["nodes0"]] == ["0", "1"]
+    assert "MERGE (a)-[r:LOCATED_IN]->(b)" in query
+
+
+def test_write_is_a_single_round_trip():
+    driver = FakeDriver()
+    result = write_er_data(driver, ER_DATA)
+
+    assert len(driver.calls) == 1
+    assert result == (3, 2, 3)
+
+
+def test_nothing_to_write_skips_query():
+    driver = FakeDriver()
+    result = write_er_data(driver, {"nodes": [], "relationships": []})
+
+    assert driver.calls == []
+    assert result == (0, 0, 0)
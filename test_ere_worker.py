@@ -0,0 +1,60 @@
+import threading
+import time
+
+import telemetry
+from ere_worker import EREWorker
+
+
+def test_jobs_of_a_session_run_in_order():
+    processed = []
+
+    def process(job):
+        time.sleep(0.001)
+        processed.append((job.session_id, job.user_input))
+
+    worker = EREWorker(process=process, shards=3)
+    for i in range(20):
+        for session in ("a", "b", "c"):
+            assert worker.submit(session, f"{session}{i}")
+    assert worker.wait_idle(timeout=5)
+    worker.shutdown()
+
+    for session in ("a", "b", "c"):
+        inputs = [text for sid, text in processed if sid == session]
+        assert inputs == [f"{session}{i}" for i in range(20)]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    telemetry.reset()
+    release = threading.Event()
+    worker = EREWorker(
+        process=lambda job: release.wait(5), shards=1, queue_size=1, enqueue_timeout=0.01
+    )
+    assert worker.submit("s", "first")  # 작업 스레드가 처리 중
+    time.sleep(0.05)
+    assert worker.submit("s", "second")  # 큐에서 대기
+
+    started = time.monotonic()
+    assert not worker.submit("s", "third")
+    assert time.monotonic() - started < 1
+    assert telemetry.snapshot()["counters"]["ere_dropped"] == 1
+
+    release.set()
+    assert worker.wait_idle(timeout=5)
+    worker.shutdown()
+
+
+def test_failed_job_does_not_stop_worker():
+    processed = []
+
+    def process(job):
+        if job.user_input == "bad":
+            raise ValueError("boom")
+        processed.append(job.user_input)
+
+    worker = EREWorker(process=process, shards=1)
+    worker.submit("s", "bad")
+    worker.submit("s", "good")
+    assert worker.wait_idle(timeout=5)
+    worker.shutdown()
+    assert processed == ["good"]
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import pytest
+
+from hedging import (
+    HedgePolicy,
+    LatencyTracker,
+    acall_hedged,
+    call_hedged,
+    is_transient_error,
+    stats,
+)
+
+FAST_HEDGE = HedgePolicy(default_delay=0.05, min_samples=1000)
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker()
+    for i in range(1, 101):
+        tracker.record(i / 100)
+    assert tracker.percentile(0.5) == pytest.approx(0.5, abs=0.02)
+    assert tracker.percentile(0.9) == pytest.approx(0.9, abs=0.02)
+
+
+def test_fast_primary_is_not_hedged():
+    calls = []
+    result = call_hedged("test-fast", lambda: calls.append(1) or "ok", policy=FAST_HEDGE)
+    assert result == "ok"
+    assert calls == [1]
+    assert stats["test-fast"]["hedged"] == 0
+
+
+def test_slow_primary_loses_to_hedge():
+    def slow():
+        time.sleep(0.5)
+        return "slow"
+
+    start = time.monotonic()
+    result = call_hedged("test-slow", slow, lambda: "hedge", policy=FAST_HEDGE)
+    assert result == "hedge"
+    assert time.monotonic() - start < 0.4
+    assert stats["test-slow"]["hedge_wins"] == 1
+
+
+def test_async_hedge_cancels_loser():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "slow"
+
+    async def fast():
+        return "hedge"
+
+    async def main():
+        result = await acall_hedged("test-async", slow, fast, policy=FAST_HEDGE)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == "hedge"
+    assert cancelled == [True]
+
+
+def test_transient_errors():
+    class RateLimitError(Exception):
+        pass
+
+    class StatusError(Exception):
+        status_code = 503
+
+    assert is_transient_error(RateLimitError())
+    assert is_transient_error(StatusError())
+    assert not is_transient_error(ValueError("bad input"))
+
+
+def test_policy_without_hedge_never_duplicates():
+    def slow():
+        time.sleep(0.1)
+        return "slow"
+
+    policy = FAST_HEDGE._replace(hedge=False)
+    result = call_hedged("test-no-hedge", slow, lambda: "hedge", policy=policy)
+    assert result == "slow"
+    assert stats["test-no-hedge"]["hedged"] == 0
@@ -0,0 +1,40 @@
+from history_manager import SUMMARY_PREFIX, HistoryManager, trim_history
+
+
+def test_trim_history_keeps_recent_turns():
+    history = [f"턴 {i}." for i in range(10)]
+    assert trim_history(history, max_turns=3, token_budget=1000) == history[-3:]
+
+
+def test_trim_history_keeps_leading_summary():
+    history = [SUMMARY_PREFIX + "요약.", "a.", "b.", "c."]
+    assert trim_history(history, max_turns=2, token_budget=1000) == [
+        SUMMARY_PREFIX + "요약.",
+        "b.",
+        "c.",
+    ]
+
+
+def test_manager_folds_old_turns_into_summary():
+    manager = HistoryManager(max_recent_turns=2, token_budget=1000, background=False)
+    for i in range(5):
+        manager.add_turn(f"턴 {i} 시작. 나머지 내용.")
+
+    history = manager.prompt_history()
+    assert history[0].startswith(SUMMARY_PREFIX)
+    assert "턴 0 시작." in history[0]
+    assert history[1:] == ["턴 3 시작. 나머지 내용.", "턴 4 시작. 나머지 내용."]
+
+
+def test_summarizer_failure_falls_back_to_extractive():
+    def broken(previous, turns):
+        raise RuntimeError("boom")
+
+    manager = HistoryManager(
+        max_recent_turns=1, token_budget=1000, summarizer=broken, background=False
+    )
+    manager.add_turn("첫 번째. 추가.")
+    manager.add_turn("두 번째. 추가.")
+
+    assert manager.summary == "첫 번째."
+    assert manager.turns == ["두 번째. 추가."]
@@ -0,0 +1,78 @@
+import json
+from types import SimpleNamespace
+
+import image_gen
+from image_gen import FALLBACK_DESCRIPTION, translate_and_summarize_batch
+
+
+class FakeModels:
+    def __init__(self, text):
+        self.text = text
+        self.calls = []
+
+    def generate_content(self, model, contents, config):
+        self.calls.append(contents)
+        return SimpleNamespace(text=self.text)
+
+
+def use_client(monkeypatch, text):
+    models = FakeModels(text)
+    monkeypatch.setattr(
+        image_gen, "get_genai_client", lambda: SimpleNamespace(models=models)
+    )
+    return models
+
+
+def setup_function():
+    image_gen._translation_cache.clear()
+
+
+ITEMS = {"summary": ("무너진 지하철역", 30), "scene": ("깜빡이는 전등 아래", 50)}
+
+
+def test_missing_texts_are_translated_in_one_call(monkeypatch):
+    models = use_client(
+        monkeypatch, json.dumps({"summary": "ruined station", "scene": "flicker"})
+    )
+    result = translate_and_summarize_batch(ITEMS)
+    assert result == {"summary": "ruined station", "scene": "flicker"}
+    assert len(models.calls) == 1
+    assert "무너진 지하철역" in models.calls[0]
+    assert "깜빡이는 전등 아래" in models.calls[0]
+
+
+def test_cached_texts_are_not_sent_again(monkeypatch):
+    use_client(monkeypatch, json.dumps({"summary": "ruined station", "scene": "a"}))
+    translate_and_summarize_batch(ITEMS)
+
+    models = use_client(monkeypatch, json.dumps({"scene": "dark hallway"}))
+    assert translate_and_summarize_batch(ITEMS) == {
+        "summary": "ruined station",
+        "scene": "a",
+    }
+    assert models.calls == []
+
+    # 장면만 바뀌면 장면만 요청
+    items = {**ITEMS, "scene": ("어두운 복도", 50)}
+    result = translate_and_summarize_batch(items)
+    assert result == {"summary": "ruined station", "scene": "dark hallway"}
+    assert len(models.calls) == 1
+    assert "무너진 지하철역" not in models.calls[0]
+
+
+def test_bad_response_falls_back_without_caching(monkeypatch):
+    use_client(monkeypatch, "not json")
+    assert translate_and_summarize_batch(ITEMS) == {
+        "summary": FALLBACK_DESCRIPTION,
+        "scene": FALLBACK_DESCRIPTION,
+    }
+
+    # 빠진 키만 기본 묘사로 대체하고, 다음 호출에서 다시 요청
+    use_client(monkeypatch, json.dumps({"summary": "ruined station"}))
+    result = translate_and_summarize_batch(ITEMS)
+    assert result == {"summary": "ruined station", "scene": FALLBACK_DESCRIPTION}
+
+    models = use_client(monkeypatch, json.dumps({"scene": "flicker"}))
+    result = translate_and_summarize_batch(ITEMS)
+    assert result == {"summary": "ruined station", "scene": "flicker"}
+    assert len(models.calls) == 1
@@ -0,0 +1,36 @@
+import threading
+import time
+
+from image_jobs import ImageJobQueue
+
+
+def test_submit_returns_before_generation_finishes():
+    release = threading.Event()
+
+    def generate(summary, scene):
+        release.wait(5)
+        return f"{summary}|{scene}".encode("utf-8")
+
+    jobs = ImageJobQueue(generate=generate, workers=2)
+    started = time.monotonic()
+    job_id = jobs.submit("s", "map", "story")
+    assert time.monotonic() - started < 1
+    assert jobs.status(job_id) == "pending"
+    assert jobs.collect([job_id]) == {}
+
+    release.set()
+    assert jobs.wait_idle(timeout=5)
+    assert jobs.collect([job_id]) == {job_id: b"map|story"}
+    assert jobs.status(job_id) == "unknown"  # 꺼낸 결과는 지워짐
+    jobs.shutdown()
+
+
+def test_failed_and_unknown_jobs_are_reported_as_none():
+    def generate(summary, scene):
+        raise RuntimeError("quota")
+
+    jobs = ImageJobQueue(generate=generate, workers=1)
+    job_id = jobs.submit("s", "map", "story")
+    assert jobs.wait_idle(timeout=5)
+    assert jobs.collect([job_id, "missing"]) == {job_id: None, "missing": None}
+    jobs.shutdown()
@@ -0,0 +1,116 @@
+from image_scheduler import ImagePolicy, ImageScheduler
+
+
+class FakeJobs:
+    def __init__(self):
+        self.submitted = []
+        self.done = {}
+
+    def submit(self, session_id, summary, scene):
+        job_id = f"job{len(self.submitted)}"
+        self.submitted.append((job_id, session_id, scene))
+        return job_id
+
+    def pending(self):
+        return len(self.submitted) - len(self.done)
+
+    def collect(self, job_ids):
+        return {job_id: self.done[job_id] for job_id in job_ids if job_id in self.done}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(**policy):
+    jobs = FakeJobs()
+    scheduler = ImageScheduler(
+        jobs=jobs, policy=ImagePolicy(**policy), clock=FakeClock(), background=False
+    )
+    return scheduler, jobs
+
+
+def test_triggers_on_scene_change_and_spacing():
+    scheduler, _ = make_scheduler(min_turns_between=3)
+
+    def reason(text, scene="scene:1", **kwargs):
+        return scheduler.schedule("s", text, scene=scene, **kwargs).reason
+
+    assert reason("폐허가 된 역") == "scene_change"  # 첫 턴
+    assert reason("잘못된 입력", action_result="invalid_input") == "invalid_input"
+    assert reason("다른 이야기") == "too_soon"
+    assert reason("또 다른 이야기") == "too_soon"
+    assert reason("폐허가 된 역") == "not_significant"
+    assert reason("무너진 다리 위의 그림자") == "significance"
+    assert reason("새 장소", scene="scene:2") == "scene_change"
+
+
+def test_map_change_in_same_scene_triggers_image():
+    scheduler, _ = make_scheduler(min_turns_between=3)
+
+    def reason(text, map_id):
+        return scheduler.schedule("s", text, scene="scene:1", map_id=map_id).reason
+
+    assert reason("역 대합실", "map:B2") == "scene_change"
+    assert reason("역 대합실 안쪽", "map:B2") == "too_soon"
+    assert reason("계단 아래 승강장", "map:B3") == "scene_change"
+
+
+def test_budgets_and_priority_across_sessions():
+    scheduler, jobs = make_scheduler(
+        session_per_hour=1, global_per_minute=2, max_in_flight=10
+    )
+    scheduler.schedule("a", "첫 장면", scene="scene:1")
+    assert scheduler.schedule("a", "둘째 장면", scene="scene:2").reason == (
+        "session_budget"
+    )
+    scheduler.schedule("b", "b 장면", scene="scene:1")
+    scheduler.schedule("c", "c 장면", scene="scene:1")
+
+    assert scheduler.dispatch() == 2  # 전역 분당 예산
+    assert [session for _, session, _ in jobs.submitted] == ["a", "b"]
+    assert scheduler.queued() == 1
+
+    scheduler._clock.now += 61
+    assert scheduler.dispatch() == 1
+
+
+def test_revisited_scene_beat_reuses_image():
+    scheduler, jobs = make_scheduler()
+    first = scheduler.schedule("a", "역 앞", scene="scene:1", scene_beat="beat:1")
+    scheduler.dispatch()
+    jobs.done["job0"] = "ref0"
+    assert scheduler.collect([first.ticket]) == {first.ticket: "ref0"}
+
+    decision = scheduler.schedule("b", "역 앞", scene="scene:1", scene_beat="beat:1")
+    assert (decision.action, decision.ref) == ("reuse", "ref0")
+    assert len(jobs.submitted) == 1
+
+
+def test_turn_image_is_cached_under_the_new_beat():
+    scheduler, jobs = make_scheduler()
+    state = {"scene": "scene:1", "scene_beat": "beat:1", "map": "map:B2"}
+    result = {"generation": "개찰구를 넘어 승강장으로", "scene_beat": "beat:2"}
+
+    decision = scheduler.schedule_turn("a", result, state)
+    scheduler.dispatch()
+    jobs.done["job0"] = "ref0"
+    scheduler.collect([decision.ticket])
+
+    assert scheduler._cached(("scene:1", "beat:2")) == "ref0"
+    assert scheduler._cached(("scene:1", "beat:1")) is None
+
+
+def test_uncollected_tickets_are_pruned():
+    scheduler, _ = make_scheduler(max_wait=10.0, result_ttl=60.0)
+    scheduler.schedule("gone", "버려진 세션의 장면", scene="scene:1")
+    scheduler.dispatch()
+    assert len(scheduler._tickets) == 1
+
+    scheduler._clock.now += 71
+    scheduler.dispatch()
+    assert scheduler._tickets == {}
@@ -0,0 +1,34 @@
+import os
+import time
+
+from image_store import ImageStore
+
+
+def test_same_image_is_stored_once(tmp_path):
+    store = ImageStore(path=str(tmp_path))
+    ref = store.put(b"image-bytes")
+
+    assert store.put(b"image-bytes") == ref
+    assert ref in store
+    assert store.get(ref, display=False) == b"image-bytes"
+    originals = [name for _, _, files in os.walk(tmp_path) for name in files]
+    assert originals.count(f"{ref}.img") == 1
+
+
+def test_unknown_or_invalid_refs_return_none(tmp_path):
+    store = ImageStore(path=str(tmp_path))
+    assert store.path_for("0" * 64) is None
+    assert store.path_for("../../etc/passwd") is None
+
+
+def test_retention_evicts_least_recently_used_first(tmp_path):
+    store = ImageStore(path=str(tmp_path), max_bytes=25)
+    refs = [store.put(bytes([i]) * 10) for i in range(3)]
+    past = time.time() - 100
+    for age, ref in enumerate(refs):
+        os.utime(store.path_for(ref, display=False), (past + age, past + age))
+    store.path_for(refs[0], display=False)  # 표시하면 최근에 쓰인 것으로 갱신
+
+    assert store.enforce_retention() == 1
+    assert refs[0] in store and refs[2] in store
+    assert refs[1] not in store
@@ -0,0 +1,28 @@
+from invalid_input import DEFAULT_NARRATIONS, get_invalid_narration, invalid_input_node
+
+BEAT = "scenebeat:scene:00_Pangyo_Station:1"
+
+
+def test_uses_beat_narrations():
+    narrations = {BEAT: ["영준은 '{user_input}'에 반응하지 않습니다."]}
+    narration = get_invalid_narration(BEAT, "춤추기", narrations=narrations)
+    assert narration == "영준은 '춤추기'에 반응하지 않습니다."
+
+
+def test_falls_back_to_templates_with_action_hint():
+    narration = get_invalid_narration(
+        "scenebeat:unknown", "춤추기", ["help", "pass"], narrations={}
+    )
+    assert narration.endswith("help, pass")
+    assert any(
+        narration.startswith(t.replace("{user_input}", "춤추기")[:10])
+        for t in DEFAULT_NARRATIONS
+    )
+
+
+def test_node_returns_generation_without_llm():
+    result = invalid_input_node(
+        {"scene_beat": BEAT, "user_input": "춤추기", "available_actions": []}
+    )
+    assert result["generation"]
+    assert result["action_result"] == "invalid_input"
@@ -0,0 +1,11 @@
+from map_agent import map_analysis_key
+
+
+def test_key_ignores_story_text_but_follows_progress():
+    first = map_analysis_key("MAP", {"x": 1, "y": 2}, "north", "beat:1", None)
+    # 이동하지 않은 다음 턴은 생성된 이야기가 달라도 같은 키
+    assert map_analysis_key("MAP", {"y": 2, "x": 1}, "north", "beat:1") == first
+
+    assert map_analysis_key("MAP", {"x": 2, "y": 2}, "north", "beat:1") != first
+    assert map_analysis_key("MAP", {"x": 1, "y": 2}, "north", "beat:2") != first
+    assert map_analysis_key("MAP", {"x": 1, "y": 2}, "north", "beat:1", "help") != first
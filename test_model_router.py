@@ -0,0 +1,74 @@
+import telemetry
+from model_router import (
+    PROBE_INTERVAL,
+    ModelRouter,
+    StageRoute,
+    map_analysis_confidence,
+    router_stats,
+    short_answer_confidence,
+)
+
+ROUTES = {"stage": StageRoute(("small", "large"), max_easy_tokens=50)}
+
+
+class FakeLimiter:
+    def __init__(self, saturated=False):
+        self.saturated = saturated
+
+
+def make_router(saturated=()):
+    limiters = {name: FakeLimiter(name in saturated) for name in ("small", "large")}
+    return ModelRouter(ROUTES, limiter=limiters.__getitem__)
+
+
+def test_easy_requests_use_small_model_and_long_ones_start_large():
+    router = make_router()
+    assert router.choose("stage", "짧은 입력") == ("small", "default")
+    assert router.choose("stage", "긴 입력 " * 100) == ("large", "length")
+    assert router.next_model("stage", "small") == "large"
+    assert router.next_model("stage", "large") is None
+
+
+def test_low_past_confidence_and_queue_depth_escalate():
+    router = make_router()
+    for _ in range(10):
+        router.record("stage", "small", "q", "", latency=0.1, confidence=0.0)
+    assert router.choose("stage", "new question") == ("large", "confidence")
+
+    busy = make_router(saturated={"small"})
+    assert busy.choose("stage", "new question") == ("large", "queue")
+
+
+def test_skipped_small_model_gets_probe_traffic_and_recovers():
+    router = make_router()
+    for _ in range(10):
+        router.record("stage", "small", "q", "", latency=0.1, confidence=0.0)
+
+    chosen = []
+    for i in range(PROBE_INTERVAL * 30):
+        model, reason = router.choose("stage", f"question {i}")
+        chosen.append(reason)
+        # 두 모델 모두 이제 잘 답함
+        router.record("stage", model, f"question {i}", "ok", 0.1, confidence=1.0)
+
+    assert "probe" in chosen
+    assert router.success_rate("stage", "small") >= 0.7
+    assert router.choose("stage", "another question") == ("small", "default")
+
+
+def test_cached_prompt_goes_back_to_serving_model_and_counters_publish():
+    telemetry.reset()
+    router = make_router()
+    router.record("stage", "large", "same prompt", "answer", latency=0.2, confidence=1.0)
+
+    assert router.choose("stage", "same prompt") == ("large", "cache")
+    stats = router_stats()["large"]
+    assert stats["calls"] == 1
+    assert stats["avg_latency_ms"] == 200
+
+
+def test_confidence_functions():
+    assert short_answer_confidence("go down") == 1.0
+    assert short_answer_confidence("The closest action is\ngo down") == 0.0
+    assert map_analysis_confidence("## Visible Area\n...\n## Map Analysis") == 1.0
+    assert map_analysis_confidence("nothing") == 0.0
@@ -0,0 +1,65 @@
+from prompt_registry import (
+    CompiledPrompt,
+    load_prompt_file,
+    prompt_metrics,
+    register_prompt,
+    split_markdown_sections,
+)
+
+
+def test_static_sections_come_first():
+    prompt = CompiledPrompt(
+        "test",
+        [
+            ("intro", "Role {{json}}\n"),
+            ("input", "Input: {text}\n"),
+            ("rules", "Rules\n"),
+        ],
+    )
+
+    assert prompt.static_prefix == "Role {json}\nRules\n"
+    assert prompt.format(text="hi") == "Role {json}\nRules\nInput: hi\n"
+    assert prompt.input_variables == ["text"]
+
+
+def test_version_follows_content_and_metrics_are_recorded():
+    first = register_prompt("versioned", [("a", "static\n"), ("b", "{x}\n")])
+    same = register_prompt("versioned", [("a", "static\n"), ("b", "{x}\n")])
+    changed = register_prompt("versioned", [("a", "static!\n"), ("b", "{x}\n")])
+
+    assert same is first
+    assert changed.version != first.version
+
+    changed({"x": "동적 입력"})
+    metrics = prompt_metrics()["versioned"]
+    assert metrics["version"] == changed.version
+    assert metrics["static_tokens"] > 0
+    assert metrics["sections"]["b"]["renders"] == 1
+    assert metrics["dynamic_tokens_last"] == metrics["sections"]["b"]["tokens_last"]
+
+
+def test_yaml_prompt_moves_input_data_to_the_end():
+    sections = split_markdown_sections("# Role\nA\n# Input\n{history}\n# Rules\nB\n")
+    assert [title for title, _ in sections] == ["Role", "Input", "Rules"]
+
+    prompt = load_prompt_file("story_chain_test", "story-gen-prompt-eng.yaml")
+    rendered = prompt.format(map_context="MAP", history="HISTORY")
+    assert rendered.startswith(prompt.static_prefix)
+    assert rendered.rstrip().endswith("the story created so far.)")
+    assert "# Input Data" in rendered[len(prompt.static_prefix):]
+
+
+def test_map_prompt_keeps_file_order_and_balanced_fences():
+    sections = split_markdown_sections("# A\n```\n# not a section\n```\n# B\n")
+    assert [title for title, _ in sections] == ["A", "B"]
+
+    prompt = load_prompt_file(
+        "map_analyst_test", "analysis_map_prompt_eng.yaml", reorder=False
+    )
+    rendered = prompt.format(
+        current_map="MAP", player_position="VISIBLE", history="HISTORY"
+    )
+    fences = [line for line in rendered.splitlines() if line.strip().startswith("```")]
+    assert len(fences) % 2 == 0
+    assert rendered.index("HISTORY") < rendered.index("# Output Format")
+    assert "HISTORY" not in rendered[rendered.index("```markdown") :]
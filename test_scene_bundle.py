@@ -0,0 +1,61 @@
+import json
+
+from scene_bundle import (
+    PLAYER_CHARACTER_ID,
+    build_scene_bundle,
+    invalidate_scene_bundles,
+    load_scene_bundle,
+)
+from world_version import invalidate_world_version
+
+SCENE = {
+    "id": "scene:test",
+    "map": "map:test",
+    "characters": [PLAYER_CHARACTER_ID, "character:Youngchul"],
+    "scene_beats": [{"id": "beat:1", "characters": ["character:Taehoon"]}],
+}
+MAPS = {"map:test": {"id": "map:test", "locations": '[{"id": "loc:1"}]'}}
+CHARACTERS = [
+    {"id": PLAYER_CHARACTER_ID, "name": "Player"},
+    {"id": "character:Youngchul", "name": "영철"},
+    {"id": "character:Taehoon", "name": "태훈"},
+]
+
+
+class FakeDB:
+    def __init__(self, bundle):
+        self.bundle = json.dumps(bundle, ensure_ascii=False)
+        self.bundle_queries = 0
+
+    def query(self, query, params=None):
+        if "WorldVersion" in query:
+            return [{"version": "v1"}]
+        self.bundle_queries += 1
+        return [{"bundle": self.bundle}]
+
+
+def setup_function():
+    invalidate_world_version()
+    invalidate_scene_bundles()
+
+
+def test_bundle_excludes_player_character():
+    bundle = build_scene_bundle(SCENE, MAPS, CHARACTERS)
+    assert [c["id"] for c in bundle["characters"]] == [
+        "character:Youngchul",
+        "character:Taehoon",
+    ]
+    assert bundle["map"]["locations"] == [{"id": "loc:1"}]
+
+
+def test_loaded_bundle_is_a_copy():
+    db = FakeDB(build_scene_bundle(SCENE, MAPS, CHARACTERS))
+
+    first = load_scene_bundle(db, "scene:test")
+    first["map"]["name"] = "changed by one session"
+    first["characters"].clear()
+
+    second = load_scene_bundle(db, "scene:test")
+    assert db.bundle_queries == 1  # 캐시 사용
+    assert second["map"].get("name") is None
+    assert len(second["characters"]) == 2
@@ -0,0 +1,109 @@
+import pytest
+
+from scene_graph import SceneGraph, Transition
+
+
+@pytest.fixture
+def scene_graph():
+    """initial_scenes.json으로 만든 씬 그래프"""
+    return SceneGraph.from_file(version="test")
+
+
+def test_condition_transition(scene_graph):
+    transition = scene_graph.resolve("scenebeat:scene:00_Pangyo_Station:1", "help")
+    assert transition == Transition(
+        "scenebeat:scene:00_Pangyo_Station:2",
+        "scene:00_Pangyo_Station",
+        "map:Pangyo_B2_Concourse",
+    )
+
+
+def test_next_transition_without_action(scene_graph):
+    assert (
+        scene_graph.next_beat("scenebeat:scene:00_Pangyo_Station:3")
+        == "scenebeat:location:stair_sinsa"
+    )
+
+
+def test_transition_into_another_scene(scene_graph):
+    transition = scene_graph.resolve("scenebeat:location:stair_sinsa", "go down")
+    assert transition.beat_id == "scenebeat:scene:01_Sinsa_Platform:1"
+    assert transition.scene_id == "scene:01_Sinsa_Platform"
+    assert transition.map_id == "map:Pangyo_Platform_Sinsa"
+
+
+def test_unknown_action_stays_on_current_beat(scene_graph):
+    assert scene_graph.next_beat("scenebeat:scene:00_Pangyo_Station:1", "dance") is None
+    # CONDITION이 맵을 가리키는 경우도 SceneBeat가 아니므로 이동하지 않음
+    assert (
+        scene_graph.next_beat("scenebeat:scene:00_Pangyo_Station:3", "go to sinsa platform")
+        is None
+    )
+    assert scene_graph.resolve("scenebeat:scene:00_Pangyo_Station:1", "dance") is None
+
+
+def test_available_actions_and_choice(scene_graph):
+    assert "help" in scene_graph.available_actions("scene:00_Pangyo_Station")
+    assert scene_graph.available_actions("scenebeat:location:stair_gwanggyo") == [
+        "go down",
+        "go back",
+    ]
+    assert scene_graph.is_choice("scenebeat:scene:00_Pangyo_Station:1")
+    assert not scene_graph.is_choice("scenebeat:scene:00_Pangyo_Station:5")
+
+
+class FakeDBManager:
+    """씬 그래프 적재 쿼리에 응답하는 테스트용 DB 매니저"""
+
+    def __init__(self):
+        self.queries = 0
+
+    def query(self, query, params):
+        self.queries += 1
+        if "MATCH (s:Scene)" in query:
+            return [
+                {
+                    "scene_id": "scene:a",
+                    "map_id": "map:a",
+                    "available_actions": ["go"],
+                }
+            ]
+        return [
+            {
+                "beat_id": "scenebeat:scene:a:1",
+                "scene_id": "scene:a",
+                "available_actions": None,
+                "properties": {"id": "scenebeat:scene:a:1"},
+                "conditions": [{"action": "go", "target": "scenebeat:scene:a:2"}],
+                "next_ids": ["scenebeat:scene:a:2"],
+            },
+            {
+                "beat_id": "scenebeat:scene:a:2",
+                "scene_id": "scene:a",
+                "available_actions": None,
+                "properties": {"id": "scenebeat:scene:a:2", "choices": '["x", "y"]'},
+                "conditions": [],
+                "next_ids": [],
+            },
+        ]
+
+
+def test_from_db_builds_same_structure():
+    db_manager = FakeDBManager()
+    graph = SceneGraph.from_db(db_manager, version="v1")
+
+    assert db_manager.queries == 2
+    assert graph.version == "v1"
+    assert graph.resolve("scenebeat:scene:a:1", "go") == Transition(
+        "scenebeat:scene:a:2", "scene:a", "map:a"
+    )
+    assert graph.available_actions("scenebeat:scene:a:1") == ["go"]
+    assert graph.beat("scenebeat:scene:a:2")["choices"] == ["x", "y"]
+
+
+def test_beat_properties_are_returned_as_copies(scene_graph):
+    beat = scene_graph.beat("scenebeat:scene:00_Pangyo_Station:1")
+    assert beat["id"] == "scenebeat:scene:00_Pangyo_Station:1"
+    beat["id"] = "changed"
+    assert scene_graph.beat("scenebeat:scene:00_Pangyo_Station:1")["id"] != "changed"
+    assert scene_graph.beat("scenebeat:missing") == {}
@@ -0,0 +1,24 @@
+import states
+from states import load_initial_player_state
+
+
+def setup_function():
+    states._initial_state_template = None
+
+
+def test_player_state_changes_do_not_leak_into_template():
+    first = load_initial_player_state()
+    first["player"]["name"] = "changed"
+    first["history"].append("turn 1")
+
+    second = load_initial_player_state()
+    assert second["player"]["name"] != "changed"
+    assert "turn 1" not in second["history"]
+
+
+def test_missing_state_file_uses_default(monkeypatch, tmp_path):
+    monkeypatch.setattr(states, "SAMPLE_STATE_FILE_PATH", str(tmp_path / "none.json"))
+    state = load_initial_player_state()
+    assert state["player"] == states.DEFAULT_INITIAL_STATE["player"]
+    state["player"]["name"] = "changed"
+    assert states.DEFAULT_INITIAL_STATE["player"]["name"] == "Player"
@@ -0,0 +1,73 @@
+from story_memory import StoryMemory, format_memories
+
+VECTORS = {
+    "열쇠를 줍는다": [1.0, 0.0, 0.0],
+    "녹슨 열쇠가 손에 들어왔다.": [0.9, 0.1, 0.0],
+    "경비원에게 말을 건다": [0.0, 1.0, 0.0],
+    "경비원은 아무 말도 하지 않았다.": [0.0, 0.9, 0.1],
+    "문을 열쇠로 연다": [0.95, 0.0, 0.05],
+}
+
+
+def embed(texts):
+    return [VECTORS[text] for text in texts]
+
+
+def test_search_returns_related_turns_in_order(tmp_path):
+    memory = StoryMemory(path=str(tmp_path), embed=embed, top_k=4)
+    memory.add_turn("s1", "열쇠를 줍는다", "녹슨 열쇠가 손에 들어왔다.")
+    memory.add_turn("s1", "경비원에게 말을 건다", "경비원은 아무 말도 하지 않았다.")
+
+    entries = memory.search("s1", "문을 열쇠로 연다")
+
+    assert [entry["text"] for entry in entries] == [
+        "열쇠를 줍는다",
+        "녹슨 열쇠가 손에 들어왔다.",
+    ]
+    assert "[이야기] 녹슨 열쇠가" in format_memories(entries)
+    assert memory.search("other", "문을 열쇠로 연다") == []
+
+
+def test_token_budget_and_exclude(tmp_path):
+    memory = StoryMemory(path=None, embed=embed)
+    memory.add_turn("s1", "열쇠를 줍는다", "녹슨 열쇠가 손에 들어왔다.")
+
+    excluded = memory.search(
+        "s1", "문을 열쇠로 연다", exclude=["녹슨 열쇠가 손에 들어왔다."]
+    )
+    assert [entry["text"] for entry in excluded] == ["열쇠를 줍는다"]
+    assert memory.search("s1", "문을 열쇠로 연다", token_budget=0) == []
+
+
+def test_index_persists_and_appends(tmp_path):
+    memory = StoryMemory(path=str(tmp_path), embed=embed)
+    memory.add_turn("s1", "열쇠를 줍는다", "녹슨 열쇠가 손에 들어왔다.")
+
+    reopened = StoryMemory(path=str(tmp_path), embed=embed)
+    reopened.record_turn("s1", "경비원에게 말을 건다", "").result(timeout=5)
+
+    entries = StoryMemory(path=str(tmp_path), embed=embed).search(
+        "s1", "경비원에게 말을 건다", top_k=10
+    )
+    assert entries[-1] == {
+        "turn": 1,
+        "kind": "player",
+        "text": "경비원에게 말을 건다",
+        "dim": 3,
+    }
+
+
+def test_search_scans_large_index(tmp_path):
+    vectors = {f"턴 {i}": [1.0, i / 100, 0.0] for i in range(40)}
+    vectors["질문"] = [0.0, 0.0, 1.0]
+    vectors["답"] = [0.0, 0.1, 1.0]
+    memory = StoryMemory(
+        path=str(tmp_path), embed=lambda texts: [vectors[t] for t in texts]
+    )
+    for i in range(20):
+        memory.add_turn("s1", f"턴 {2 * i}", f"턴 {2 * i + 1}")
+    memory.add_turn("s1", "답", "")
+
+    assert [entry["text"] for entry in memory.search("s1", "질문")] == ["답"]
+    reopened = StoryMemory(path=str(tmp_path), embed=memory._embed)
+    assert [entry["turn"] for entry in reopened.search("s1", "질문")] == [20]
@@ -0,0 +1,42 @@
+import time
+
+from ttl_cache import TTLCache
+
+
+def test_get_and_set():
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("missing", "default") == "default"
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # a를 최근 사용으로 갱신
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert len(cache) == 2
+
+
+def test_entries_expire():
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=10)
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+
+def test_falsy_values_are_cached():
+    cache = TTLCache()
+    cache.set("empty", "")
+    assert "empty" in cache
+    assert cache.get("empty", "default") == ""
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import telemetry
+from turn_branches import async_branch_node, branch_node
+from turn_budget import DEADLINE_KEY, config_remaining
+
+
+def setup_function():
+    telemetry.reset()
+
+
+def fallback(state):
+    return {"matched_action": None, "action_result": "invalid_input"}
+
+
+def test_branch_returns_only_output_keys():
+    def node(state, config):
+        return {"matched_action": "go", "action_result": "continue", "history": []}
+
+    run = branch_node(node, ["matched_action", "action_result"])
+    assert run({}, {}) == {"matched_action": "go", "action_result": "continue"}
+
+
+def test_branch_passes_deadline_and_falls_back_on_timeout():
+    seen = {}
+
+    def node(state, config):
+        seen["remaining"] = config_remaining(config)
+        # 모델 호출이 마감 시각을 넘겨 슬롯을 기다리지 않고 포기한 경우
+        raise TimeoutError("deadline")
+
+    run = branch_node(
+        node, ["matched_action"], timeout=2.0, fallback=fallback, stage="process_action"
+    )
+    config = {"configurable": {"session_id": "s1"}}
+    assert run({}, config) == fallback({})
+    assert telemetry.snapshot()["counters"]["stage_skipped.process_action"] == 1
+    assert 0 < seen["remaining"] <= 2.0
+    # 그래프의 config는 바꾸지 않음
+    assert DEADLINE_KEY not in config["configurable"]
+
+
+def test_async_branch_times_out_and_cancels_node():
+    finished = []
+
+    async def node(state, config):
+        await asyncio.sleep(1.0)
+        finished.append(True)
+        return {"matched_action": "go"}
+
+    run = async_branch_node(node, ["matched_action"], timeout=0.05, fallback=fallback)
+    started = time.monotonic()
+    assert asyncio.run(run({}, {})) == fallback({})
+    assert time.monotonic() - started < 0.5
+    assert not finished
+    assert telemetry.snapshot()["counters"]["stage_skipped.node"] == 1
+
+
+def test_async_branch_returns_only_output_keys():
+    async def node(state):
+        return {"map_context": "room", "map": "m2"}
+
+    run = async_branch_node(node, ["map_context"], timeout=1.0)
+    assert asyncio.run(run({}, {})) == {"map_context": "room"}
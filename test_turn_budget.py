@@ -0,0 +1,36 @@
+import time
+
+import telemetry
+from turn_budget import STORY_RESERVE, should_skip, stage_timeout
+
+
+def setup_function():
+    telemetry.reset()
+
+
+def test_no_deadline_never_skips():
+    assert not should_skip({}, "analyse_map")
+    assert stage_timeout({}, "analyse_map", 20.0) == 20.0
+
+
+def test_skips_and_records_when_budget_is_short():
+    state = {"turn_deadline": time.time() + STORY_RESERVE + 2.0}
+    assert not should_skip(state, "retrieve_context")
+    assert should_skip(state, "analyse_map")
+
+    counters = telemetry.snapshot()["counters"]
+    assert counters["stage_skipped.analyse_map"] == 1
+    assert "stage_skipped.retrieve_context" not in counters
+
+
+def test_stage_timeout_is_capped_by_remaining_budget():
+    state = {"turn_deadline": time.time() + STORY_RESERVE + 2.0}
+    assert stage_timeout(state, "analyse_map", 20.0) <= 2.0
+    assert stage_timeout(state, "analyse_map", 1.0) == 1.0
+
+
+def test_required_stage_keeps_its_minimum_timeout():
+    state = {"turn_deadline": time.time() + 1.0}
+    assert stage_timeout(state, "analyse_map", 20.0) == 0.1
+    assert stage_timeout(state, "process_action", 15.0) == 5.0
+    assert stage_timeout(state, "process_action", 3.0) == 3.0
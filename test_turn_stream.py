@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from turn_stream import run_game_turn, stream_game_turn
+
+
+def message(text, node):
+    return SimpleNamespace(content=text), {"langgraph_node": node}
+
+
+CHUNKS = [
+    ("values", {"generation": ""}),
+    ("messages", message("Door", "process_action")),
+    ("messages", message("어둠 속", "story_generation")),
+    ("messages", message("", "story_generation")),
+    ("messages", message("에서", "story_generation")),
+    ("values", {"generation": "어둠 속에서"}),
+]
+
+
+class FakeGraph:
+    def __init__(self):
+        self.calls = []
+
+    def stream(self, state, config=None, stream_mode=None):
+        self.calls.append((state, config, stream_mode))
+        return iter(CHUNKS)
+
+    async def astream(self, state, config=None, stream_mode=None):
+        self.calls.append((state, config, stream_mode))
+        for chunk in CHUNKS:
+            yield chunk
+
+
+def test_stream_passes_only_story_tokens_and_returns_final_state():
+    graph, tokens = FakeGraph(), []
+    config = {"configurable": {"session_id": "s1"}}
+    final = stream_game_turn(graph, {"user_input": "문"}, tokens.append, config=config)
+    assert tokens == ["어둠 속", "에서"]
+    assert final == {"generation": "어둠 속에서"}
+    assert graph.calls == [({"user_input": "문"}, config, ["messages", "values"])]
+
+
+def test_run_game_turn_bridges_async_graph():
+    graph, tokens = FakeGraph(), []
+    final = run_game_turn(graph, {"user_input": "문"}, tokens.append, timeout=5)
+    assert tokens == ["어둠 속", "에서"]
+    assert final == {"generation": "어둠 속에서"}
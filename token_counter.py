@@ -0,0 +1,37 @@
+"""Token counting helpers.
+
+tiktoken을 사용할 수 있으면 실제 토큰 수를, 없으면 글자 수 기반 근사치를 반환합니다.
+"""
+
+import math
+from functools import lru_cache
+from typing import Iterable
+
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o 계열
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(name: str):
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+    except Exception:
+        # tiktoken 미설치 또는 인코딩 파일을 받을 수 없는 환경
+        return None
+
+
+def count_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> int:
+    """문자열의 토큰 수를 반환합니다."""
+    if not text:
+        return 0
+    enc = _get_encoding(encoding)
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    # 한글이 섞인 텍스트 기준 대략 2글자당 1토큰
+    return math.ceil(len(text) / 2)
+
+
+def count_tokens_many(texts: Iterable[str], encoding: str = DEFAULT_ENCODING) -> int:
+    """여러 문자열의 토큰 수 합계를 반환합니다."""
+    return sum(count_tokens(text, encoding) for text in texts)
@@ -0,0 +1,69 @@
+"""Thread-safe LRU cache with per-entry TTL."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """크기와 유효 시간이 제한된 LRU 캐시
+
+    여러 세션(스레드)에서 공유할 수 있도록 모든 연산은 잠금으로 보호됩니다.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 600.0):
+        """
+        Args:
+            maxsize: 최대 항목 수. 넘치면 가장 오래 사용하지 않은 항목부터 제거
+            ttl: 항목 유효 시간 (초). None이면 만료되지 않음
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """값을 반환합니다. 없거나 만료되었으면 default를 반환합니다."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """값을 저장합니다. ttl을 주면 이 항목에만 다른 유효 시간을 적용합니다."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry else default
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,100 @@
+"""Parallel turn branches.
+
+턴 그래프의 병렬 브랜치(액션 매칭, 컨텍스트 검색, 맵 분석)를 감싸는 래퍼입니다.
+브랜치는 LangGraph가 병렬 단계를 실행하는 작업 스레드(비동기 그래프는 이벤트 루프)에서
+그대로 실행합니다. 별도 스레드 풀에서 기다리다 포기하면 제한 시간이 지난 호출이
+스레드와 모델 동시 호출 슬롯을 계속 잡고 있기 때문입니다.
+
+대신 브랜치의 마감 시각을 config로 넘기고(turn_budget.with_deadline), 모델 호출
+(clients.limit_concurrency, hedging.hedged)은 마감 시각이 지나면 슬롯을 기다리거나
+재시도하지 않고 TimeoutError를 냅니다. 노드는 받은 config를 모델 호출에 넘겨야 합니다.
+"""
+
+import asyncio
+import inspect
+from typing import Any, Callable, Dict, List, Optional
+
+from telemetry import record_skip
+from turn_budget import stage_timeout, with_deadline
+
+Fallback = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def _select(result: Any, output_keys: List[str]) -> Dict[str, Any]:
+    result = result if isinstance(result, dict) else {}
+    return {key: result[key] for key in output_keys if key in result}
+
+
+def branch_node(
+    node: Callable,
+    output_keys: List[str],
+    timeout: Optional[float] = None,
+    fallback: Optional[Fallback] = None,
+    stage: Optional[str] = None,
+) -> Callable:
+    """노드를 병렬 브랜치용으로 감쌉니다.
+
+    - 상태의 얕은 복사본으로 실행하고 output_keys에 해당하는 값만 반환하여
+      같은 단계의 다른 브랜치와 키가 충돌하지 않도록 합니다.
+    - timeout 초 뒤를 마감 시각으로 config에 넣어 노드의 모델 호출에 전달합니다.
+      마감 시각이 지나 TimeoutError가 나거나 오류가 나면 건너뛰기를 기록하고
+      fallback(state)을 반환합니다.
+    - stage를 주면 제한 시간을 턴의 남은 예산(turn_deadline)에 맞게 줄입니다.
+
+    동기 노드는 중간에 멈출 수 없으므로 제한 시간은 config를 받는 모델 호출
+    (슬롯 대기, 재시도)에서만 지켜집니다. 이미 보낸 HTTP 요청은 LLM_HTTP_TIMEOUT까지,
+    모델 호출이 아닌 작업(DB 조회 등)은 끝날 때까지 기다립니다. 제한 시간을 반드시
+    지켜야 하면 async_branch_node를 씁니다.
+    """
+    name = getattr(node, "__name__", node.__class__.__name__)
+    # config를 받지 않는 기존 노드도 감쌀 수 있도록 인자 수 확인
+    accepts_config = len(inspect.signature(node).parameters) > 1
+
+    def run(state: Dict[str, Any], config: Optional[Dict[str, Any]] = None):
+        limit = stage_timeout(state, stage, timeout) if stage else timeout
+        try:
+            if accepts_config:
+                result = node(dict(state), with_deadline(config, limit))
+            else:
+                result = node(dict(state))
+            return _select(result, output_keys)
+        except TimeoutError:
+            record_skip(stage or name, "branch timeout", timeout=limit)
+        except Exception as e:
+            record_skip(stage or name, "branch error", error=str(e))
+        return fallback(state) if fallback else {}
+
+    run.__name__ = name
+    return run
+
+
+def async_branch_node(
+    node: Callable,
+    output_keys: List[str],
+    timeout: Optional[float] = None,
+    fallback: Optional[Fallback] = None,
+    stage: Optional[str] = None,
+) -> Callable:
+    """비동기 노드를 병렬 브랜치용으로 감쌉니다. (branch_node의 비동기 버전)
+
+    asyncio.wait_for로 제한 시간이 지나면 노드를 취소하므로 모델 호출도 함께 멈춥니다.
+    """
+    name = getattr(node, "__name__", node.__class__.__name__)
+    accepts_config = len(inspect.signature(node).parameters) > 1
+
+    async def run(state: Dict[str, Any], config: Optional[Dict[str, Any]] = None):
+        limit = stage_timeout(state, stage, timeout) if stage else timeout
+        try:
+            if accepts_config:
+                coro = node(dict(state), with_deadline(config, limit))
+            else:
+                coro = node(dict(state))
+            return _select(await asyncio.wait_for(coro, timeout=limit), output_keys)
+        except (asyncio.TimeoutError, TimeoutError):
+            record_skip(stage or name, "branch timeout", timeout=limit)
+        except Exception as e:
+            record_skip(stage or name, "branch error", error=str(e))
+        return fallback(state) if fallback else {}
+
+    run.__name__ = name
+    return run
@@ -0,0 +1,109 @@
+"""Per-turn latency budget.
+
+턴을 시작할 때 마감 시각(turn_deadline)을 상태에 넣고, 모든 노드가 남은 시간을 보고
+선택 단계(검색, 맵 분석 갱신)를 실행할지 정합니다. 시간이 부족하면
+단계를 건너뛰거나 캐시된 결과를 쓰고, 건너뛴 사실은 telemetry에 기록합니다.
+스토리 생성은 건너뛰지 않으며, 그 앞 단계들은 STORY_RESERVE만큼의 시간을 남겨 둡니다.
+
+병렬 브랜치의 마감 시각은 config["configurable"][DEADLINE_KEY]로 모델 호출까지
+전달되어, 마감 시각이 지난 호출은 동시 호출 슬롯을 기다리거나 재시도하지 않습니다.
+"""
+
+import math
+import time
+from typing import Any, Dict, Optional
+
+from telemetry import record_skip
+
+DEFAULT_TURN_BUDGET = 30.0
+
+# 스토리 생성 전에 실행되는 단계가 스토리 생성을 위해 남겨 둘 시간 (초)
+STORY_RESERVE = 8.0
+
+# 단계를 시작하는 데 필요한 최소 남은 시간 (초)
+STAGE_MIN_REMAINING = {
+    "retrieve_context": 1.0,
+    "analyse_map": 4.0,
+}
+
+# 건너뛸 수 없는 필수 단계의 최소 제한 시간 (초). 예산이 부족해도 이보다 줄이지 않음
+# (액션 매칭이 시간 부족으로 실패하면 턴 전체가 잘못된 입력으로 처리됨)
+REQUIRED_STAGE_MIN_TIMEOUT = {
+    "process_action": 5.0,
+}
+
+# 브랜치 마감 시각(epoch 초)을 담는 config["configurable"] 키
+DEADLINE_KEY = "branch_deadline"
+
+
+def new_turn_deadline(budget: Optional[float] = None) -> float:
+    """지금부터 budget초 뒤의 마감 시각(epoch 초)을 반환합니다."""
+    if budget is None:
+        try:
+            import config
+
+            budget = config.TURN_BUDGET_SECONDS
+        except Exception:
+            budget = DEFAULT_TURN_BUDGET
+    return time.time() + budget
+
+
+def remaining(state: Dict[str, Any]) -> float:
+    """남은 시간 (초). 마감 시각이 없으면 무한대"""
+    deadline = state.get("turn_deadline")
+    if not deadline:
+        return math.inf
+    return deadline - time.time()
+
+
+def _available(state: Dict[str, Any], stage: str) -> float:
+    return remaining(state) - STORY_RESERVE
+
+
+def should_skip(state: Dict[str, Any], stage: str) -> bool:
+    """남은 시간이 부족하면 건너뛰기를 기록하고 True를 반환합니다."""
+    available = _available(state, stage)
+    if available >= STAGE_MIN_REMAINING.get(stage, 0.0):
+        return False
+    record_skip(stage, "turn budget", remaining=round(remaining(state), 2))
+    return True
+
+
+def stage_timeout(
+    state: Dict[str, Any], stage: str, timeout: Optional[float]
+) -> Optional[float]:
+    """단계의 제한 시간을 남은 예산에 맞게 줄입니다.
+
+    최소 0.1초, 필수 단계는 REQUIRED_STAGE_MIN_TIMEOUT까지만 줄입니다.
+    """
+    available = _available(state, stage)
+    if math.isinf(available):
+        return timeout
+    capped = max(REQUIRED_STAGE_MIN_TIMEOUT.get(stage, 0.1), available)
+    return capped if timeout is None else min(timeout, capped)
+
+
+def with_deadline(
+    config: Optional[Dict[str, Any]], timeout: Optional[float]
+) -> Dict[str, Any]:
+    """지금부터 timeout초 뒤의 마감 시각을 configurable에 넣은 config 복사본
+
+    이미 더 이른 마감 시각이 있으면 그대로 둡니다. timeout이 None이면 복사만 합니다.
+    """
+    config = dict(config or {})
+    configurable = dict(config.get("configurable") or {})
+    if timeout is not None:
+        deadline = time.time() + timeout
+        configurable[DEADLINE_KEY] = min(
+            deadline, configurable.get(DEADLINE_KEY, math.inf)
+        )
+    config["configurable"] = configurable
+    return config
+
+
+def config_remaining(config: Optional[Dict[str, Any]]) -> float:
+    """config의 브랜치 마감 시각까지 남은 시간 (초). 마감 시각이 없으면 무한대"""
+    deadline = ((config or {}).get("configurable") or {}).get(DEADLINE_KEY)
+    if not deadline:
+        return math.inf
+    return deadline - time.time()
@@ -0,0 +1,75 @@
+"""Turn streaming.
+
+턴 그래프를 (messages, values) 두 모드로 스트리밍하면서 스토리 생성 노드의 토큰만
+화면 콜백으로 전달하고, 마지막 values 항목을 최종 상태로 돌려줍니다.
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+from async_runtime import iterate_sync
+
+
+def _consume_turn_stream(
+    chunks, on_token: Callable[[str], None], story_node: str
+) -> Optional[Dict[str, Any]]:
+    """(mode, chunk) 스트림에서 스토리 토큰을 전달하고 최종 상태를 반환합니다."""
+    final_state = None
+    for mode, chunk in chunks:
+        if mode == "messages":
+            message, metadata = chunk
+            # 액션 매칭 등 다른 노드의 LLM 출력은 표시하지 않음
+            if metadata.get("langgraph_node") == story_node and message.content:
+                on_token(message.content)
+        elif mode == "values":
+            final_state = chunk
+    return final_state
+
+
+def stream_game_turn(
+    graph,
+    state: Dict[str, Any],
+    on_token: Callable[[str], None],
+    story_node: str = "story_generation",
+    config: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """그래프를 실행하면서 스토리 생성 노드의 토큰을 도착하는 대로 전달합니다.
+
+    Args:
+        graph: 컴파일된 LangGraph 그래프
+        state: 그래프 입력 상태
+        on_token: 스토리 토큰을 받을 콜백
+        story_node: 토큰을 전달할 노드 이름
+        config: 그래프 실행 설정 (configurable로 의존 객체 전달)
+
+    Returns:
+        그래프 실행이 끝난 뒤의 최종 상태 (invoke 결과와 동일)
+    """
+    chunks = graph.stream(state, config=config, stream_mode=["messages", "values"])
+    return _consume_turn_stream(chunks, on_token, story_node)
+
+
+def run_game_turn(
+    graph,
+    state: Dict[str, Any],
+    on_token: Callable[[str], None],
+    story_node: str = "story_generation",
+    config: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+) -> Optional[Dict[str, Any]]:
+    """비동기 턴 그래프를 백그라운드 이벤트 루프에서 실행하는 동기 브리지
+
+    그래프는 async_runtime의 루프에서 astream으로 실행되고, 토큰과 상태는
+    호출한 스레드(Streamlit 스크립트 스레드)로 전달되어 on_token이 호출됩니다.
+
+    Args:
+        graph: create_async_game_graph로 만든 그래프
+        timeout: 다음 스트림 항목을 기다리는 최대 시간 (초)
+        (나머지는 stream_game_turn과 같음)
+    """
+    chunks = iterate_sync(
+        lambda: graph.astream(
+            state, config=config, stream_mode=["messages", "values"]
+        ),
+        timeout=timeout,
+    )
+    return _consume_turn_stream(chunks, on_token, story_node)
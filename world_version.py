@@ -0,0 +1,86 @@
+"""World version stamp.
+
+db_init으로 월드 데이터를 다시 적재할 때마다 버전 스탬프를 갱신하여,
+프로세스 내부 캐시(씬 그래프 등)가 오래된 데이터를 사용하지 않도록 합니다.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Iterable, Optional
+
+WORLD_VERSION_NODE_ID = "world"
+
+# 버전 조회 결과를 재사용하는 시간 (초)
+VERSION_CHECK_INTERVAL = 30.0
+
+_lock = threading.Lock()
+_cached_version: Optional[str] = None
+_checked_at = 0.0
+
+
+def compute_data_version(file_paths: Iterable[str]) -> str:
+    """초기 데이터 파일 내용으로 버전 문자열을 계산합니다.
+
+    Args:
+        file_paths: 월드 데이터를 구성하는 파일 경로 목록
+
+    Returns:
+        파일 내용의 sha256 해시 (앞 16자리)
+    """
+    digest = hashlib.sha256()
+    for path in file_paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def stamp_world_version(db_manager, version: str) -> None:
+    """데이터베이스에 월드 버전을 기록합니다."""
+    query = """
+    MERGE (w:WorldVersion {id: $id})
+    SET w.version = $version, w.updated_at = timestamp()
+    """
+    db_manager.query(query=query, params={"id": WORLD_VERSION_NODE_ID, "version": version})
+    invalidate_world_version()
+
+
+def fetch_world_version(db_manager) -> Optional[str]:
+    """데이터베이스에 기록된 월드 버전을 조회합니다."""
+    query = """
+    MATCH (w:WorldVersion {id: $id})
+    RETURN w.version AS version
+    """
+    result = db_manager.query(query=query, params={"id": WORLD_VERSION_NODE_ID})
+    if not result:
+        return None
+    return result[0]["version"]
+
+
+def current_world_version(
+    db_manager, max_age: float = VERSION_CHECK_INTERVAL
+) -> Optional[str]:
+    """월드 버전을 반환합니다. max_age 초 동안은 마지막 조회 결과를 재사용합니다."""
+    global _cached_version, _checked_at
+    with _lock:
+        if time.monotonic() - _checked_at < max_age:
+            return _cached_version
+
+    try:
+        version = fetch_world_version(db_manager)
+    except Exception as e:
+        print(f"Error fetching world version: {e}")
+        with _lock:
+            return _cached_version
+
+    with _lock:
+        _cached_version = version
+        _checked_at = time.monotonic()
+    return version
+
+
+def invalidate_world_version() -> None:
+    """다음 호출에서 버전을 다시 조회하도록 캐시를 비웁니다."""
+    global _checked_at
+    with _lock:
+        _checked_at = 0.0